@@ -5,6 +5,10 @@ import pandas as pd
 from datetime import datetime
 import requests
 from utils.config import load_config
+from utils.quotes import get_market_overview, is_quote_stale
+from utils.cache import quote_cache
+from utils.figure_cache import figure_cache_stats
+from utils.prefetch import start_prefetcher
 
 
 # 加载配置
@@ -38,6 +42,9 @@ if 'theme' in st.session_state:
 # 显示侧边栏
 show_sidebar()
 
+# 启动后台预取（每个进程只启动一次）
+start_prefetcher()
+
 # 页面标题
 st.title("🏦 " + ("金融数据分析平台" if get_language() == "zh" else "Financial Analysis Platform"))
 
@@ -98,104 +105,93 @@ st.sidebar.caption(
     "版本 1.0.0" if get_language() == "zh" else "Version 1.0.0"
 )
 
-def get_stock_price(symbol):
-    """获取股票/指数最新价格"""
-    try:
-        ticker = yf.Ticker(symbol)
-        data = ticker.history(period='1d')
-        if not data.empty:
-            current_price = data['Close'].iloc[-1]
-            price_change = ((current_price - data['Open'].iloc[0]) / data['Open'].iloc[0]) * 100
-            return current_price, price_change
-        return None, None
-    except Exception as e:
-        return None, None
-
-def get_crypto_price(symbol):
-    """获取加密货币价格"""
-    try:
-        url = f"https://api.binance.com/api/v3/ticker/24hr?symbol={symbol}"
-        response = requests.get(url)
-        data = response.json()
-        return float(data['lastPrice']), float(data['priceChangePercent'])
-    except Exception as e:
-        return None, None
-
 # 显示市场概览
 st.subheader("📊 " + ("市场概览" if get_language() == "zh" else "Market Overview"))
 
+# 美股三大指数
+indices = {
+    '^GSPC': 'S&P 500',
+    '^DJI': 'Dow Jones',
+    '^IXIC': 'NASDAQ',
+    # A股指数
+    '000001.SS': '上证指数' if get_language() == "zh" else 'SSE Composite',
+    '399001.SZ': '深证成指' if get_language() == "zh" else 'SZSE Component'
+}
+
+# 美元和加元兑人民币
+currencies = {
+    'CNY=X': 'USD/CNY',
+    'CADCNY=X': 'CAD/CNY'
+}
+
+# 主要加密货币
+cryptos = {
+    'BTCUSDT': 'Bitcoin',
+    'ETHUSDT': 'Ethereum',
+    'SOLUSDT': 'Solana'
+}
+
+def stale_note(symbol):
+    """行情为过期缓存（上游故障或后台刷新中）时的提示"""
+    if not is_quote_stale(symbol):
+        return ""
+    return " <span style='color:gray'>(" + ("缓存" if get_language() == "zh" else "cached") + ")</span>"
+
+# 一次性并发获取全部行情（yfinance 批量请求 + Binance 并行请求）
+quotes = get_market_overview(
+    list(indices) + list(currencies) + ['GC=F'],
+    list(cryptos)
+)
+
 # 创建三列布局
 col1, col2, col3 = st.columns(3)
 
 with col1:
     st.markdown("### 🌎 " + ("主要指数" if get_language() == "zh" else "Major Indices"))
     
-    # 美股三大指数
-    indices = {
-        '^GSPC': 'S&P 500',
-        '^DJI': 'Dow Jones',
-        '^IXIC': 'NASDAQ',
-        # A股指数
-        '000001.SS': '上证指数' if get_language() == "zh" else 'SSE Composite',
-        '399001.SZ': '深证成指' if get_language() == "zh" else 'SZSE Component'
-    }
-    
     for symbol, name in indices.items():
-        price, change = get_stock_price(symbol)
+        price, change = quotes[symbol]
         if price and change:
             color = "green" if change >= 0 else "red"
             st.markdown(
                 f"{name}: {price:.2f} "
-                f"<span style='color:{color}'>({change:+.2f}%)</span>",
+                f"<span style='color:{color}'>({change:+.2f}%)</span>{stale_note(symbol)}",
                 unsafe_allow_html=True
             )
 
 with col2:
     st.markdown("### 💱 " + ("汇率" if get_language() == "zh" else "Exchange Rates"))
     
-    # 美元和加元兑人民币
-    currencies = {
-        'CNY=X': 'USD/CNY',
-        'CADCNY=X': 'CAD/CNY'
-    }
-    
     for symbol, name in currencies.items():
-        price, change = get_stock_price(symbol)
+        price, change = quotes[symbol]
         if price and change:
             color = "green" if change >= 0 else "red"
             st.markdown(
                 f"{name}: {price:.4f} "
-                f"<span style='color:{color}'>({change:+.2f}%)</span>",
+                f"<span style='color:{color}'>({change:+.2f}%)</span>{stale_note(symbol)}",
                 unsafe_allow_html=True
             )
     
     # 黄金价格
-    gold_price, gold_change = get_stock_price('GC=F')
+    gold_price, gold_change = quotes['GC=F']
     if gold_price and gold_change:
         color = "green" if gold_change >= 0 else "red"
         st.markdown(
             f"{'黄金' if get_language() == 'zh' else 'Gold'}: {gold_price:.2f} "
-            f"<span style='color:{color}'>({gold_change:+.2f}%)</span>",
+            f"<span style='color:{color}'>({gold_change:+.2f}%)</span>{stale_note('GC=F')}",
             unsafe_allow_html=True
         )
 
 with col3:
     st.markdown("### 🪙 " + ("加密货币" if get_language() == "zh" else "Cryptocurrencies"))
     
-    # 主要加密货币
-    cryptos = {
-        'BTCUSDT': 'Bitcoin',
-        'ETHUSDT': 'Ethereum',
-        'SOLUSDT': 'Solana'
-    }
-    
     for symbol, name in cryptos.items():
-        price, change = get_crypto_price(symbol)
+        price, change = quotes[symbol]
         if price and change:
             color = "green" if change >= 0 else "red"
             st.markdown(
                 f"{name}: ${price:,.2f} "
-                f"<span style='color:{color}'>({change:+.2f}%)</span>",
+                f"<span style='color:{color}'>({change:+.2f}%)</span>{stale_note(symbol)}",
                 unsafe_allow_html=True
             )
 
@@ -207,4 +203,16 @@ if st.button('🔄 ' + ("刷新数据" if get_language() == "zh" else "Refresh D
 st.caption(("最后更新时间: " if get_language() == "zh" else "Last Updated: ") + 
            datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
 
-
+# 显示共享行情缓存的命中情况
+cache_stats = quote_cache.stats()
+st.caption(
+    (f"行情缓存: 命中 {cache_stats['hits']} / 未命中 {cache_stats['misses']}" if get_language() == "zh"
+     else f"Quote cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
+)
+figure_stats = figure_cache_stats()
+st.caption(
+    (f"图表缓存: {figure_stats['figures']} 张 / {figure_stats['bytes'] / 1024 / 1024:.1f} MB，"
+     f"命中 {figure_stats['hits']} / 未命中 {figure_stats['misses']}") if get_language() == "zh"
+    else (f"Figure cache: {figure_stats['figures']} figures / {figure_stats['bytes'] / 1024 / 1024:.1f} MB, "
+          f"{figure_stats['hits']} hits / {figure_stats['misses']} misses")
+)
@@ -0,0 +1,70 @@
+"""策略回测性能：逐K线循环 vs utils.backtest，以及参数扫描逐组回测 vs 一次向量化
+
+用法：python benchmarks/bench_backtest.py [K线数量 ...]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_indicators import make_bars
+from utils.backtest import backtest, sweep
+from utils.indicators import evaluate
+
+ENTRY = [('MACD', 'cross_above', 'MACD_SIGNAL')]
+EXIT = [('RSI', '>', 70)]
+SWEEP_EXIT = [('RSI{window}', '>', '{level}')]
+GRID = {'window': [6, 9, 14, 21, 28], 'level': list(range(55, 90, 5))}
+
+
+def loop_backtest(data):
+    """逐K线模拟的参照实现（买入 MACD 金叉，卖出 RSI > 70）"""
+    values = evaluate(data, ['MACD', 'MACD_SIGNAL', 'RSI'])
+    close = data['Close'].to_numpy()
+    macd, signal, rsi = values['MACD'], values['MACD_SIGNAL'], values['RSI']
+    position, equity, curve = 0, 1.0, []
+    for t in range(len(close)):
+        if t:
+            equity *= 1 + position * (close[t] / close[t - 1] - 1)
+        crossed = t > 0 and macd[t] > signal[t] and not macd[t - 1] > signal[t - 1]
+        target = 0 if rsi[t] > 70 else (1 if crossed else position)
+        position = target
+        curve.append(equity)
+    return np.array(curve)
+
+
+def timed(func, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(sizes):
+    combos = len(GRID['window']) * len(GRID['level'])
+    print(f"{'bars':>8} {'loop (ms)':>10} {'vector (ms)':>12} {'max diff':>9}"
+          f" {f'{combos} x backtest (ms)':>20} {'sweep (ms)':>11}")
+    for n in sizes:
+        data = make_bars(n)
+        diff = np.abs(loop_backtest(data) - backtest(data, ENTRY, EXIT)['equity'].to_numpy()).max()
+        loop = timed(loop_backtest, data)
+        vector = timed(backtest, data, ENTRY, EXIT)
+
+        def one_by_one():
+            for window in GRID['window']:
+                for level in GRID['level']:
+                    backtest(data, ENTRY, [(f'RSI{window}', '>', level)])
+
+        separate = timed(one_by_one)
+        swept = timed(sweep, data, ENTRY, SWEEP_EXIT, GRID)
+        print(f"{n:>8} {loop * 1000:>10.1f} {vector * 1000:>12.2f} {diff:>9.1e}"
+              f" {separate * 1000:>20.1f} {swept * 1000:>11.1f}")
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [2500, 10000, 50000])
@@ -0,0 +1,49 @@
+"""技术指标图：分开的 MACD/RSI/布林带图（各自 LTTB、各带日期数组） vs 共用X轴的 WebGL 组合图
+
+对比生成并序列化为 JSON 的耗时与 JSON 大小（浏览器端的渲染时间大致随数据量与 SVG 节点数增长）。
+用法：python benchmarks/bench_charts.py [K线数量 ...]
+"""
+import os
+import sys
+import timeit
+
+import plotly.graph_objects as go
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_indicators import make_bars
+from components.charts import technical_figure
+from utils.downsample import lttb
+from utils.indicators import add_indicators
+
+COLUMNS = ['MACD', 'MACD_SIGNAL', 'RSI', 'BOLL_UPPER', 'BOLL_MIDDLE', 'BOLL_LOWER']
+
+
+def separate_figures(data):
+    """原来的做法：三张独立的图，每条曲线各自降采样并携带自己的日期数组"""
+    figures = []
+    for columns in (('MACD', 'MACD_SIGNAL'), ('RSI',), ('BOLL_UPPER', 'BOLL_MIDDLE', 'BOLL_LOWER', 'Close')):
+        fig = go.Figure()
+        for column in columns:
+            line = lttb(data[column])
+            fig.add_trace(go.Scatter(x=line.index, y=line, name=column))
+        fig.update_layout(template='plotly_dark')
+        figures.append(fig)
+    return figures
+
+
+def main(sizes):
+    print(f"{'bars':>8} {'separate (ms)':>14} {'combined (ms)':>14} {'separate JSON (KB)':>19} {'combined JSON (KB)':>19}")
+    for n in sizes:
+        data = add_indicators(make_bars(n), COLUMNS)
+        separate_ms = min(timeit.repeat(lambda: [fig.to_json() for fig in separate_figures(data)],
+                                        number=3, repeat=3)) / 3 * 1000
+        combined_ms = min(timeit.repeat(lambda: technical_figure(data).to_json(), number=3, repeat=3)) / 3 * 1000
+        separate_kb = sum(len(fig.to_json()) for fig in separate_figures(data)) / 1024
+        # 组合图默认还多出成交量与 MACD 柱状图两个窗格
+        combined_kb = len(technical_figure(data).to_json()) / 1024
+        print(f"{n:>8} {separate_ms:>14.1f} {combined_ms:>14.1f} {separate_kb:>19,.0f} {combined_kb:>19,.0f}")
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [2500, 10000, 50000])
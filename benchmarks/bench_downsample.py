@@ -0,0 +1,30 @@
+"""图表降采样：LTTB 与K线合并的耗时，以及降采样前后单条曲线的 JSON 大小
+
+用法：python benchmarks/bench_downsample.py [K线数量 ...]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_indicators import make_bars
+from utils.downsample import MAX_POINTS, downsample_ohlc, lttb
+
+
+def main(sizes):
+    print(f"{'bars':>8} {'lttb (ms)':>10} {'ohlc (ms)':>10} {'line JSON (KB)':>22} {'candle JSON (KB)':>22}")
+    for n in sizes:
+        data = make_bars(n)
+        line_ms = min(timeit.repeat(lambda: lttb(data['Close']), number=5, repeat=3)) / 5 * 1000
+        ohlc_ms = min(timeit.repeat(lambda: downsample_ohlc(data), number=5, repeat=3)) / 5 * 1000
+        line = (len(data['Close'].to_json()), len(lttb(data['Close']).to_json()))
+        candles = (len(data.to_json()), len(downsample_ohlc(data).to_json()))
+        print(f"{n:>8} {line_ms:>10.2f} {ohlc_ms:>10.2f}"
+              f" {f'{line[0] / 1024:,.0f} -> {line[1] / 1024:,.0f}':>22}"
+              f" {f'{candles[0] / 1024:,.0f} -> {candles[1] / 1024:,.0f}':>22}")
+    print(f"(max {MAX_POINTS} points per trace)")
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [2500, 10000, 50000])
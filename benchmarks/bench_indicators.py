@@ -0,0 +1,83 @@
+"""技术指标计算性能对比：原 pandas 实现 vs utils.indicators
+
+用法：python benchmarks/bench_indicators.py [K线数量 ...]
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.indicators import INDICATOR_COLUMNS, add_indicators
+
+
+def pandas_indicators(data):
+    """原 pages/stock_analysis.py 中 calculate_technical_indicators 的实现"""
+    df = data.copy()
+    df['MA5'] = df['Close'].rolling(window=5).mean()
+    df['MA10'] = df['Close'].rolling(window=10).mean()
+    df['MA20'] = df['Close'].rolling(window=20).mean()
+    df['MA60'] = df['Close'].rolling(window=60).mean()
+    exp1 = df['Close'].ewm(span=12, adjust=False).mean()
+    exp2 = df['Close'].ewm(span=26, adjust=False).mean()
+    df['MACD'] = exp1 - exp2
+    df['MACD_SIGNAL'] = df['MACD'].ewm(span=9, adjust=False).mean()
+    df['MACD_HIST'] = df['MACD'] - df['MACD_SIGNAL']
+    delta = df['Close'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rs = gain / loss
+    df['RSI'] = 100 - (100 / (1 + rs))
+    low_min = df['Low'].rolling(window=9).min()
+    high_max = df['High'].rolling(window=9).max()
+    rsv = (df['Close'] - low_min) / (high_max - low_min) * 100
+    df['K'] = rsv.rolling(window=3).mean()
+    df['D'] = df['K'].rolling(window=3).mean()
+    df['J'] = 3 * df['K'] - 2 * df['D']
+    df['BOLL_MIDDLE'] = df['Close'].rolling(window=20).mean()
+    std = df['Close'].rolling(window=20).std()
+    df['BOLL_UPPER'] = df['BOLL_MIDDLE'] + 2 * std
+    df['BOLL_LOWER'] = df['BOLL_MIDDLE'] - 2 * std
+    df['VOLUME_MA5'] = df['Volume'].rolling(window=5).mean()
+    df['VOLUME_MA10'] = df['Volume'].rolling(window=10).mean()
+    return df
+
+
+def make_bars(n, seed=0):
+    """生成随机游走的日K线"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    spread = np.abs(rng.normal(0, 0.01, n)) * close
+    return pd.DataFrame({
+        'Open': close * (1 + rng.normal(0, 0.005, n)),
+        'High': close + spread,
+        'Low': close - spread,
+        'Close': close,
+        'Volume': rng.integers(1_000_000, 10_000_000, n),
+    }, index=pd.date_range('1980-01-01', periods=n, freq='B', tz='America/New_York'))
+
+
+def best_of(func, data, repeat=5):
+    number = max(1, 20000 // len(data))
+    return min(timeit.repeat(lambda: func(data), number=number, repeat=repeat)) / number
+
+
+def main(sizes):
+    print(f"{'bars':>8} {'pandas (ms)':>12} {'numpy (ms)':>12} {'speedup':>8} {'max rel diff':>13}")
+    for n in sizes:
+        data = make_bars(n)
+        expected = pandas_indicators(data)[INDICATOR_COLUMNS]
+        actual = add_indicators(data)[INDICATOR_COLUMNS]
+        pd.testing.assert_frame_equal(actual.isna(), expected.isna())
+        # pandas 的滑动标准差是在线更新的，超长序列上自身会累积误差，这里只报告最大相对差异
+        diff = ((actual - expected).abs() / expected.abs().clip(lower=1e-12)).max().max()
+        old = best_of(pandas_indicators, data)
+        new = best_of(add_indicators, data)
+        print(f"{n:>8} {old * 1000:>12.2f} {new * 1000:>12.2f} {old / new:>7.1f}x {diff:>13.1e}")
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [250, 2500, 10000, 50000])
@@ -0,0 +1,68 @@
+"""全市场筛选性能测试：在临时目录生成本地K线库，比较单进程与页面使用的共享进程池的耗时
+
+用法：python benchmarks/bench_screener.py [股票数量] [每只K线数] [工作进程数（默认为 CPU 核数）]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# 必须在导入 utils 之前设置，使基准测试使用临时数据库；spawn 启动的工作进程会重新执行本模块，
+# 通过环境变量继承主进程创建的目录
+if 'BENCH_SCREENER_DIR' not in os.environ:
+    os.environ['BENCH_SCREENER_DIR'] = tempfile.mkdtemp(prefix='bench_screener_')
+os.environ['FINANCIAL_DATA_DIR'] = os.environ['BENCH_SCREENER_DIR']
+
+from bench_indicators import make_bars
+from utils.history_store import save_bars
+from utils import screener
+from utils.screener import TAIL_BARS, apply_screen, screen_universe
+
+# 每种方式计时的次数，取最好的一次
+REPEAT = 3
+
+
+def populate(count, bars):
+    tickers = [f'T{i:04d}' for i in range(count)]
+    for i, ticker in enumerate(tickers):
+        data = make_bars(bars, seed=i)
+        save_bars(ticker, data[['Open', 'High', 'Low', 'Close', 'Volume']], start=data.index[0], replace=True)
+    return tickers
+
+
+def timed(tickers, workers):
+    """REPEAT 次中最快的耗时与结果；workers 为 None 时使用共享进程池（与页面相同）"""
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        summary = screen_universe(tickers, max_workers=workers)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, summary
+
+
+def main(count=3200, bars=500, workers=None):
+    print(f"生成 {count} 只股票 x {bars} 根K线 ...")
+    tickers = populate(count, bars)
+    # 必须在首次创建共享进程池之前设置
+    screener.MAX_WORKERS = workers or os.cpu_count() or 1
+    print(f"每只股票读取最近 {TAIL_BARS} 根K线，CPU 核数 {os.cpu_count()}，工作进程 {screener.MAX_WORKERS}")
+
+    serial, summary = timed(tickers, 1)
+    print(f"单进程:   {serial:6.2f}s  ({serial / count * 1000:.2f} ms/只)")
+    # 预热：启动工作进程并导入 pandas/numpy，对应页面首次筛选；之后的耗时才是页面重复筛选的耗时
+    start = time.perf_counter()
+    screen_universe(tickers)
+    print(f"进程池预热: {time.perf_counter() - start:6.2f}s")
+    parallel, parallel_summary = timed(tickers, None)
+    assert parallel_summary.equals(summary)
+    print(f"共享进程池 {screener.MAX_WORKERS} 进程: {parallel:6.2f}s  (加速 {serial / parallel:.1f}x)")
+    for name in ('rsi_oversold', 'macd_golden_cross', 'above_boll_upper'):
+        print(f"{name}: {len(apply_screen(summary, name))} 只")
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:4]))
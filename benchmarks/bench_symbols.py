@@ -0,0 +1,44 @@
+"""品种索引与搜索：CSV + iterrows 建 dict vs 编译/加载索引，搜索耗时与选择框选项的 JSON 大小
+
+用法：python benchmarks/bench_symbols.py [查询 ...]
+"""
+import json
+import os
+import sys
+import time
+import timeit
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import symbols
+from utils.symbols import TOP_K, coin_index, compile_indexes
+
+
+def main(queries):
+    iterrows_ms = min(timeit.repeat(
+        lambda: {row['name']: row['id'] for _, row in pd.read_csv(symbols.COINS_CSV).iterrows()},
+        number=1, repeat=3)) * 1000
+    compile_ms = min(timeit.repeat(compile_indexes, number=1, repeat=3)) * 1000
+    coin_index()
+
+    def load():
+        symbols._indexes = None
+        return coin_index()
+
+    load_ms = min(timeit.repeat(load, number=1, repeat=3)) * 1000
+    print(f"coins.csv iterrows dict: {iterrows_ms:.0f} ms, compile: {compile_ms:.0f} ms, load index: {load_ms:.1f} ms")
+
+    coins = coin_index()
+    full_kb = len(json.dumps(coins.options())) / 1024
+    print(f"selectbox options: all {len(coins.options()):,} = {full_kb:,.0f} KB, top {TOP_K} <= "
+          f"{max(len(json.dumps(coins.search(query))) for query in queries) / 1024:.1f} KB")
+    for query in queries:
+        start = time.perf_counter()
+        results = coins.search(query)
+        print(f"{query!r:>12} {(time.perf_counter() - start) * 1000:6.2f} ms  {results[:3]}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:] or ['btc', 'eth', 'solana', 'bitcon', 'uni', 'e'])
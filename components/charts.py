@@ -0,0 +1,75 @@
+import numpy as np
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from utils.downsample import MAX_POINTS, downsample_last, downsample_ohlc
+
+# 技术指标图中可切换的窗格：名称 -> (中文, 英文)；布林带叠加在价格窗格中，其余各占一行
+TECHNICAL_PANES = {
+    'boll': ("布林带", "Bollinger Bands"),
+    'volume': ("成交量", "Volume"),
+    'macd': ("MACD", "MACD"),
+    'rsi': ("RSI", "RSI"),
+}
+
+# 各行的相对高度
+ROW_HEIGHTS = {'price': 3.0, 'volume': 1.0, 'macd': 1.5, 'rsi': 1.5}
+
+# X轴上的日期刻度数
+DATE_TICKS = 8
+
+
+def technical_figure(data, panes=tuple(TECHNICAL_PANES), lang='zh', max_points=MAX_POINTS):
+    """价格与技术指标共用一条X轴的组合图（WebGL 折线），panes 为要显示的 TECHNICAL_PANES
+
+    所有窗格使用同一组降采样分组：开高低收与成交量按组合并，指标取每组末根K线的值。
+    X轴为分组序号，各曲线以 x0/dx 隐式给出横坐标而不发送数组；日期只随刻度标签与价格曲线的悬停数据发送一次。
+    序号轴同时去掉了休市日造成的空档。
+    """
+    zh = lang == 'zh'
+    bars = downsample_ohlc(data[['Open', 'High', 'Low', 'Close', 'Volume']], max_points)
+    values = downsample_last(data[['MACD', 'MACD_SIGNAL', 'RSI', 'BOLL_UPPER', 'BOLL_MIDDLE', 'BOLL_LOWER']],
+                             max_points)
+    dates = np.asarray(bars.index.strftime('%Y-%m-%d'))
+    rows = ['price'] + [pane for pane in ('volume', 'macd', 'rsi') if pane in panes]
+    titles = {'price': "价格" if zh else "Price"}
+    titles.update({pane: names[0] if zh else names[1] for pane, names in TECHNICAL_PANES.items()})
+
+    fig = make_subplots(rows=len(rows), cols=1, shared_xaxes=True, vertical_spacing=0.03,
+                        row_heights=[ROW_HEIGHTS[row] for row in rows],
+                        subplot_titles=[titles[row] for row in rows])
+    implicit_x = dict(x0=0, dx=1)
+
+    def add(trace, pane):
+        fig.add_trace(trace, row=rows.index(pane) + 1, col=1)
+
+    add(go.Scattergl(y=bars['Close'].to_numpy(), customdata=dates, name=("收盘价" if zh else "Close"),
+                     hovertemplate="%{customdata}<br>%{y:,.2f}", **implicit_x), 'price')
+    if 'boll' in panes:
+        for column, name in (('BOLL_UPPER', ("上轨", "Upper Band")), ('BOLL_MIDDLE', ("中轨", "Middle Band")),
+                             ('BOLL_LOWER', ("下轨", "Lower Band"))):
+            add(go.Scattergl(y=values[column].to_numpy(), name=name[0] if zh else name[1],
+                             line=dict(width=1, dash='dot'), **implicit_x), 'price')
+    if 'volume' in rows:
+        add(go.Bar(y=bars['Volume'].to_numpy(), name=titles['volume'], marker_line_width=0, **implicit_x),
+            'volume')
+    if 'macd' in rows:
+        add(go.Bar(y=(values['MACD'] - values['MACD_SIGNAL']).to_numpy(), name=("柱状图" if zh else "Histogram"),
+                   marker_line_width=0, **implicit_x), 'macd')
+        add(go.Scattergl(y=values['MACD'].to_numpy(), name='MACD', **implicit_x), 'macd')
+        add(go.Scattergl(y=values['MACD_SIGNAL'].to_numpy(), name=("信号线" if zh else "Signal Line"),
+                         **implicit_x), 'macd')
+    if 'rsi' in rows:
+        row = rows.index('rsi') + 1
+        add(go.Scattergl(y=values['RSI'].to_numpy(), name='RSI', **implicit_x), 'rsi')
+        fig.add_hline(y=70, line_dash="dash", line_color="red", row=row, col=1)
+        fig.add_hline(y=30, line_dash="dash", line_color="green", row=row, col=1)
+
+    ticks = np.unique(np.linspace(0, len(dates) - 1, min(DATE_TICKS, len(dates))).round().astype(int))
+    fig.update_xaxes(tickmode='array', tickvals=ticks.tolist(), ticktext=dates[ticks].tolist(),
+                     row=len(rows), col=1)
+    fig.update_layout(
+        height=360 + 160 * (len(rows) - 1),
+        hovermode='x unified',
+        template='plotly_dark'
+    )
+    return fig
@@ -30,6 +30,12 @@ def show_sidebar():
             
         if st.button("📈 " + ("股票分析" if get_language() == "zh" else "Stock Analysis"), key="stock"):
             st.switch_page("pages/stock_analysis.py")
+
+        if st.button("🔎 " + ("股票筛选" if get_language() == "zh" else "Stock Screener"), key="screener"):
+            st.switch_page("pages/screener.py")
+
+        if st.button("👀 " + ("自选与组合" if get_language() == "zh" else "Watchlist & Portfolio"), key="watchlist"):
+            st.switch_page("pages/watchlist.py")
             
         if st.button("💱 " + ("市场价格" if get_language() == "zh" else "Market Prices"), key="market"):
             st.switch_page("pages/market_prices.py")
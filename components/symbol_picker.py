@@ -0,0 +1,23 @@
+import streamlit as st
+from components.sidebar import get_language
+from utils.symbols import TOP_K
+
+
+def symbol_picker(index, search_label, select_label, key, default_index=0):
+    """服务端搜索的品种选择器：查询在服务端匹配（见 SymbolIndex.search），选择框只包含前 TOP_K 个结果
+
+    无论品种有多少，发送到浏览器的选项都不超过 TOP_K 个。查询变化时选项随之变化，
+    选择框视为新控件并默认选中最佳匹配；查询为空时列出前 TOP_K 个品种，选中 default_index（None 为不选）。
+    返回所选标签，没有匹配时返回 None。
+    """
+    query = st.text_input(
+        search_label,
+        key=key,
+        placeholder=("输入代码、名称或 ID 后回车" if get_language() == "zh"
+                     else "Type a symbol, name or id and press Enter")
+    ).strip()
+    options = index.search(query) if query else index.options()[:TOP_K]
+    if not options:
+        st.caption("没有匹配的结果" if get_language() == "zh" else "No matches")
+        return None
+    return st.selectbox(select_label, options, index=0 if query else default_index)
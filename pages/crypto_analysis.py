@@ -16,19 +16,23 @@ import requests
 import pandas as pd
 
 from components.sidebar import show_sidebar
+from components.symbol_picker import symbol_picker
 from utils.language import get_language
+from utils.feeds import parse_feed
+from utils.http_client import http_get
+from utils.cache import cached, quote_cache
+from utils.symbols import SymbolIndex, coin_index
 
-# 读取 coins.csv 文件并创建加密货币名称与 CoinGecko ID 的映射
+# 加密货币名称与 CoinGecko ID 的索引：coins.csv 只编译一次，之后每次重跑都直接使用内存中的索引
 def load_crypto_data():
     try:
-        df = pd.read_csv('coins.csv')  # 读取 CSV 文件
-        return {row['name']: row['id'] for index, row in df.iterrows()}  # 创建字典映射
+        return coin_index()
     except Exception as e:
         st.error(f"加载加密货币数据时出错: {str(e)}")
-        return {}
+        return SymbolIndex((), (), (), ())
 
-# 加密货币 ID 映射
-crypto_id_map = load_crypto_data()
+# 加密货币索引
+coins = load_crypto_data()
 
 def load_api_key():
     """加载 OpenAI API Key"""
@@ -51,7 +55,7 @@ def get_crypto_news(crypto_name, num_news=5):
         rss_url = f"https://news.google.com/rss/search?q={encoded_crypto_name}+when:7d&hl={language}&gl=CN&ceid=CN:zh-CN"
         
         # 解析 RSS feed
-        feed = feedparser.parse(rss_url)
+        feed = parse_feed(rss_url)
         
         # 检查是否成功获取新闻
         if not feed.entries:
@@ -77,16 +81,22 @@ def get_crypto_news(crypto_name, num_news=5):
         st.error(f"获取新闻时出错: {str(e)}")
         return []
 
+# CoinGecko 公共接口配额很低，结果在所有会话间共享缓存
+@cached(quote_cache, prefix='crypto_analysis.get_crypto_price')
 def get_crypto_price(crypto_name):
     """根据加密货币名称获取当前价格"""
-    crypto_id = crypto_id_map.get(crypto_name)
+    crypto_id = coins.id_of(crypto_name)
     
     if not crypto_id:
         st.error("未找到该加密货币，请检查名称。" if get_language() == "zh" else "Cryptocurrency not found, please check the name.")
         return None
     
     url = f"https://api.coingecko.com/api/v3/simple/price?ids={crypto_id}&vs_currencies=usd"
-    response = requests.get(url)
+    try:
+        response = http_get(url)
+    except requests.exceptions.RequestException as e:
+        st.error(f"API请求失败: {str(e)}")
+        return None
     
     if response.status_code == 200:
         data = response.json()
@@ -170,6 +180,8 @@ def analyze_trend(crypto_data, crypto_name, period, news_content):
         return (f"生成分析报告时出错: {str(e)}" if get_language() == "zh" 
                 else f"Error generating analysis: {str(e)}")
 
+@cached(quote_cache, ttl=300, prefix='crypto_analysis.get_historical_data',
+        should_cache=lambda data: not data.empty)
 def get_historical_data(crypto_name, period):
     """获取加密货币的历史数据"""
     days_mapping = {
@@ -180,7 +192,7 @@ def get_historical_data(crypto_name, period):
     }
     
     try:
-        crypto_id = crypto_id_map.get(crypto_name)
+        crypto_id = coins.id_of(crypto_name)
         if not crypto_id:
             st.error("未找到该加密货币，请检查名称。")
             return pd.DataFrame()
@@ -194,7 +206,7 @@ def get_historical_data(crypto_name, period):
             'interval': 'daily'
         }
         
-        response = requests.get(url, params=params)
+        response = http_get(url, params=params)
         response.raise_for_status()  # 添加错误检查
         
         data = response.json()
@@ -219,25 +231,17 @@ def main():
     st.title("加密货币分析" if get_language() == "zh" else "Cryptocurrency Analysis")
     load_api_key()
 
-    # 添加缓存装饰器
-    @st.cache_data(ttl=3600)  # 缓存1小时
-    def load_cached_crypto_data():
-        return load_crypto_data()
-    
-    crypto_id_map = load_cached_crypto_data()
-    
     # 使用容器来控制内容宽度
     with st.container():
-        crypto_id_map = load_cached_crypto_data()
-        
         # 将选择器放在同一行
         col1, col2 = st.columns([2, 1])
         with col1:
-            crypto_name = st.selectbox(
+            crypto_name = symbol_picker(
+                coins,
+                "搜索加密货币" if get_language() == "zh" else "Search Cryptocurrency",
                 "选择加密货币" if get_language() == "zh" else "Select Cryptocurrency",
-                options=list(crypto_id_map.keys()),
-                index=None,
-                placeholder="请选择加密货币..." if get_language() == "zh" else "Select a cryptocurrency..."
+                key="crypto_search",
+                default_index=None
             )
         with col2:
             period_options = {
@@ -1,9 +1,10 @@
 import streamlit as st
-import feedparser
 from datetime import datetime, timedelta
 from components.sidebar import show_sidebar, get_language
+from utils.news import NEWS_TOPICS, fetch_financial_news
+from utils.circuit_breaker import CLOSED, get_breaker
+from utils.prefetch import start_prefetcher
 from langchain_openai import ChatOpenAI
-import urllib.parse
 
 # 设置页面配置
 st.set_page_config(
@@ -16,56 +17,28 @@ st.set_page_config(
 # 显示侧边栏
 show_sidebar()
 
+# 启动后台预取（每个进程只启动一次）
+start_prefetcher()
+
 # 初始化 ChatOpenAI
 llm = ChatOpenAI(
     model="o1-mini"
 )
 
 def get_financial_news(topic, num_news=20):
-    """获取金融新闻"""
+    """获取最近一周的金融新闻；新闻源故障时返回缓存的旧新闻"""
     try:
-        # URL编码搜索词
-        encoded_topic = urllib.parse.quote(topic)
-        
-        # 根据语言设置选择不同的 Google News 参数
         lang = get_language()
-        hl = "zh-CN" if lang == "zh" else "en"
-        gl = "CN" if lang == "zh" else "US"
-        
-        # 构建 Google News RSS URL，添加时间参数以获取最近一周的新闻
-        rss_url = f"https://news.google.com/rss/search?q={encoded_topic}&hl={hl}&gl={gl}&ceid={gl}:{hl}&tbs=qdr:w"
-        
-        # 解析 RSS feed
-        feed = feedparser.parse(rss_url)
-        
-        # 检查是否成功获取新闻
-        if not feed.entries:
-            return []
-        
-        # 获取当前时间和一周前的时间
-        one_week_ago = datetime.now() - timedelta(days=7)
-        
-        # 提取新闻
-        news_list = []
-        for entry in feed.entries:
-            try:
-                # 解析发布时间
-                published_time = datetime(*entry.published_parsed[:6])
-                
-                # 只保留最近一周的新闻
-                if published_time >= one_week_ago:
-                    news_list.append({
-                        'title': entry.title,
-                        'link': entry.link,
-                        'published': entry.published,
-                        'source': entry.source.title if hasattr(entry, 'source') else "未知来源"
-                    })
-                if len(news_list) >= num_news:
-                    break
-            except AttributeError:
-                continue
-        
-        return news_list
+        news_list = fetch_financial_news(topic, lang, num_news)
+        if fetch_financial_news.is_stale(topic, lang, num_news):
+            # 过期后在后台刷新是常态，只有熔断时才提示新闻源不可用
+            if get_breaker('google_news').state != CLOSED:
+                st.caption("⏳ " + ("新闻源暂时不可用，显示的是缓存新闻" if lang == "zh"
+                                   else "News source unavailable, showing cached news"))
+            else:
+                st.caption("⏳ " + ("显示缓存新闻，正在后台刷新" if lang == "zh"
+                                   else "Showing cached news, refreshing in the background"))
+        return news_list or []
     except Exception as e:
         st.error(f"获取新闻时出错: {str(e)}")
         return []
@@ -141,7 +114,7 @@ news_tabs = st.tabs(tabs)
 
 with news_tabs[0]:
     with st.spinner('正在加载全球市场新闻...'):
-        news = get_financial_news("global financial market stock")
+        news = get_financial_news(NEWS_TOPICS[0])
         col1, col2 = st.columns([2, 1])
         with col1:
             if news:  # 检查是否有新闻
@@ -161,7 +134,7 @@ with news_tabs[0]:
 
 with news_tabs[1]:
     with st.spinner('正在加载美股市场新闻...'):
-        news = get_financial_news("US stock market NYSE NASDAQ")
+        news = get_financial_news(NEWS_TOPICS[1])
         col1, col2 = st.columns([2, 1])
         with col1:
             for item in news:
@@ -177,7 +150,7 @@ with news_tabs[1]:
 
 with news_tabs[2]:
     with st.spinner('正在加载A股市场新闻...'):
-        news = get_financial_news("A股市场 上证指数 创业板")
+        news = get_financial_news(NEWS_TOPICS[2])
         col1, col2 = st.columns([2, 1])
         with col1:
             for item in news:
@@ -193,7 +166,7 @@ with news_tabs[2]:
 
 with news_tabs[3]:
     with st.spinner('正在加载外汇市场新闻...'):
-        news = get_financial_news("外汇市场 人民币 汇率")
+        news = get_financial_news(NEWS_TOPICS[3])
         col1, col2 = st.columns([2, 1])
         with col1:
             for item in news:
@@ -209,7 +182,7 @@ with news_tabs[3]:
 
 with news_tabs[4]:
     with st.spinner('正在加载商品市场新闻...'):
-        news = get_financial_news("大宗商品 黄金 原油")
+        news = get_financial_news(NEWS_TOPICS[4])
         col1, col2 = st.columns([2, 1])
         with col1:
             for item in news:
@@ -225,7 +198,7 @@ with news_tabs[4]:
 
 with news_tabs[5]:
     with st.spinner('正在加载加密货币新闻...'):
-        news = get_financial_news("比特币 加密货币")
+        news = get_financial_news(NEWS_TOPICS[5])
         col1, col2 = st.columns([2, 1])
         with col1:
             for item in news:
@@ -10,8 +10,16 @@ import plotly.graph_objects as go
 from datetime import datetime, timedelta
 from components.sidebar import show_sidebar, get_language
 from utils.config import load_config
-import urllib.parse
-import feedparser
+from utils.history import get_history
+from utils.cache import cached, quote_cache, stale_while_revalidate
+from utils.circuit_breaker import CLOSED, get_breaker
+from utils.market_calendar import ttl_seconds
+from utils.news import fetch_financial_news
+from utils.http_client import http_get
+from utils.prefetch import start_prefetcher
+from utils.risk import CONFIDENCE, describe_risk, portfolio_risk
+from utils.downsample import lttb
+from utils.figure_cache import cached_figure, figure_key
 
 dotenv.load_dotenv()
 
@@ -33,30 +41,38 @@ st.set_page_config(
 # 显示侧边栏
 show_sidebar()
 
+# 启动后台预取（每个进程只启动一次）
+start_prefetcher()
+
 # 初始化 ChatOpenAI
 llm = ChatOpenAI(
     model="o1-mini"
 )
 
-# 函数定义
+# 函数定义（行情结果写入所有会话共享的缓存）
+@cached(quote_cache, prefix='market_prices.get_forex_rate',
+        should_cache=lambda value: isinstance(value, (int, float)))
 def get_forex_rate(from_currency, to_currency):
     url = f"https://api.exchangerate-api.com/v4/latest/{from_currency}"
     try:
-        response = requests.get(url)
+        response = http_get(url)
         data = response.json()
         return data['rates'][to_currency]
     except Exception as e:
         return f"Error: {str(e)}"
 
+@cached(quote_cache, prefix='market_prices.get_crypto_price',
+        should_cache=lambda value: isinstance(value, float))
 def get_crypto_price(symbol):
     url = f"https://api.binance.com/api/v3/ticker/price?symbol={symbol}"
     try:
-        response = requests.get(url)
+        response = http_get(url)
         data = response.json()
         return float(data['price'])
     except Exception as e:
         return f"Error: {str(e)}"
 
+@cached(quote_cache, prefix='market_prices.get_gold_price')
 def get_gold_price():
     api_key = os.getenv("GOLD_API_KEY")
     if api_key is None:
@@ -73,7 +89,7 @@ def get_gold_price():
     }
     
     try:
-        response = requests.get(url, headers=headers)
+        response = http_get(url, headers=headers)
         response.raise_for_status()
 
         result = response.json()
@@ -82,15 +98,46 @@ def get_gold_price():
         print("Error:", str(e))
 
 # 获取历史数据的函数
+# 过期时先返回旧数据并在后台刷新；get_history 自身经过 yfinance 熔断器，这里不再重复判断
+@stale_while_revalidate(quote_cache, None, ttl=lambda symbol, period="1mo": ttl_seconds(symbol),
+                        prefix='market_prices.get_historical_data',
+                        should_cache=lambda data: data is not None and not data.empty)
+def fetch_historical_data(symbol, period="1mo"):
+    """各时间范围共用同一份历史数据，切换时间范围时直接切片；请求出错时抛出异常（计入熔断器）"""
+    return get_history(symbol, period)
+
 def get_historical_data(symbol, period="1mo"):
+    """获取历史数据，出错时返回 None"""
     try:
-        ticker = yf.Ticker(symbol)
-        hist = ticker.history(period=period)
-        return hist
+        return fetch_historical_data(symbol, period)
     except Exception as e:
         print(f"获取历史数据时出错: {str(e)}")
         return None
 
+def close_trace(data, name):
+    """收盘价折线；长历史按图表像素宽度降采样（LTTB），保留走势形状"""
+    line = lttb(data['Close'])
+    return go.Scatter(x=line.index, y=line, name=name)
+
+def price_figure(data, name, title, yaxis_title):
+    """收盘价走势图（序列化后的 dict），同一份数据在同一语言下只构建一次"""
+    def build():
+        fig = go.Figure()
+        fig.add_trace(close_trace(data, name))
+        fig.update_layout(title=title, yaxis_title=yaxis_title, template='plotly_dark')
+        return fig
+    return cached_figure(figure_key('close', data, get_language(), name, title, yaxis_title), build)
+
+def show_stale_notice(symbol, period):
+    """历史数据为过期缓存时显示提示；只有 yfinance 熔断时才提示数据源不可用"""
+    if fetch_historical_data.is_stale(symbol, period=period):
+        if get_breaker('yfinance').state != CLOSED:
+            st.caption("⏳ " + ("数据源暂时不可用，显示的是缓存数据" if get_language() == "zh"
+                               else "Data source unavailable, showing cached data"))
+        else:
+            st.caption("⏳ " + ("显示缓存数据，正在后台刷新" if get_language() == "zh"
+                               else "Showing cached data, refreshing in the background"))
+
 def analyze_trend(data, asset_name, period):
     """使用 LLM 分析价格趋势"""
     try:
@@ -158,50 +205,19 @@ def analyze_trend(data, asset_name, period):
         return f"{'分析过程出现错误' if get_language() == 'zh' else 'Analysis error'}: {str(e)}"
 
 def get_financial_news(topic, num_news=8):
-    """获取最近一周的金融新闻"""
+    """获取最近一周的金融新闻；新闻源故障时返回缓存的旧新闻"""
     try:
-        # URL编码搜索词
-        encoded_topic = urllib.parse.quote(topic)
-        
-        # 根据语言设置选择不同的 Google News 参数
         lang = get_language()
-        hl = "zh-CN" if lang == "zh" else "en"
-        gl = "CN" if lang == "zh" else "US"
-        
-        # 构建 Google News RSS URL，添加时间参数以获取最近一周的新闻
-        rss_url = f"https://news.google.com/rss/search?q={encoded_topic}&hl={hl}&gl={gl}&ceid={gl}:{hl}&tbs=qdr:w"
-        
-        # 解析 RSS feed
-        feed = feedparser.parse(rss_url)
-        
-        # 检查是否成功获取新闻
-        if not feed.entries:
-            return []
-        
-        # 获取当前时间和一周前的时间
-        one_week_ago = datetime.now() - timedelta(days=7)
-        
-        # 提取新闻
-        news_list = []
-        for entry in feed.entries:
-            try:
-                # 解析发布时间
-                published_time = datetime(*entry.published_parsed[:6])
-                
-                # 只保留最近一周的新闻
-                if published_time >= one_week_ago:
-                    news_list.append({
-                        'title': entry.title,
-                        'link': entry.link,
-                        'published': entry.published,
-                        'source': entry.source.title if hasattr(entry, 'source') else "未知来源"
-                    })
-                if len(news_list) >= num_news:
-                    break
-            except AttributeError:
-                continue
-        
-        return news_list
+        news_list = fetch_financial_news(topic, lang, num_news)
+        if fetch_financial_news.is_stale(topic, lang, num_news):
+            # 过期后在后台刷新是常态，只有熔断时才提示新闻源不可用
+            if get_breaker('google_news').state != CLOSED:
+                st.caption("⏳ " + ("新闻源暂时不可用，显示的是缓存新闻" if lang == "zh"
+                                   else "News source unavailable, showing cached news"))
+            else:
+                st.caption("⏳ " + ("显示缓存新闻，正在后台刷新" if lang == "zh"
+                                   else "Showing cached news, refreshing in the background"))
+        return news_list or []
     except Exception as e:
         st.error(f"获取新闻时出错: {str(e)}")
         return []
@@ -233,6 +249,10 @@ def generate_market_analysis(topic, historical_data):
         # 生成最近走势数据的描述
         historical_data_description = historical_data.tail(5).to_string()  # 获取最近5天的走势数据
 
+        # 所选区间内的 VaR/CVaR，样本不足时为空
+        risk_content = describe_risk(portfolio_risk(historical_data['Close'], [1.0], seed=0),
+                                     CONFIDENCE, get_language())
+
         # 根据当前语言选择提示词
         if get_language() == "zh":
             prompt = f"""
@@ -243,6 +263,9 @@ def generate_market_analysis(topic, historical_data):
             最近走势数据：
             {historical_data_description}
 
+            风险指标（VaR/CVaR）：
+            {risk_content or '暂无'}
+
             相关新闻：
             {news_content}
 
@@ -257,6 +280,9 @@ def generate_market_analysis(topic, historical_data):
             Recent Trend Data:
             {historical_data_description}
 
+            Risk (VaR/CVaR):
+            {risk_content or 'Not available'}
+
             Related News:
             {news_content}
 
@@ -296,19 +322,17 @@ with tabs[0]:  # 外汇标签页
     st.subheader("USD/CNY " + ("汇率走势" if get_language() == "zh" else "Exchange Rate"))
     # 美元/人民币走势
     forex_hist_usd = get_historical_data("CNY=X", period=period)
+    show_stale_notice("CNY=X", period)
     usd_cny_rate = forex_hist_usd['Close'].iloc[-1] if forex_hist_usd is not None else None  # 获取最新汇率
     # 加元/人民币走势
     forex_hist_cad = get_historical_data("CADCNY=X", period=period)
     cad_cny_rate = forex_hist_cad['Close'].iloc[-1] if forex_hist_cad is not None else None  # 获取最新汇率
     if forex_hist_usd is not None:
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=forex_hist_usd.index, y=forex_hist_usd['Close'], name='USD/CNY'))
-        fig.update_layout(
-            title='USD/CNY ' + ("汇率走势" if get_language() == "zh" else "Exchange Rate"),
-            yaxis_title=("汇率" if get_language() == "zh" else "Rate"),
-            template='plotly_dark'
-        )
-        st.plotly_chart(fig)
+        st.plotly_chart(price_figure(
+            forex_hist_usd, 'USD/CNY',
+            'USD/CNY ' + ("汇率走势" if get_language() == "zh" else "Exchange Rate"),
+            ("汇率" if get_language() == "zh" else "Rate")
+        ))
     with st.expander("💡 " + ("AI 分析" if get_language() == "zh" else "AI Analysis")):
         if st.button("生成分析", key="usd_cny_analysis"):
             currency_topic = "USD/CNY 汇率"  # 设置主题为外汇
@@ -319,15 +343,9 @@ with tabs[0]:  # 外汇标签页
 
     # 加元/人民币走势
     forex_hist_cad = get_historical_data("CADCNY=X", period=period)
+    show_stale_notice("CADCNY=X", period)
     if forex_hist_cad is not None:
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=forex_hist_cad.index, y=forex_hist_cad['Close'], name='CAD/CNY'))
-        fig.update_layout(
-            title='加元/人民币汇率走势',
-            yaxis_title='汇率',
-            template='plotly_dark'
-        )
-        st.plotly_chart(fig)
+        st.plotly_chart(price_figure(forex_hist_cad, 'CAD/CNY', '加元/人民币汇率走势', '汇率'))
     
 
     with st.expander("💡 " + ("AI 分析" if get_language() == "zh" else "AI Analysis")):
@@ -349,15 +367,9 @@ with tabs[1]:  # 黄金标签页
 
     # 黄金走势
     gold_hist = get_historical_data("GC=F", period=period)
+    show_stale_notice("GC=F", period)
     if gold_hist is not None:
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=gold_hist.index, y=gold_hist['Close'], name='Gold'))
-        fig.update_layout(
-            title='黄金价格走势',
-            yaxis_title='美元/盎司',
-            template='plotly_dark'
-        )
-        st.plotly_chart(fig)
+        st.plotly_chart(price_figure(gold_hist, 'Gold', '黄金价格走势', '美元/盎司'))
 
     with st.expander("💡 " + ("AI 分析" if get_language() == "zh" else "AI Analysis")):
         if st.button("生成分析", key="gold_analysis"):
@@ -372,16 +384,10 @@ with tabs[2]:  # 加密货币标签页
     currency_topic = "比特币 加密货币"  # 设置主题为加密货币
     # 获取比特币和以太坊的价格
     btc_hist = get_historical_data("BTC-USD", period=period)
+    show_stale_notice("BTC-USD", period)
     eth_hist = get_historical_data("ETH-USD", period=period)
     if btc_hist is not None:
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=btc_hist.index, y=btc_hist['Close'], name='BTC'))
-        fig.update_layout(
-            title='比特币价格走势',
-            yaxis_title='美元',
-            template='plotly_dark'
-        )
-        st.plotly_chart(fig)
+        st.plotly_chart(price_figure(btc_hist, 'BTC', '比特币价格走势', '美元'))
 
     with st.expander("💡 " + ("AI 分析" if get_language() == "zh" else "AI Analysis")):
         if st.button("生成分析", key="btc_analysis"):
@@ -393,15 +399,9 @@ with tabs[2]:  # 加密货币标签页
     
     # 以太坊走势
     eth_hist = get_historical_data("ETH-USD", period=period)
+    show_stale_notice("ETH-USD", period)
     if eth_hist is not None:
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=eth_hist.index, y=eth_hist['Close'], name='ETH'))
-        fig.update_layout(
-            title='以太坊价格走势',
-            yaxis_title='美元',
-            template='plotly_dark'
-        )
-        st.plotly_chart(fig)
+        st.plotly_chart(price_figure(eth_hist, 'ETH', '以太坊价格走势', '美元'))
         
     with st.expander("💡 " + ("AI 分析" if get_language() == "zh" else "AI Analysis")):
         if st.button("生成分析", key="eth_analysis"):
@@ -413,15 +413,9 @@ with tabs[2]:  # 加密货币标签页
         
     # Solana走势
     sol_hist = get_historical_data("SOL-USD", period=period)
+    show_stale_notice("SOL-USD", period)
     if sol_hist is not None:
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(x=sol_hist.index, y=sol_hist['Close'], name='SOL'))
-        fig.update_layout(
-            title='Solana价格走势',
-            yaxis_title='美元',
-            template='plotly_dark'
-        )
-        st.plotly_chart(fig)
+        st.plotly_chart(price_figure(sol_hist, 'SOL', 'Solana价格走势', '美元'))
 
     with st.expander("💡 " + ("AI 分析" if get_language() == "zh" else "AI Analysis")):
         if st.button("生成分析", key="sol_analysis"):
@@ -0,0 +1,119 @@
+import streamlit as st
+import pandas as pd
+from datetime import timedelta
+from components.sidebar import show_sidebar, get_language
+from utils.prefetch import start_prefetcher
+from utils.screener import SCREENS, apply_screen, current_mask, missing_tickers, screen_universe, sync_missing
+
+# 设置页面配置
+st.set_page_config(
+    page_title="股票筛选" if get_language() == "zh" else "Stock Screener",
+    page_icon="🔎",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+# 显示侧边栏
+show_sidebar()
+
+# 启动后台预取（每个进程只启动一次）
+start_prefetcher()
+
+# 每次最多同步的缺失股票数，避免一次请求过多触发限流
+SYNC_BATCH = 200
+
+SCREEN_LABELS = {
+    'rsi_oversold': ("RSI < 30（超卖）", "RSI < 30 (oversold)"),
+    'rsi_overbought': ("RSI > 70（超买）", "RSI > 70 (overbought)"),
+    'macd_golden_cross': ("今日 MACD 金叉", "MACD golden cross today"),
+    'macd_death_cross': ("今日 MACD 死叉", "MACD death cross today"),
+    'above_boll_upper': ("收盘价突破布林上轨", "Close above BOLL_UPPER"),
+    'below_boll_lower': ("收盘价跌破布林下轨", "Close below BOLL_LOWER"),
+}
+
+
+@st.cache_data
+def load_universe():
+    """读取股票列表（wiki_stocks.csv）"""
+    return pd.read_csv('wiki_stocks.csv')
+
+
+@st.cache_data(ttl=timedelta(minutes=5), show_spinner=False)
+def run_screener(tickers):
+    """计算全部股票的筛选指标（本地数据），5分钟内重复筛选直接使用结果"""
+    return screen_universe(tickers)
+
+
+st.title("🔎 " + ("股票筛选" if get_language() == "zh" else "Stock Screener"))
+
+universe = load_universe()
+
+# 按代码或名称过滤股票范围
+keyword = st.text_input(
+    "按代码或名称过滤（留空为全部股票）" if get_language() == "zh"
+    else "Filter by code or name (leave empty for all stocks)"
+).strip()
+if keyword:
+    mask = (universe['code'].str.contains(keyword, case=False, regex=False)
+            | universe['name'].str.contains(keyword, case=False, regex=False))
+    universe = universe[mask]
+tickers = tuple(universe['code'])
+names = dict(zip(universe['code'], universe['name']))
+
+screen = st.selectbox(
+    "筛选条件" if get_language() == "zh" else "Screen",
+    list(SCREENS),
+    format_func=lambda name: SCREEN_LABELS[name][0 if get_language() == "zh" else 1]
+)
+
+if tickers:
+    with st.spinner('正在筛选...' if get_language() == "zh" else 'Screening...'):
+        summary = run_screener(tickers)
+    # 本地K线不属于最近一个交易时段的股票不参与"今日"信号
+    current = current_mask(summary)
+    outdated = list(summary.index[~current])
+else:
+    summary, current, outdated = None, None, []
+
+# 本地尚无历史数据或数据已过期的股票，可按批从 yfinance 获取/更新
+missing = missing_tickers(tickers)
+st.caption(
+    (f"共 {len(tickers)} 只股票，其中 {len(missing)} 只尚无本地历史数据，{len(outdated)} 只数据已过期"
+     if get_language() == "zh"
+     else f"{len(tickers)} stocks, {len(missing)} without local history, {len(outdated)} outdated")
+)
+if (missing or outdated) and st.button(
+    ("📥 获取缺失或过期的数据（本次最多 {} 只）" if get_language() == "zh"
+     else "📥 Fetch missing or outdated history (up to {} this time)").format(SYNC_BATCH)
+):
+    progress = st.progress(0.0)
+    synced = sync_missing((missing + outdated)[:SYNC_BATCH],
+                          on_progress=lambda done, total: progress.progress(done / total))
+    run_screener.clear()
+    st.success(f"已获取 {synced} 只股票的历史数据" if get_language() == "zh"
+               else f"Fetched history for {synced} stocks")
+    st.rerun()
+
+if summary is not None:
+    results = apply_screen(summary[current], screen)
+    results.insert(0, 'Name', [names.get(ticker, '') for ticker in results.index])
+
+    st.subheader(
+        (f"符合条件的股票：{len(results)} / {int(current.sum())}" if get_language() == "zh"
+         else f"Matches: {len(results)} / {int(current.sum())}")
+    )
+    st.dataframe(
+        results.drop(columns=['PREV_MACD_HIST']).style.format({
+            'Close': "{:,.2f}", 'Change %': "{:+.2f}%", 'RSI': "{:.2f}",
+            'MACD': "{:.3f}", 'MACD_SIGNAL': "{:.3f}", 'MACD_HIST': "{:.3f}",
+            'BOLL_UPPER': "{:,.2f}", 'BOLL_LOWER': "{:,.2f}", 'BOLL_DISTANCE': "{:.2f}",
+            'Date': lambda ts: ts.strftime('%Y-%m-%d'),
+        }),
+        use_container_width=True
+    )
+    st.caption(
+        "指标基于本地存储的日K线计算，数据日期见 Date 列；最后一根K线不属于最近一个交易日的股票不参与筛选"
+        if get_language() == "zh" else
+        "Indicators use locally stored daily bars (see the Date column); "
+        "stocks whose last bar is not from the latest session are left out"
+    )
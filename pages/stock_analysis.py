@@ -1,5 +1,7 @@
 import streamlit as st
 from components.sidebar import show_sidebar, get_language
+from components.charts import TECHNICAL_PANES, technical_figure
+from components.symbol_picker import symbol_picker
 import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
@@ -10,10 +12,44 @@ import os
 from dotenv import load_dotenv
 from pages.financial_news import get_financial_news
 from utils.config import load_config
+from utils.history import frame_cache_key, get_history, widest_period
+from utils.indicator_stream import update_indicators
+from utils.indicators import evaluate_tail
+from utils.backtest import backtest, sweep
+from utils.risk import CONFIDENCE, PATHS, describe_risk, portfolio_risk
+from utils.downsample import MAX_POINTS, downsample_ohlc, lttb
+from utils.figure_cache import cached_figure, figure_key
+from utils.company import fetch_company_info
+from utils.symbols import stock_index
+from utils.prefetch import start_prefetcher, record_view
+from utils.feeds import parse_feed
+from utils.market_calendar import cache_key_until, freshness_deadline, is_market_open
 import urllib.parse
 import feedparser
 import requests
 
+# 技术分析页用到的指标（图表与 AI 分析），只计算这些列及其依赖
+TECHNICAL_COLUMNS = ['MACD', 'MACD_SIGNAL', 'RSI', 'BOLL_UPPER', 'BOLL_MIDDLE', 'BOLL_LOWER']
+
+# 回测的买入/卖出规则：名称 -> (中文, 英文, 条件列表)
+BACKTEST_ENTRIES = {
+    'macd_golden_cross': ("MACD 上穿信号线", "MACD crosses above signal", [('MACD', 'cross_above', 'MACD_SIGNAL')]),
+    'rsi_oversold': ("RSI 低于 30", "RSI below 30", [('RSI', '<', 30)]),
+    'below_boll_lower': ("收盘价跌破布林下轨", "Close below BOLL_LOWER", [('Close', '<', 'BOLL_LOWER')]),
+}
+BACKTEST_EXITS = {
+    'rsi_overbought': ("RSI 高于 70", "RSI above 70", [('RSI', '>', 70)]),
+    'macd_death_cross': ("MACD 下穿信号线", "MACD crosses below signal", [('MACD', 'cross_below', 'MACD_SIGNAL')]),
+    'above_boll_upper': ("收盘价突破布林上轨", "Close above BOLL_UPPER", [('Close', '>', 'BOLL_UPPER')]),
+}
+
+# 风险指标至少使用的历史范围，所选范围较短时也有足够的收益率样本
+RISK_PERIOD = '1y'
+
+# 参数扫描：以 RSI 窗口与阈值作为卖出条件
+SWEEP_EXIT = [('RSI{window}', '>', '{level}')]
+SWEEP_GRID = {'window': [6, 9, 14, 21, 28], 'level': [60, 65, 70, 75, 80, 85]}
+
 # 加载环境变量
 load_dotenv()
 
@@ -53,18 +89,14 @@ st.set_page_config(
 # 显示侧边栏
 show_sidebar()
 
+# 启动后台预取（每个进程只启动一次）
+start_prefetcher()
+
 # 设置页面标题
 st.title("📈 " + ("股票分析" if get_language() == "zh" else "Stock Analysis"))
 
-# 加载股票数据
-@st.cache_data
-def load_stock_data():
-    df = pd.read_csv('wiki_stocks.csv')
-    # 创建一个字典，key是公司名称，value是股票代码
-    return {f"{row['name']} ({row['code']})": row['code'] for _, row in df.iterrows()}
-
-# 创建股票选择器
-stock_dict = load_stock_data()
+# 股票索引：wiki_stocks.csv 只编译一次，之后每次重跑都直接使用内存中的索引（见 utils.symbols）
+stocks = stock_index()
 
 
 # 添加缓存状态显示
@@ -73,102 +105,79 @@ def show_cache_status(ticker):
     if st.session_state.get(f'last_update_{ticker}'):
         last_update = st.session_state[f'last_update_{ticker}']
         st.sidebar.info(f"数据最后更新时间: {last_update.strftime('%Y-%m-%d %H:%M:%S')}")
-        time_diff = datetime.now() - last_update
-        hours_left = 24 - (time_diff.total_seconds() / 3600)
-        if hours_left > 0:
-            st.sidebar.info(f"缓存将在 {hours_left:.1f} 小时后过期")
-
-# 使用缓存装饰器，设置TTL为24小时
-@st.cache_data(ttl=timedelta(hours=24))
-def get_stock_data(ticker, period="1mo"):
-    """获取股票数据，带有24小时缓存"""
+        # 缓存有效期由交易日历决定：交易中到下一个刷新点，休市时到下次开盘
+        deadline = freshness_deadline(ticker).astimezone()
+        hours_left = (deadline - datetime.now().astimezone()).total_seconds() / 3600
+        market_status = "交易中" if is_market_open(ticker) else "休市中"
+        st.sidebar.info(f"{market_status}，缓存将在 {hours_left:.1f} 小时后过期（{deadline.strftime('%m-%d %H:%M')}）")
+
+# 缓存按交易日历失效：valid_until 在有效期内保持不变，到期后变化从而生成新的缓存键；
+# ttl 只是兜底的内存回收时间
+@st.cache_data(ttl=timedelta(hours=72), max_entries=256)
+def get_stock_data(ticker, period="1mo", valid_until=None, timeframe="1d"):
+    """获取股票数据，按交易日历缓存；各时间范围共用同一份历史数据切片，底层只增量请求新K线
+
+    timeframe 为周线/月线时由日线在本地合并，不额外请求上游。
+    """
     try:
-        stock = yf.Ticker(ticker)
-        data = stock.history(period=period)
-        return data
+        return get_history(ticker, period, timeframe=timeframe)
     except Exception as e:
         st.error(f"获取股票数据时出错: {str(e)}")
         return None
 
-@st.cache_data(ttl=timedelta(hours=24))
 def get_company_info(ticker):
-    """获取公司信息，带有24小时缓存"""
+    """获取公司信息；所有会话共享缓存，每个交易时段收盘后刷新一次，休市期间保持缓存"""
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        
-        company_data = {
-            "公司名称": info.get('longName', '未知'),
-            "行业": info.get('industry', '未知'),
-            "板块": info.get('sector', '未知'),
-            "市值": f"{info.get('marketCap', 0) / 100000000:.2f}亿",
-            "市盈率(TTM)": f"{info.get('trailingPE', 0):.2f}",
-            "市净率": f"{info.get('priceToBook', 0):.2f}",
-            "52周最高": info.get('fiftyTwoWeekHigh', '未知'),
-            "52周最低": info.get('fiftyTwoWeekLow', '未知'),
-            "每股收益(TTM)": info.get('trailingEps', '未知'),
-            "股息率": f"{info.get('dividendYield', 0) * 100:.2f}%" if info.get('dividendYield') else '未知',
-            "公司简介": info.get('longBusinessSummary', '未知')
-        }
-        
-        financials = stock.financials
-        balance_sheet = stock.balance_sheet
-        cash_flow = stock.cashflow
-        
-        return company_data, financials, balance_sheet, cash_flow
+        result = fetch_company_info(ticker)
+        if result is None:
+            raise RuntimeError("数据源暂时不可用，请稍后重试")
+        return result
     except Exception as e:
         st.error(f"获取公司信息时出错: {str(e)}")
         return None, None, None, None
 
-@st.cache_data(ttl=timedelta(hours=24))
-def calculate_technical_indicators(data):
-    """计算技术指标，带有24小时缓存"""
+def calculate_technical_indicators(ticker, period, timeframe, data, columns=TECHNICAL_COLUMNS):
+    """计算所需的技术指标；同一股票、时间范围和K线周期在新K线到达时只增量计算新增的部分"""
     try:
-        df = data.copy()
-        
-        # 计算移动平均线
-        df['MA5'] = df['Close'].rolling(window=5).mean()
-        df['MA10'] = df['Close'].rolling(window=10).mean()
-        df['MA20'] = df['Close'].rolling(window=20).mean()
-        df['MA60'] = df['Close'].rolling(window=60).mean()
-        
-        # 计算MACD
-        exp1 = df['Close'].ewm(span=12, adjust=False).mean()
-        exp2 = df['Close'].ewm(span=26, adjust=False).mean()
-        df['MACD'] = exp1 - exp2
-        df['MACD_SIGNAL'] = df['MACD'].ewm(span=9, adjust=False).mean()
-        df['MACD_HIST'] = df['MACD'] - df['MACD_SIGNAL']
-        
-        # 计算RSI
-        delta = df['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        df['RSI'] = 100 - (100 / (1 + rs))
-        
-        # 计算KDJ
-        low_min = df['Low'].rolling(window=9).min()
-        high_max = df['High'].rolling(window=9).max()
-        rsv = (df['Close'] - low_min) / (high_max - low_min) * 100
-        df['K'] = rsv.rolling(window=3).mean()
-        df['D'] = df['K'].rolling(window=3).mean()
-        df['J'] = 3 * df['K'] - 2 * df['D']
-        
-        # 计算布林带
-        df['BOLL_MIDDLE'] = df['Close'].rolling(window=20).mean()
-        std = df['Close'].rolling(window=20).std()
-        df['BOLL_UPPER'] = df['BOLL_MIDDLE'] + 2 * std
-        df['BOLL_LOWER'] = df['BOLL_MIDDLE'] - 2 * std
-        
-        # 计算成交量均线
-        df['VOLUME_MA5'] = df['Volume'].rolling(window=5).mean()
-        df['VOLUME_MA10'] = df['Volume'].rolling(window=10).mean()
-        
-        return df
+        return update_indicators((ticker, period, timeframe), data, columns)
     except Exception as e:
         st.error(f"计算技术指标时出错: {str(e)}")
         return None
 
+@st.cache_data(hash_funcs={pd.DataFrame: frame_cache_key}, show_spinner=False)
+def calculate_risk(data):
+    """持有该股票的 VaR/CVaR（占市值的比例），同一份历史数据只模拟一次"""
+    return portfolio_risk(data['Close'], [1.0], seed=0)
+
+@st.cache_data(hash_funcs={pd.DataFrame: frame_cache_key}, show_spinner=False)
+def run_backtest(data, entry_name, exit_name, cost):
+    """按所选买入/卖出规则回测，同一份历史数据、规则与成本只回测一次"""
+    return backtest(data, BACKTEST_ENTRIES[entry_name][2], BACKTEST_EXITS[exit_name][2], cost)
+
+@st.cache_data(hash_funcs={pd.DataFrame: frame_cache_key}, show_spinner=False)
+def run_sweep(data, entry_name, cost):
+    """以所选买入规则做 RSI 卖出参数扫描，同一份历史数据、规则与成本只扫描一次"""
+    return sweep(data, BACKTEST_ENTRIES[entry_name][2], SWEEP_EXIT, SWEEP_GRID, cost)
+
+def select_display_range(data, key):
+    """历史超过 MAX_POINTS 根K线时显示区间滑块；图表只对所选区间降采样，缩小区间即可看到细节"""
+    if data is None or len(data) <= MAX_POINTS:
+        return None
+    first, last = (ts.tz_localize(None).to_pydatetime() for ts in (data.index[0], data.index[-1]))
+    return st.slider(
+        "图表显示区间" if get_language() == "zh" else "Chart range",
+        min_value=first, max_value=last, value=(first, last), format="YYYY-MM-DD", key=key
+    )
+
+def in_range(data, window):
+    """截取显示区间内的数据（window 为 None 时原样返回）"""
+    if data is None or window is None:
+        return data
+    start, end = (pd.Timestamp(value) for value in window)
+    if data.index.tz is not None:
+        start, end = start.tz_localize(data.index.tz), end.tz_localize(data.index.tz)
+    return data.loc[start:end]
+
 def get_stock_news(stock_name, num_news=20):
     """根据股票名称获取最近一周的新闻"""
     try:
@@ -179,7 +188,7 @@ def get_stock_news(stock_name, num_news=20):
         rss_url = f"https://news.google.com/rss/search?q={encoded_stock_name}+when:7d&hl=zh-CN&gl=CN&ceid=CN:zh-CN"
         
         # 解析 RSS feed
-        feed = feedparser.parse(rss_url)
+        feed = parse_feed(rss_url)
         
         # 检查是否成功获取新闻
         if not feed.entries:
@@ -230,7 +239,7 @@ def save_api_key(api_key):
 # 在页面加载时加载 API Key
 load_api_key()
 
-def analyze_trend(stock_data, stock_name, period, company_data, financials, news_content):
+def analyze_trend(stock_data, stock_name, period, company_data, financials, news_content, risk_content=""):
     """使用LangChain和OpenAI分析股票趋势"""
     try:
         cache_key = f'analysis_{stock_name}_{period}_{get_language()}'
@@ -270,6 +279,9 @@ def analyze_trend(stock_data, stock_name, period, company_data, financials, news
                 市值：{company_data.get('市值' if get_language() == 'zh' else 'Market Cap', '未知')}
                 市盈率：{company_data.get('市盈率(TTM)' if get_language() == 'zh' else 'P/E Ratio(TTM)', '未知')}
 
+                风险指标（VaR/CVaR，持有期内的潜在损失）：
+                {risk_content or '暂无'}
+
                 相关新闻：
                 {news_content}
 
@@ -277,8 +289,9 @@ def analyze_trend(stock_data, stock_name, period, company_data, financials, news
                 1. 价格趋势分析
                 2. 成交量分析
                 3. 基本面分析
-                4. 相关新闻分析
-                5. 投资建议
+                4. 风险分析
+                5. 相关新闻分析
+                6. 投资建议
 
                 请用中文回答，并使用markdown格式。
                 """
@@ -294,6 +307,9 @@ def analyze_trend(stock_data, stock_name, period, company_data, financials, news
                 Market Cap: {company_data.get('Market Cap', 'Unknown')}
                 P/E Ratio: {company_data.get('P/E Ratio(TTM)', 'Unknown')}
 
+                Risk (VaR/CVaR, potential loss over the holding period):
+                {risk_content or 'Not available'}
+
                 Related News:
                 {news_content}
 
@@ -301,8 +317,9 @@ def analyze_trend(stock_data, stock_name, period, company_data, financials, news
                 1. Price Trend Analysis
                 2. Volume Analysis
                 3. Fundamental Analysis
-                4. Related News Analysis
-                5. Investment Recommendations
+                4. Risk Analysis
+                5. Related News Analysis
+                6. Investment Recommendations
 
                 Please respond in English using markdown format.
                 """
@@ -318,8 +335,8 @@ def analyze_trend(stock_data, stock_name, period, company_data, financials, news
             else f"Error generating analysis: {str(e)}"
         )
 
-def analyze_technical_indicators(tech_data, stock_name):
-    """使用LangChain和OpenAI分析技术指标"""
+def analyze_technical_indicators(stock_data, stock_name):
+    """使用LangChain和OpenAI分析技术指标；只计算最新一根K线的指标值，与所选历史长度无关"""
     try:
         current_date = datetime.now().strftime('%Y-%m-%d')
         cache_key = f'technical_{stock_name}_{current_date}_{get_language()}'
@@ -336,7 +353,7 @@ def analyze_technical_indicators(tech_data, stock_name):
         with st.spinner(
             '正在生成技术分析...' if get_language() == "zh" else 'Generating technical analysis...'
         ):
-            latest = tech_data.iloc[-1]
+            latest = evaluate_tail(stock_data, TECHNICAL_COLUMNS).iloc[-1]
             
             # 根据当前语言选择提示词
             if get_language() == "zh":
@@ -417,9 +434,11 @@ load_api_key()
 
 # 使用容器来控制内容宽度
 with st.container():
-    selected_stock = st.selectbox(
+    selected_stock = symbol_picker(
+        stocks,
+        "搜索股票" if get_language() == "zh" else "Search Stock",
         "选择股票" if get_language() == "zh" else "Select Stock",
-        list(stock_dict.keys())
+        key="stock_search"
     )
     
 
@@ -429,22 +448,35 @@ if selected_stock:
         ["1d", "5d", "1mo", "3mo", "6mo", "1y", "2y", "5y", "max"],
         index=2
     )
+    timeframe = st.selectbox(
+        "K线周期" if get_language() == "zh" else "Candle Interval",
+        ["1d", "1wk", "1mo"],
+        format_func=lambda tf: {
+            "1d": "日线" if get_language() == "zh" else "Daily",
+            "1wk": "周线" if get_language() == "zh" else "Weekly",
+            "1mo": "月线" if get_language() == "zh" else "Monthly",
+        }[tf]
+    )
     add_refresh_button(selected_stock, period)
     
     # 获取股票代码
-    ticker = stock_dict[selected_stock]
+    ticker = stocks.code_of(selected_stock)
+    record_view(ticker)
     
     with st.spinner('正在加载股票数据...'):
         # 显示缓存状态
         show_cache_status(ticker)
         
         # 获取数据（使用缓存）
-        stock_data = get_stock_data(ticker, period)
+        stock_data = get_stock_data(ticker, period, cache_key_until(ticker), timeframe)
         company_data, financials, balance_sheet, cash_flow = get_company_info(ticker)
         
         # 更新最后更新时间
         if stock_data is not None:
             st.session_state[f'last_update_{ticker}'] = datetime.now()
+
+    # 长历史的图表按像素宽度降采样，显示区间由滑块控制
+    display_range = select_display_range(stock_data, key=f"display_range_{ticker}_{period}_{timeframe}")
     
     # 创建标签页
     tab_names = ["公司信息", "价格走势", "相关新闻", "AI分析", "技术指标"] if get_language() == "zh" else \
@@ -560,36 +592,48 @@ if selected_stock:
     with chart_tab:
         with st.spinner('正在生成价格走势图...' if get_language() == "zh" else 'Generating price chart...'):
             # 获取股票数据
-            stock_data = get_stock_data(ticker, period)
+            stock_data = get_stock_data(ticker, period, cache_key_until(ticker), timeframe)
             
             if stock_data is not None:
                 # 显示股票价格走势图
-                fig = go.Figure()
-                fig.add_trace(go.Scatter(
-                    x=stock_data.index,
-                    y=stock_data['Close'],
-                    name=('收盘价' if get_language() == "zh" else 'Close Price')
+                def build_price_chart():
+                    close = lttb(in_range(stock_data, display_range)['Close'])
+                    fig = go.Figure()
+                    fig.add_trace(go.Scatter(
+                        x=close.index,
+                        y=close,
+                        name=('收盘价' if get_language() == "zh" else 'Close Price')
+                    ))
+                    fig.update_layout(
+                        title=f'{selected_stock} ' + ('价格走势' if get_language() == "zh" else 'Price Trend'),
+                        yaxis_title=('价格' if get_language() == "zh" else 'Price'),
+                        template='plotly_dark'
+                    )
+                    return fig
+                st.plotly_chart(cached_figure(
+                    figure_key('close', stock_data, get_language(), selected_stock, display_range),
+                    build_price_chart
                 ))
-                fig.update_layout(
-                    title=f'{selected_stock} ' + ('价格走势' if get_language() == "zh" else 'Price Trend'),
-                    yaxis_title=('价格' if get_language() == "zh" else 'Price'),
-                    template='plotly_dark'
-                )
-                st.plotly_chart(fig)
                 
-                # 显示成交量图
-                volume_fig = go.Figure()
-                volume_fig.add_trace(go.Bar(
-                    x=stock_data.index,
-                    y=stock_data['Volume'],
-                    name=('成交量' if get_language() == "zh" else 'Volume')
+                # 显示成交量图（每根柱为合并后的成交量之和）
+                def build_volume_chart():
+                    volume = downsample_ohlc(in_range(stock_data, display_range)[['Volume']])['Volume']
+                    volume_fig = go.Figure()
+                    volume_fig.add_trace(go.Bar(
+                        x=volume.index,
+                        y=volume,
+                        name=('成交量' if get_language() == "zh" else 'Volume')
+                    ))
+                    volume_fig.update_layout(
+                        title=('成交量' if get_language() == "zh" else 'Volume'),
+                        yaxis_title=('成交量' if get_language() == "zh" else 'Volume'),
+                        template='plotly_dark'
+                    )
+                    return volume_fig
+                st.plotly_chart(cached_figure(
+                    figure_key('volume', stock_data, get_language(), display_range),
+                    build_volume_chart
                 ))
-                volume_fig.update_layout(
-                    title=('成交量' if get_language() == "zh" else 'Volume'),
-                    yaxis_title=('成交量' if get_language() == "zh" else 'Volume'),
-                    template='plotly_dark'
-                )
-                st.plotly_chart(volume_fig)
     
     with analysis_tab:
         st.subheader("🤖 " + ("AI 分析" if get_language() == "zh" else "AI Analysis"))
@@ -598,8 +642,30 @@ if selected_stock:
             st.error(news_list)  # 如果返回的是错误信息，显示错误
         else:
             news_content = "\n".join([f"- {item['title']} (来源: {item['source']})" for item in news_list if isinstance(item, dict)]) if news_list else "没有找到相关新闻。"
-            analysis_text = analyze_trend(stock_data, selected_stock, period, company_data, financials, news_content)
+            # 趋势分析的平均成交量等按日线计算
+            daily_data = get_stock_data(ticker, period, cache_key_until(ticker))
+            # 风险指标按日线计算，至少使用 RISK_PERIOD 的历史
+            risk_data = get_stock_data(ticker, widest_period(period, RISK_PERIOD), cache_key_until(ticker))
+            risk_table = calculate_risk(risk_data) if risk_data is not None else None
+            risk_content = describe_risk(risk_table, CONFIDENCE, get_language()) if risk_table is not None else ""
+            analysis_text = analyze_trend(daily_data, selected_stock, period, company_data, financials,
+                                          news_content, risk_content)
             st.markdown(analysis_text)
+
+            if risk_table is not None:
+                with st.expander("⚠️ " + ("风险指标（VaR / CVaR）" if get_language() == "zh" else "Risk (VaR / CVaR)")):
+                    st.dataframe(
+                        risk_table.style.format("{:.2%}", na_rep="-"),
+                        use_container_width=True
+                    )
+                    st.caption(
+                        (f"{CONFIDENCE:.0%} 置信度下持有期（交易日）内的潜在损失占市值的比例；"
+                         f"基于 {risk_table.attrs['observations']} 个交易日的收益率，蒙特卡洛 {PATHS:,} 条路径")
+                        if get_language() == "zh" else
+                        (f"Potential loss as a share of market value over the holding period (trading days) "
+                         f"at {CONFIDENCE:.0%} confidence; {risk_table.attrs['observations']} daily returns, "
+                         f"{PATHS:,} Monte Carlo paths")
+                    )
         
         # 添加复制按钮
         if st.button("📋 " + ("复制分析" if get_language() == "zh" else "Copy Analysis")):
@@ -607,49 +673,114 @@ if selected_stock:
             st.clipboard_copy(analysis_text)
 
     # 计算技术指标
-    tech_data = calculate_technical_indicators(stock_data)
+    tech_data = calculate_technical_indicators(ticker, period, timeframe, stock_data)
     
     with technical_tab:
         st.subheader("📊 " + ("技术指标分析" if get_language() == "zh" else "Technical Analysis"))
-        
-        # MACD图表
-        fig_macd = go.Figure()
-        fig_macd.add_trace(go.Scatter(x=tech_data.index, y=tech_data['MACD'], name='MACD'))
-        fig_macd.add_trace(go.Scatter(x=tech_data.index, y=tech_data['MACD_SIGNAL'], name='Signal Line'))
-        fig_macd.update_layout(
-            title='MACD',
-            yaxis_title='MACD',
-            template='plotly_dark'
+        # 指标按完整历史计算，图表只显示所选区间并降采样；同一数据、区间、窗格与语言的图表只构建一次
+        # 价格、布林带、成交量、MACD 与 RSI 合为一张共用X轴的图，窗格可切换
+        panes = st.multiselect(
+            "显示的窗格" if get_language() == "zh" else "Panes",
+            list(TECHNICAL_PANES),
+            default=list(TECHNICAL_PANES),
+            format_func=lambda pane: TECHNICAL_PANES[pane][0 if get_language() == "zh" else 1],
+            key="technical_panes"
+        )
+        st.plotly_chart(cached_figure(
+            figure_key('technical', tech_data, get_language(), tuple(panes), display_range),
+            lambda: technical_figure(in_range(tech_data, display_range), panes, get_language())
+        ), use_container_width=True)
+
+        # 自定义指标（如 MA120、RSI6、EMA50），只额外计算输入的指标
+        custom_input = st.text_input(
+            "自定义指标（逗号分隔，如 MA120, RSI6, EMA50）" if get_language() == "zh"
+            else "Custom indicators (comma separated, e.g. MA120, RSI6, EMA50)",
+            key=f"custom_indicators_{ticker}"
         )
-        st.plotly_chart(fig_macd)
-
-        # RSI图表
-        fig_rsi = go.Figure()
-        fig_rsi.add_trace(go.Scatter(x=tech_data.index, y=tech_data['RSI'], name='RSI'))
-        fig_rsi.add_hline(y=70, line_dash="dash", line_color="red")
-        fig_rsi.add_hline(y=30, line_dash="dash", line_color="green")
-        fig_rsi.update_layout(
-            title='RSI',
-            yaxis_title='RSI',
-            template='plotly_dark'
+        custom_columns = [name.strip().upper() for name in custom_input.split(',') if name.strip()]
+        if custom_columns:
+            custom_data = calculate_technical_indicators(ticker, period, timeframe, stock_data, custom_columns)
+            if custom_data is not None:
+                def build_custom_chart():
+                    visible = in_range(custom_data, display_range)
+                    fig_custom = go.Figure()
+                    for name, column in [('Close Price', 'Close')] + [(name, name) for name in custom_columns]:
+                        line = lttb(visible[column])
+                        fig_custom.add_trace(go.Scatter(x=line.index, y=line, name=name))
+                    fig_custom.update_layout(
+                        title=("自定义指标" if get_language() == "zh" else "Custom Indicators"),
+                        template='plotly_dark'
+                    )
+                    return fig_custom
+                st.plotly_chart(cached_figure(
+                    figure_key('custom', custom_data, get_language(), tuple(custom_columns), display_range),
+                    build_custom_chart
+                ))
+
+        # 策略回测
+        st.subheader("🧪 " + ("策略回测" if get_language() == "zh" else "Strategy Backtest"))
+        label = 0 if get_language() == "zh" else 1
+        entry_col, exit_col, cost_col = st.columns(3)
+        entry_name = entry_col.selectbox(
+            "买入条件" if get_language() == "zh" else "Entry rule",
+            list(BACKTEST_ENTRIES), format_func=lambda name: BACKTEST_ENTRIES[name][label],
+            key=f"backtest_entry_{ticker}"
         )
-        st.plotly_chart(fig_rsi)
-
-        # 布林带图表
-        fig_boll = go.Figure()
-        fig_boll.add_trace(go.Scatter(x=tech_data.index, y=tech_data['BOLL_UPPER'], name='Upper Band'))
-        fig_boll.add_trace(go.Scatter(x=tech_data.index, y=tech_data['BOLL_MIDDLE'], name='Middle Band'))
-        fig_boll.add_trace(go.Scatter(x=tech_data.index, y=tech_data['BOLL_LOWER'], name='Lower Band'))
-        fig_boll.add_trace(go.Scatter(x=stock_data.index, y=stock_data['Close'], name='Close Price'))
-        fig_boll.update_layout(
-            title='Bollinger Bands',
-            yaxis_title='Price',
-            template='plotly_dark'
+        exit_name = exit_col.selectbox(
+            "卖出条件" if get_language() == "zh" else "Exit rule",
+            list(BACKTEST_EXITS), format_func=lambda name: BACKTEST_EXITS[name][label],
+            key=f"backtest_exit_{ticker}"
         )
-        st.plotly_chart(fig_boll)
+        cost = cost_col.number_input(
+            "单边交易成本（%）" if get_language() == "zh" else "Cost per trade (%)",
+            min_value=0.0, max_value=5.0, value=0.1, step=0.05, key=f"backtest_cost_{ticker}"
+        ) / 100
+        result = run_backtest(stock_data, entry_name, exit_name, cost)
+        stats = result['stats']
+        metrics = st.columns(5)
+        metrics[0].metric("总收益" if get_language() == "zh" else "Total Return", f"{stats['total_return']:+.2%}")
+        metrics[1].metric("年化收益" if get_language() == "zh" else "Annual Return", f"{stats['annual_return']:+.2%}")
+        metrics[2].metric("最大回撤" if get_language() == "zh" else "Max Drawdown", f"{stats['max_drawdown']:.2%}")
+        metrics[3].metric("交易次数" if get_language() == "zh" else "Trades", f"{int(stats['trades'])}")
+        metrics[4].metric("胜率" if get_language() == "zh" else "Win Rate",
+                          "-" if pd.isna(stats['win_rate']) else f"{stats['win_rate']:.0%}")
+
+        def build_equity_chart():
+            fig_equity = go.Figure()
+            for line, name, extra in (
+                (result['equity'], "策略净值" if get_language() == "zh" else "Strategy", {}),
+                (stock_data['Close'] / stock_data['Close'].iloc[0],
+                 "持有不动" if get_language() == "zh" else "Buy & Hold", {}),
+                (result['drawdown'], "回撤" if get_language() == "zh" else "Drawdown", {'fill': 'tozeroy', 'yaxis': 'y2'}),
+            ):
+                line = lttb(line)
+                fig_equity.add_trace(go.Scatter(x=line.index, y=line, name=name, **extra))
+            fig_equity.update_layout(
+                title=("策略净值与回撤" if get_language() == "zh" else "Equity and Drawdown"),
+                yaxis2=dict(overlaying='y', side='right', tickformat='.0%'),
+                template='plotly_dark'
+            )
+            return fig_equity
+        st.plotly_chart(cached_figure(
+            figure_key('equity', stock_data, get_language(), entry_name, exit_name, cost),
+            build_equity_chart
+        ))
+
+        with st.expander("交易明细" if get_language() == "zh" else "Trades"):
+            st.dataframe(result['trades'], use_container_width=True)
+
+        with st.expander("参数扫描：RSI 窗口 × 卖出阈值" if get_language() == "zh"
+                         else "Parameter sweep: RSI window × exit level"):
+            st.dataframe(
+                run_sweep(stock_data, entry_name, cost).style.format({
+                    'total_return': "{:+.2%}", 'annual_return': "{:+.2%}", 'max_drawdown': "{:.2%}",
+                    'sharpe': "{:.2f}", 'win_rate': "{:.0%}", 'exposure': "{:.0%}",
+                }),
+                use_container_width=True
+            )
 
         # AI分析
-        tech_analysis = analyze_technical_indicators(tech_data, selected_stock)
+        tech_analysis = analyze_technical_indicators(stock_data, selected_stock)
         st.markdown(tech_analysis)
         
         # 添加复制按钮
@@ -0,0 +1,242 @@
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+from components.sidebar import show_sidebar, get_language
+from components.symbol_picker import symbol_picker
+from utils.history import frame_cache_key, stale_tickers, sync_many
+from utils.prefetch import start_prefetcher
+from utils.portfolio import (BENCHMARK, correlation_matrix, load_aligned_closes, portfolio_pnl,
+                             returns_from_closes, rolling_beta, rolling_correlation, summarize,
+                             universe_index)
+from utils.risk import METHODS, PATHS, portfolio_risk
+
+# 设置页面配置
+st.set_page_config(
+    page_title="自选与组合" if get_language() == "zh" else "Watchlist & Portfolio",
+    page_icon="👀",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+# 显示侧边栏
+show_sidebar()
+
+# 启动后台预取（每个进程只启动一次）
+start_prefetcher()
+
+DEFAULT_WATCHLIST = ['AAPL', 'MSFT', 'NVDA', 'GC=F', 'BTC-USD', 'ETH-USD']
+
+# 相关系数窗口（行数），None 为整个区间
+CORRELATION_WINDOWS = [None, 20, 60, 120]
+
+# 滚动相关系数与 beta 的窗口
+ROLLING_WINDOW = 60
+
+# 风险模拟的可选路径数
+PATH_OPTIONS = [10_000, PATHS, 1_000_000]
+
+
+@st.cache_data(hash_funcs={pd.DataFrame: frame_cache_key}, show_spinner=False)
+def simulate_risk(closes, values, horizon, confidence, paths, method):
+    """组合的 VaR/CVaR，同一份收盘价、持仓市值与参数只模拟一次（切换页面上其他控件不重新模拟）"""
+    return portfolio_risk(closes, values, horizons=sorted({1, int(horizon)}), confidence=confidence,
+                          paths=paths, method=method, seed=0)
+
+
+def name_of(symbol):
+    """品种名称，不在自选范围内的代码返回空字符串"""
+    return universe.name_of(symbol) or ''
+
+
+st.title("👀 " + ("自选与组合" if get_language() == "zh" else "Watchlist & Portfolio"))
+
+# 可加入自选的品种（股票、加密货币与市场价格品种）在服务端搜索，浏览器只收到前 TOP_K 个结果
+universe = universe_index()
+
+if 'watchlist' not in st.session_state:
+    st.session_state.watchlist = list(DEFAULT_WATCHLIST)
+
+period = st.selectbox(
+    "选择时间范围" if get_language() == "zh" else "Select Time Range",
+    ["3mo", "6mo", "1y", "2y", "5y"],
+    index=2
+)
+col1, col2 = st.columns(2)
+with col1:
+    label = symbol_picker(
+        universe,
+        "搜索品种" if get_language() == "zh" else "Search symbols",
+        "选择品种" if get_language() == "zh" else "Select symbol",
+        key="watchlist_search",
+        default_index=None
+    )
+with col2:
+    pasted = st.text_input(
+        "批量添加（代码以逗号或空格分隔）" if get_language() == "zh"
+        else "Add in bulk (codes separated by commas or spaces)"
+    )
+if st.button("➕ " + ("加入自选" if get_language() == "zh" else "Add to watchlist")):
+    added = ([universe.code_of(label)] if label else []) + pasted.replace(',', ' ').upper().split()
+    st.session_state.watchlist = list(dict.fromkeys(st.session_state.watchlist + added))
+
+# 选项只有当前自选品种，取消选中即移出自选
+watchlist = st.multiselect(
+    "自选品种" if get_language() == "zh" else "Watchlist",
+    st.session_state.watchlist,
+    default=st.session_state.watchlist,
+    format_func=lambda symbol: f"{symbol} - {name_of(symbol)}"
+)
+st.session_state.watchlist = watchlist
+
+if not watchlist:
+    st.info("请添加自选品种" if get_language() == "zh" else "Add symbols to your watchlist")
+    st.stop()
+
+# 本地缺失或过期的品种批量同步后，一次性读取所有收盘价
+tickers = watchlist + ([BENCHMARK] if BENCHMARK not in watchlist else [])
+stale = stale_tickers(tickers, period)
+if stale:
+    progress = st.progress(0.0, text=("正在同步行情..." if get_language() == "zh" else "Syncing prices..."))
+    sync_many(stale, period, on_progress=lambda done, total: progress.progress(done / total))
+    progress.empty()
+
+closes = load_aligned_closes(tickers, period)
+missing = [ticker for ticker in tickers if ticker not in closes.columns]
+if missing:
+    st.warning(("以下品种暂无数据：" if get_language() == "zh" else "No data for: ") + ", ".join(missing))
+if closes.empty:
+    st.stop()
+returns = returns_from_closes(closes)
+watched = [ticker for ticker in watchlist if ticker in closes.columns]
+
+# 概览
+st.subheader("📋 " + ("概览" if get_language() == "zh" else "Overview"))
+summary = summarize(closes, returns)
+summary.insert(0, 'Name', [name_of(ticker) for ticker in summary.index])
+st.dataframe(
+    summary.loc[watched].style.format({
+        'Last': "{:,.2f}", 'Return %': "{:+.2f}%", 'Volatility %': "{:.2f}%",
+        'Max Drawdown %': "{:.2f}%", 'Beta': "{:.2f}", 'Correlation': "{:.2f}",
+    }),
+    use_container_width=True
+)
+st.caption(
+    f"Beta 与相关系数相对 {BENCHMARK}，波动率按各品种的实际交易频率年化" if get_language() == "zh"
+    else f"Beta and correlation against {BENCHMARK}; volatility is annualized by each symbol's trading frequency"
+)
+
+# 相关系数矩阵
+st.subheader("🔗 " + ("相关系数" if get_language() == "zh" else "Correlation"))
+window = st.selectbox(
+    "计算窗口" if get_language() == "zh" else "Window",
+    CORRELATION_WINDOWS,
+    format_func=lambda rows: ("整个区间" if get_language() == "zh" else "Whole range") if rows is None
+    else (f"最近 {rows} 个交易日" if get_language() == "zh" else f"Last {rows} days")
+)
+corr = correlation_matrix(returns[watched], window)
+fig_corr = go.Figure(go.Heatmap(z=corr.values, x=corr.columns, y=corr.index,
+                                zmin=-1, zmax=1, colorscale='RdBu_r'))
+fig_corr.update_layout(
+    title=("收益率相关系数" if get_language() == "zh" else "Return Correlation"),
+    height=max(400, 14 * len(watched)),
+    template='plotly_dark'
+)
+st.plotly_chart(fig_corr, use_container_width=True)
+
+# 相对基准的滚动相关系数与 beta
+if BENCHMARK in closes.columns:
+    selected = st.multiselect(
+        "滚动相关系数 / Beta 的品种" if get_language() == "zh" else "Symbols for rolling correlation / beta",
+        watched,
+        default=watched[:5]
+    )
+    if selected:
+        rolling_corr = rolling_correlation(returns, BENCHMARK, ROLLING_WINDOW)
+        rolling_b = rolling_beta(returns, BENCHMARK, ROLLING_WINDOW)
+        for title, frame in (
+            (f"{ROLLING_WINDOW} 日滚动相关系数（相对 {BENCHMARK}）" if get_language() == "zh"
+             else f"{ROLLING_WINDOW}-day rolling correlation vs {BENCHMARK}", rolling_corr),
+            (f"{ROLLING_WINDOW} 日滚动 Beta（相对 {BENCHMARK}）" if get_language() == "zh"
+             else f"{ROLLING_WINDOW}-day rolling beta vs {BENCHMARK}", rolling_b),
+        ):
+            fig = go.Figure()
+            for ticker in selected:
+                series = frame[ticker].dropna()
+                fig.add_trace(go.Scatter(x=series.index, y=series, name=ticker))
+            fig.update_layout(title=title, template='plotly_dark')
+            st.plotly_chart(fig, use_container_width=True)
+
+# 组合盈亏
+st.subheader("💼 " + ("组合盈亏" if get_language() == "zh" else "Portfolio P&L"))
+if 'holdings' not in st.session_state:
+    st.session_state.holdings = pd.DataFrame({'Symbol': watched[:3], 'Quantity': 1.0, 'Cost': float('nan')})
+holdings = st.data_editor(
+    st.session_state.holdings,
+    num_rows="dynamic",
+    column_config={
+        'Symbol': st.column_config.SelectboxColumn(options=watched, required=True),
+        'Quantity': st.column_config.NumberColumn(min_value=0.0),
+        'Cost': st.column_config.NumberColumn(
+            help=("每单位成本，留空为区间首日价格" if get_language() == "zh"
+                  else "Cost per unit; empty uses the first price in range")
+        ),
+    },
+    key="holdings_editor"
+)
+holdings = holdings.dropna(subset=['Symbol']).groupby('Symbol').agg({'Quantity': 'sum', 'Cost': 'first'})
+daily, positions = portfolio_pnl(closes, holdings['Quantity'].to_dict(), holdings['Cost'].dropna().to_dict())
+if not positions.empty:
+    latest = daily.iloc[-1]
+    cols = st.columns(3)
+    cols[0].metric("市值" if get_language() == "zh" else "Value", f"{latest['Value']:,.2f}")
+    cols[1].metric("盈亏" if get_language() == "zh" else "P&L", f"{latest['P&L']:+,.2f}")
+    cols[2].metric("收益率" if get_language() == "zh" else "Return", f"{latest['Return %']:+.2f}%")
+    fig_pnl = go.Figure()
+    fig_pnl.add_trace(go.Scatter(x=daily.index, y=daily['P&L'], fill='tozeroy',
+                                 name=("盈亏" if get_language() == "zh" else "P&L")))
+    fig_pnl.update_layout(
+        title=("组合盈亏" if get_language() == "zh" else "Portfolio P&L"),
+        template='plotly_dark'
+    )
+    st.plotly_chart(fig_pnl, use_container_width=True)
+    st.dataframe(
+        positions.style.format({
+            'Quantity': "{:,.4g}", 'Cost': "{:,.2f}", 'Last': "{:,.2f}", 'Value': "{:,.2f}",
+            'P&L': "{:+,.2f}", 'Weight %': "{:.1f}%",
+        }),
+        use_container_width=True
+    )
+
+    # 组合风险（VaR / CVaR）
+    st.subheader("⚠️ " + ("组合风险" if get_language() == "zh" else "Portfolio Risk"))
+    cols = st.columns(4)
+    confidence = cols[0].selectbox("置信度" if get_language() == "zh" else "Confidence", [0.95, 0.99],
+                                   format_func=lambda level: f"{level:.0%}")
+    horizon = cols[1].number_input("持有期（交易日）" if get_language() == "zh" else "Horizon (trading days)",
+                                   min_value=1, max_value=60, value=10)
+    method = cols[2].selectbox(
+        "模拟方法" if get_language() == "zh" else "Simulation",
+        METHODS,
+        format_func=lambda name: {'normal': ("多元正态" if get_language() == "zh" else "Multivariate normal"),
+                                  'bootstrap': ("历史重抽样" if get_language() == "zh" else "Bootstrap")}[name]
+    )
+    paths = cols[3].selectbox("路径数" if get_language() == "zh" else "Paths", PATH_OPTIONS,
+                              index=PATH_OPTIONS.index(PATHS), format_func=lambda count: f"{count:,}")
+    with st.spinner('正在模拟...' if get_language() == "zh" else 'Simulating...'):
+        risk = simulate_risk(closes[positions.index], positions['Value'].to_numpy(),
+                             horizon, confidence, paths, method)
+    value = positions['Value'].sum()
+    amounts = risk.mul(value)
+    amounts.columns = [f"{col} ({'金额' if get_language() == 'zh' else 'Amount'})" for col in amounts.columns]
+    st.dataframe(
+        pd.concat([risk, amounts], axis=1).style
+        .format("{:.2%}", subset=list(risk.columns), na_rep="-")
+        .format("{:,.2f}", subset=list(amounts.columns), na_rep="-"),
+        use_container_width=True
+    )
+    st.caption(
+        f"基于 {risk.attrs['observations']} 个所有持仓都有收盘价的交易日；VaR/CVaR 为持有期内潜在损失占当前市值的比例"
+        if get_language() == "zh" else
+        f"Based on {risk.attrs['observations']} days on which every holding has a close; "
+        f"VaR/CVaR are potential losses as a share of current value"
+    )
@@ -0,0 +1,108 @@
+import itertools
+import threading
+import time
+
+import pytest
+
+from utils import cache as cache_module
+from utils.cache import TTLCache, stale_while_revalidate
+from utils.circuit_breaker import CLOSED, OPEN, get_breaker
+
+_names = itertools.count()
+
+
+@pytest.fixture
+def breaker():
+    """每个测试使用独立的上游，一次失败即熔断、冷却期为 0"""
+    breaker = get_breaker(f'test-upstream-{next(_names)}')
+    breaker.failure_threshold = 1
+    breaker.recovery_timeout = 0.0
+    return breaker
+
+
+def test_uncached_probe_result_closes_breaker(breaker):
+    responses = iter([ConnectionError('down'), None])
+
+    @stale_while_revalidate(TTLCache(), breaker.name, prefix='probe')
+    def fetch(symbol):
+        response = next(responses)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    with pytest.raises(ConnectionError):
+        fetch('X')
+    assert breaker.state == OPEN
+    # 半开探测正常返回但结果不写入缓存，熔断器仍应恢复
+    assert fetch('X') is None
+    assert breaker.state == CLOSED
+
+
+def test_skipped_background_refresh_keeps_probe(breaker, monkeypatch):
+    store = TTLCache(ttl=0, stale_ttl=60)
+
+    @stale_while_revalidate(store, breaker.name, prefix='skipped')
+    def fetch(symbol):
+        return 1.0
+
+    store.set(('skipped', ('X',), ()), 0.5)
+    breaker.record_failure()
+    # 该键已在后台刷新中：不发请求，也不应占用半开探测
+    monkeypatch.setattr(cache_module, '_refreshing', {('skipped', ('X',), ())})
+    assert fetch('X') == 0.5
+    assert breaker.state == OPEN
+    assert breaker.allow()
+
+
+def test_is_stale_matches_positional_and_keyword_calls(breaker):
+    store = TTLCache(ttl=0, stale_ttl=60)
+
+    @stale_while_revalidate(store, breaker.name, prefix='history')
+    def fetch(symbol, period='1mo'):
+        return 1.0
+
+    fetch('X', '1y')
+    assert fetch.is_stale('X', period='1y')
+    assert fetch.is_stale('X', '1y')
+    assert not fetch.is_stale('X')
+    fetch('X')
+    assert fetch.is_stale('X', period='1mo')
+
+
+def test_ttl_cache_stale_window():
+    store = TTLCache(ttl=60, stale_ttl=60)
+    store.set('fresh', 1)
+    store.set('stale', 2, ttl=0)
+    store.set('gone', 3, ttl=0, stale_ttl=0)
+    assert store.get_stale('fresh') == ('fresh', 1)
+    assert store.get_stale('stale') == ('stale', 2)
+    assert store.get('stale') == (False, None)
+    assert store.get_stale('gone') == (None, None)
+
+
+def test_stale_value_served_while_refreshing(breaker):
+    store = TTLCache(ttl=60, stale_ttl=60)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    @stale_while_revalidate(store, breaker.name, prefix='slow')
+    def fetch(symbol):
+        calls.append(symbol)
+        started.set()
+        release.wait(5)
+        return 2.0
+
+    store.set(('slow', ('X',), ()), 1.0, ttl=0)
+    assert fetch('X') == 1.0
+    assert started.wait(5)
+    # 刷新进行中：继续返回旧值，不重复提交刷新
+    assert fetch('X') == 1.0
+    assert fetch.is_stale('X')
+    release.set()
+    for _ in range(100):
+        if not fetch.is_stale('X'):
+            break
+        time.sleep(0.01)
+    assert fetch('X') == 2.0
+    assert calls == ['X']
+    assert breaker.state == CLOSED
@@ -0,0 +1,48 @@
+from utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+def test_opens_after_failure_threshold():
+    breaker = CircuitBreaker('test', failure_threshold=3, recovery_timeout=60)
+    for _ in range(2):
+        breaker.record_failure()
+        assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_success_resets_failure_count():
+    breaker = CircuitBreaker('test', failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+
+def test_half_open_probe_success_closes():
+    breaker = CircuitBreaker('test', failure_threshold=1, recovery_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    # 半开时只放行一个探测请求
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow()
+
+
+def test_half_open_probe_failure_reopens():
+    breaker = CircuitBreaker('test', failure_threshold=5, recovery_timeout=0)
+    for _ in range(5):
+        breaker.record_failure()
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+def test_open_blocks_until_recovery_timeout():
+    breaker = CircuitBreaker('test', failure_threshold=1, recovery_timeout=60)
+    breaker.record_failure()
+    assert not breaker.allow()
+    assert breaker.state == OPEN
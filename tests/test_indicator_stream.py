@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import indicator_stream
+from utils.indicator_stream import IndicatorStream, update_indicators
+from utils.indicators import INDICATOR_COLUMNS, add_indicators
+
+
+def _bars(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    spread = rng.uniform(0.1, 2, (2, n))
+    index = pd.date_range('2024-01-01', periods=n, freq='B')
+    return pd.DataFrame({'Open': close, 'High': close + spread[0], 'Low': close - spread[1], 'Close': close,
+                         'Volume': rng.uniform(1e5, 1e6, n)}, index=index)
+
+
+def _revised(data):
+    """把最后一根K线改为新的盘中价格"""
+    data = data.copy()
+    data.iloc[-1, data.columns.get_indexer(['High', 'Low', 'Close', 'Volume'])] = (
+        data['High'].iloc[-1] + 1, data['Low'].iloc[-1] - 1, data['Close'].iloc[-1] + 0.5,
+        data['Volume'].iloc[-1] * 2)
+    return data
+
+
+def test_stream_matches_batch_bar_by_bar():
+    data = _bars()
+    stream = IndicatorStream()
+    rows = [stream.update(*row) for row in data[['High', 'Low', 'Close', 'Volume']].to_numpy()]
+    streamed = pd.DataFrame(rows, index=data.index, columns=INDICATOR_COLUMNS)
+    pd.testing.assert_frame_equal(streamed, add_indicators(data)[INDICATOR_COLUMNS], rtol=1e-8)
+
+
+# 初始K线数少于/多于 REPLAY_BARS，分别覆盖逐根回放与向量化 EMA 初始化
+@pytest.mark.parametrize('seed_bars', [1, 30, 120])
+def test_update_indicators_matches_batch(seed_bars, monkeypatch):
+    full = []
+    monkeypatch.setattr(indicator_stream, 'add_indicators', lambda *args: full.append(1) or add_indicators(*args))
+    data = _bars()
+    key = ('test', seed_bars)
+    for end in range(seed_bars, len(data) + 1):
+        result = update_indicators(key, data.iloc[:end])
+    pd.testing.assert_frame_equal(result, add_indicators(data), rtol=1e-8)
+
+    revised = _revised(data)
+    pd.testing.assert_frame_equal(update_indicators(key, revised), add_indicators(revised), rtol=1e-8)
+    # 只有首次全量计算，之后都是增量更新
+    assert len(full) == 1
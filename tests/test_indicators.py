@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from utils.indicators import add_indicators
+
+
+def _bars(n=120, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    index = pd.date_range('2024-01-01', periods=n, freq='B')
+    return pd.DataFrame({'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                         'Volume': 1e6}, index=index)
+
+
+def _pandas_rsi(close):
+    """原先 pandas 实现的 RSI，作为参照"""
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    return 100 - (100 / (1 + gain / loss))
+
+
+def test_rsi_matches_pandas():
+    data = _bars()
+    np.testing.assert_allclose(add_indicators(data, ['RSI'])['RSI'], _pandas_rsi(data['Close']), equal_nan=True)
+
+
+def test_rsi_matches_pandas_across_gap():
+    data = _bars()
+    data.iloc[60, data.columns.get_loc('Close')] = np.nan
+    rsi = add_indicators(data, ['RSI'])['RSI']
+    np.testing.assert_allclose(rsi, _pandas_rsi(data['Close']), equal_nan=True)
+    assert not rsi.iloc[61:75].isna().any()
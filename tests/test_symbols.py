@@ -0,0 +1,23 @@
+from pathlib import Path
+
+import pytest
+
+from utils.symbols import COINS_CSV, POPULAR_COINS, SymbolIndex, _read
+
+
+@pytest.fixture(scope='module')
+def coins():
+    data = _read(Path(__file__).resolve().parent.parent / COINS_CSV)
+    return SymbolIndex(data['symbol'], data['name'], data['id'], data['name'], POPULAR_COINS)
+
+
+@pytest.mark.parametrize('query, name', [('btc', 'Bitcoin'), ('BTC', 'Bitcoin'), ('eth', 'Ethereum'),
+                                         ('doge', 'Dogecoin'), ('bitcoin', 'Bitcoin'),
+                                         ('weth', 'WETH')])
+def test_shared_code_ranks_popular_coin_first(coins, query, name):
+    assert coins.search(query)[0] == name
+
+
+def test_ranks_follow_row_order_without_popularity():
+    index = SymbolIndex(['abc', 'abc'], ['Zeta', 'Alpha'], ['zeta', 'alpha'], ['Zeta', 'Alpha'])
+    assert index.search('abc') == ['Zeta', 'Alpha']
@@ -0,0 +1,231 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from utils.indicators import INPUT_COLUMNS, evaluate
+
+# 条件运算符
+OPERATORS = ('>', '<', 'cross_above', 'cross_below')
+
+# 没有足够时间跨度推算年化时使用的每年K线数（日线）
+DEFAULT_PERIODS_PER_YEAR = 252
+
+
+def _operand(value, params):
+    """条件中的一项：列名（可含 {参数} 占位符）或数字"""
+    if isinstance(value, str):
+        value = value.format(**params)
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    return float(value)
+
+
+def format_rule(rule, params=None):
+    """用参数填充规则模板，如 ('RSI{window}', '>', '{level}') -> ('RSI14', '>', 70.0)"""
+    left, op, right = rule
+    if op not in OPERATORS:
+        raise ValueError(f"不支持的条件运算符: {op}")
+    params = params or {}
+    return _operand(left, params), op, _operand(right, params)
+
+
+def rule_columns(rules):
+    """规则中引用的指标列（不含数字与基础行情列）"""
+    return [value for left, _, right in rules for value in (left, right)
+            if isinstance(value, str) and value not in INPUT_COLUMNS]
+
+
+def _values(operand, values):
+    if isinstance(operand, str):
+        return values[operand]
+    return operand
+
+
+def _condition(rule, values):
+    left, op, right = rule
+    a, b = _values(left, values), _values(right, values)
+    if op == '>':
+        return a > b
+    if op == '<':
+        return a < b
+    above = a > b if op == 'cross_above' else a < b
+    crossed = np.zeros(len(above), dtype=bool)
+    crossed[1:] = above[1:] & ~above[:-1]
+    return crossed
+
+
+def signals(rules, values):
+    """所有条件同时成立的K线（布尔数组），缺失值参与比较时视为不成立"""
+    with np.errstate(invalid='ignore'):
+        result = np.ones(len(values['Close']), dtype=bool)
+        for rule in rules:
+            result &= _condition(rule, values)
+    return result
+
+
+def positions(entry, exit):
+    """由买入/卖出信号得到每根K线收盘后的持仓（1 为持有、0 为空仓），只做多
+
+    entry、exit 为 (n,) 或 (n, k) 的布尔数组，k 组参数同时计算；同一根K线同时出现两种信号时卖出优先。
+    实现为“最近一次信号”的前向填充：记录每根K线之前最后一个信号的位置，再取该信号的方向。
+    """
+    state = np.where(exit, 0, np.where(entry, 1, -1)).astype(np.int8)
+    has_signal = state >= 0
+    index = np.where(has_signal, np.arange(len(state)).reshape((-1,) + (1,) * (state.ndim - 1)), 0)
+    np.maximum.accumulate(index, axis=0, out=index)
+    filled = np.take_along_axis(state, index, axis=0)
+    seen = np.logical_or.accumulate(has_signal, axis=0)
+    return np.where(seen, filled, 0).clip(min=0)
+
+
+def _periods_per_year(index):
+    if len(index) > 1 and isinstance(index, pd.DatetimeIndex):
+        years = (index[-1] - index[0]).total_seconds() / (365.25 * 24 * 3600)
+        if years > 0:
+            return (len(index) - 1) / years
+    return DEFAULT_PERIODS_PER_YEAR
+
+
+def simulate(close, entry, exit, cost=0.0):
+    """向量化模拟：在信号K线的收盘价成交，持仓获得下一根K线的涨跌
+
+    close 为 (n,)，entry/exit 为 (n,) 或 (n, k)。cost 为单边交易成本（比例）。
+    返回 (持仓, 每根K线的策略收益, 净值, 回撤)，形状与信号相同。
+    """
+    close = np.asarray(close, dtype=np.float64)
+    pos = positions(entry, exit)
+    shape = (-1,) + (1,) * (pos.ndim - 1)
+    asset_returns = np.zeros(len(close))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        asset_returns[1:] = close[1:] / close[:-1] - 1
+    asset_returns = np.nan_to_num(asset_returns).reshape(shape)
+
+    returns = np.zeros(pos.shape)
+    returns[1:] = pos[:-1] * asset_returns[1:]
+    turnover = np.abs(np.diff(pos, axis=0, prepend=0))
+    returns -= turnover * cost
+
+    equity = np.cumprod(1 + returns, axis=0)
+    drawdown = equity / np.maximum.accumulate(equity, axis=0) - 1
+    return pos, returns, equity, drawdown
+
+
+def trade_bounds(pos):
+    """返回每笔交易的 (参数列, 买入K线, 卖出K线)，结束时仍持仓的交易按最后一根K线平仓"""
+    pos = pos.reshape(len(pos), -1)
+    padded = np.vstack([np.zeros((1, pos.shape[1]), dtype=pos.dtype), pos,
+                        np.zeros((1, pos.shape[1]), dtype=pos.dtype)])
+    change = np.diff(padded, axis=0)
+    # 按列优先排序，使同一列的买卖点一一对应
+    entry_col, entry_row = np.nonzero(change.T > 0)
+    _, exit_row = np.nonzero(change.T < 0)
+    return entry_col, entry_row, np.minimum(exit_row, len(pos) - 1)
+
+
+def _stats(close, index, pos, returns, equity, drawdown, cost):
+    """按参数列汇总统计，所有列一起计算"""
+    k = pos.shape[1]
+    periods = _periods_per_year(index)
+    cols, entries, exits = trade_bounds(pos)
+    trade_returns = close[exits] / close[entries] * (1 - cost) ** 2 - 1
+    trades = np.bincount(cols, minlength=k)
+    wins = np.bincount(cols, weights=trade_returns > 0, minlength=k)
+    mean = returns.mean(axis=0)
+    std = returns.std(axis=0)
+    total = equity[-1] - 1
+    years = len(returns) / periods
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return pd.DataFrame({
+            'total_return': total,
+            'annual_return': (1 + total) ** (1 / years) - 1 if years > 0 else np.nan,
+            'max_drawdown': drawdown.min(axis=0),
+            'sharpe': np.where(std > 0, mean / std * np.sqrt(periods), np.nan),
+            'trades': trades,
+            'win_rate': np.where(trades > 0, wins / np.maximum(trades, 1), np.nan),
+            'exposure': pos.mean(axis=0),
+        })
+
+
+def _prepare(data, rule_sets):
+    """一次计算所有规则用到的指标（公共中间结果只算一次）"""
+    columns = list(dict.fromkeys(col for rules in rule_sets for col in rule_columns(rules)))
+    values = evaluate(data, columns)
+    for col in INPUT_COLUMNS:
+        if col in data.columns and col not in values:
+            values[col] = data[col].to_numpy(dtype=np.float64)
+    return values
+
+
+def backtest(data, entry_rules, exit_rules, cost=0.0):
+    """按买入/卖出规则回测单组参数
+
+    规则为 (左项, 运算符, 右项) 的列表，所有条件同时成立时触发，如
+    entry_rules=[('MACD', 'cross_above', 'MACD_SIGNAL')]，exit_rules=[('RSI', '>', 70)]。
+    左右项可以是任意已注册的指标列、行情列或数字。
+    返回 {'equity', 'drawdown', 'position'（Series）, 'trades'（DataFrame）, 'stats'（dict）}。
+    """
+    entry_rules = [format_rule(rule) for rule in entry_rules]
+    exit_rules = [format_rule(rule) for rule in exit_rules]
+    values = _prepare(data, [entry_rules, exit_rules])
+    close = values['Close']
+    pos, returns, equity, drawdown = simulate(
+        close, signals(entry_rules, values), signals(exit_rules, values), cost)
+
+    _, entries, exits = trade_bounds(pos)
+    open_trade = pos[-1] == 1 if len(pos) else False
+    trades = pd.DataFrame({
+        'entry_date': data.index[entries],
+        'entry_price': close[entries],
+        'exit_date': data.index[exits],
+        'exit_price': close[exits],
+        'return': close[exits] / close[entries] * (1 - cost) ** 2 - 1,
+        'bars': exits - entries,
+    })
+    trades['open'] = False
+    if open_trade and len(trades):
+        trades.loc[trades.index[-1], 'open'] = True
+
+    stats = _stats(close, data.index, pos[:, None], returns[:, None], equity[:, None],
+                   drawdown[:, None], cost).iloc[0].to_dict()
+    return {
+        'equity': pd.Series(equity, index=data.index, name='equity'),
+        'drawdown': pd.Series(drawdown, index=data.index, name='drawdown'),
+        'position': pd.Series(pos, index=data.index, name='position'),
+        'trades': trades,
+        'stats': stats,
+    }
+
+
+def sweep(data, entry_rules, exit_rules, grid, cost=0.0, sort_by='total_return'):
+    """参数扫描：规则可含 {参数} 占位符，grid 为 {参数名: 取值列表}，对所有组合一次向量化回测
+
+    例如 exit_rules=[('RSI{window}', '>', '{level}')]，grid={'window': [6, 14], 'level': [65, 70, 75]}。
+    不同组合用到的指标只各算一次，所有组合的信号堆叠为 (n, 组合数) 的矩阵一起模拟。
+    返回每个组合一行的统计表，按 sort_by 降序排列。
+    """
+    names = list(grid)
+    combos = [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+    entry_sets = [[format_rule(rule, params) for rule in entry_rules] for params in combos]
+    exit_sets = [[format_rule(rule, params) for rule in exit_rules] for params in combos]
+    values = _prepare(data, entry_sets + exit_sets)
+
+    # 相同的规则组合只算一次信号
+    cache = {}
+
+    def stacked(rule_sets):
+        columns = []
+        for rules in rule_sets:
+            key = tuple(rules)
+            if key not in cache:
+                cache[key] = signals(rules, values)
+            columns.append(cache[key])
+        return np.column_stack(columns)
+
+    close = values['Close']
+    pos, returns, equity, drawdown = simulate(close, stacked(entry_sets), stacked(exit_sets), cost)
+    stats = _stats(close, data.index, pos, returns, equity, drawdown, cost)
+    params = pd.DataFrame(combos, columns=names)
+    return pd.concat([params, stats], axis=1).sort_values(sort_by, ascending=False, ignore_index=True)
@@ -0,0 +1,297 @@
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from utils.circuit_breaker import get_breaker
+
+
+class TTLCache:
+    """进程内共享的带过期时间的缓存，所有 Streamlit 会话共用，并统计命中/未命中次数
+
+    条目过期后仍会保留 stale_ttl 秒，供 stale_while_revalidate 在上游故障时返回旧值。
+    """
+
+    def __init__(self, ttl=60, maxsize=2048, stale_ttl=0):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def _lookup(self, key):
+        """返回 (状态, 值)，状态为 'fresh'、'stale' 或 None；调用方需持有锁"""
+        entry = self._data.get(key)
+        if entry is None:
+            return None, None
+        expires_at, stale_until, value = entry
+        now = time.monotonic()
+        if expires_at > now:
+            return 'fresh', value
+        if stale_until > now:
+            return 'stale', value
+        del self._data[key]
+        return None, None
+
+    def get(self, key):
+        """返回 (是否命中, 值)，只有未过期的条目算命中"""
+        with self._lock:
+            state, value = self._lookup(key)
+            if state == 'fresh':
+                self._data.move_to_end(key)
+                self.hits += 1
+                return True, value
+            self.misses += 1
+            return False, None
+
+    def get_stale(self, key):
+        """返回 (状态, 值)，过期但仍在保留期内的条目状态为 'stale'"""
+        with self._lock:
+            state, value = self._lookup(key)
+            if state == 'fresh':
+                self._data.move_to_end(key)
+                self.hits += 1
+            elif state == 'stale':
+                self.stale_hits += 1
+            else:
+                self.misses += 1
+            return state, value
+
+    def peek(self, key):
+        """查看条目状态，不计入统计"""
+        with self._lock:
+            return self._lookup(key)
+
+    def expires_in(self, key):
+        """条目距离过期还剩的秒数，不存在时返回 None，已过期时为负数"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            return entry[0] - time.monotonic()
+
+    def set(self, key, value, ttl=None, stale_ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        stale_until = expires_at + (self.stale_ttl if stale_ttl is None else stale_ttl)
+        with self._lock:
+            self._data[key] = (expires_at, stale_until, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """返回命中、过期命中、未命中次数与当前条目数"""
+        with self._lock:
+            total = self.hits + self.stale_hits + self.misses
+            return {
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.stale_hits) / total if total else 0.0,
+                'size': len(self._data),
+            }
+
+
+# 行情数据共用的缓存（默认60秒，过期后保留1天供上游故障时使用）
+quote_cache = TTLCache(ttl=60, stale_ttl=24 * 3600)
+
+
+def cached(cache, ttl=None, prefix=None, should_cache=lambda value: value is not None):
+    """函数结果缓存装饰器
+
+    缓存键由 prefix（默认为模块名+函数名）和参数组成。页面脚本每次重跑都会重新定义函数，
+    且多个页面的模块名都是 __main__，因此页面中使用时应显式传入 prefix。
+    should_cache 返回 False 的结果（默认 None，即获取失败）不写入缓存。
+    ttl 可以是以相同参数调用、返回秒数的函数，用于按品种设置过期时间。
+    """
+    def decorator(func):
+        name = prefix or f"{func.__module__}.{func.__qualname__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items())))
+            hit, value = cache.get(key)
+            if hit:
+                return value
+            value = func(*args, **kwargs)
+            if should_cache(value):
+                cache.set(key, value, ttl(*args, **kwargs) if callable(ttl) else ttl)
+            return value
+        return wrapper
+    return decorator
+
+
+class _Call:
+    """一次正在进行中的请求"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """合并相同键的并发请求：第一个调用者负责请求，其余调用者等待并共享其结果"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.coalesced = 0
+
+    def do(self, key, func, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+
+# 上游请求共用的合并器
+upstream_flight = SingleFlight()
+
+
+def single_flight(prefix=None, flight=upstream_flight):
+    """请求合并装饰器，缓存键规则与 cached 相同；页面中使用时应显式传入 prefix"""
+    def decorator(func):
+        name = prefix or f"{func.__module__}.{func.__qualname__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items())))
+            return flight.do(key, func, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# 后台刷新过期缓存的线程池，以及正在刷新的键（避免重复提交）
+_refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='cache-refresh')
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def refresh_in_background(key, func, *args, gate=None, **kwargs):
+    """在后台线程执行刷新，同一键同时只提交一次；返回是否已提交
+
+    gate 为可选的放行检查（如熔断器的 allow），只在确实要提交时调用，
+    以免该键已在刷新时白白占用半开熔断器唯一的探测机会。
+    """
+    with _refreshing_lock:
+        if key in _refreshing:
+            return False
+        if gate is not None and not gate():
+            return False
+        _refreshing.add(key)
+
+    def run():
+        try:
+            func(*args, **kwargs)
+        except Exception:
+            pass
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(key)
+
+    _refresh_executor.submit(run)
+    return True
+
+
+def stale_while_revalidate(cache, upstream, ttl=None, prefix=None,
+                           should_cache=lambda value: value is not None):
+    """过期数据先返回、后台刷新的缓存装饰器，配合上游熔断器使用
+
+    - 未过期：直接返回缓存
+    - 已过期但在保留期内：立即返回旧值，并在后台线程刷新（同一键只刷新一次）
+    - 无缓存：同步请求；上游已熔断时直接返回 None
+    抛出异常（请求或传输错误）计为上游失败，正常返回即计为成功（半开时恢复熔断器）；
+    结果不满足 should_cache（如单个品种没有数据）只是不写入缓存。
+    upstream 为 None 时不经熔断器，用于自身已处理熔断的函数（如 utils.history.get_history），
+    以免半开时的唯一一次探测被外层占用。
+    被装饰函数会在后台线程中执行，不能依赖 st.session_state 等会话状态。
+    可通过 wrapper.is_stale(*args, **kwargs) 判断当前缓存值是否为过期数据，
+    wrapper.expires_in(...) 查看剩余有效时间，wrapper.refresh(...) 跳过缓存立即刷新（供预取使用）。
+    """
+    def decorator(func):
+        name = prefix or f"{func.__module__}.{func.__qualname__}"
+        breaker = get_breaker(upstream) if upstream is not None else None
+        signature = inspect.signature(func)
+
+        def make_key(args, kwargs):
+            # 按签名绑定参数并补全默认值，f(x, '1y') 与 f(x, period='1y') 得到同一个键
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return (name, bound.args, tuple(sorted(bound.kwargs.items())))
+
+        def allow():
+            return breaker is None or breaker.allow()
+
+        def fetch(key, args, kwargs):
+            try:
+                value = func(*args, **kwargs)
+            except Exception:
+                if breaker is not None:
+                    breaker.record_failure()
+                raise
+            if breaker is not None:
+                breaker.record_success()
+            if should_cache(value):
+                cache.set(key, value, ttl(*args, **kwargs) if callable(ttl) else ttl)
+            return value
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_key(args, kwargs)
+            state, value = cache.get_stale(key)
+            if state == 'fresh':
+                return value
+            if state == 'stale':
+                refresh_in_background(key, upstream_flight.do, key, fetch, key, args, kwargs, gate=allow)
+                return value
+            if not allow():
+                return None
+            return upstream_flight.do(key, fetch, key, args, kwargs)
+
+        def is_stale(*args, **kwargs):
+            return cache.peek(make_key(args, kwargs))[0] == 'stale'
+
+        def expires_in(*args, **kwargs):
+            return cache.expires_in(make_key(args, kwargs))
+
+        def refresh(*args, **kwargs):
+            if not allow():
+                return None
+            key = make_key(args, kwargs)
+            return upstream_flight.do(key, fetch, key, args, kwargs)
+
+        wrapper.is_stale = is_stale
+        wrapper.expires_in = expires_in
+        wrapper.refresh = refresh
+        return wrapper
+    return decorator
@@ -0,0 +1,63 @@
+import threading
+import time
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """上游熔断器：连续失败达到阈值后熔断，冷却期内不再请求该上游
+
+    冷却期结束后放行一个探测请求（半开），成功则恢复，失败则重新熔断。
+    """
+
+    def __init__(self, name, failure_threshold=5, recovery_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """当前是否允许向上游发送请求"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                # 冷却结束，只放行一个探测请求
+                self.state = HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(upstream):
+    """获取上游（yfinance、binance、google_news 等）对应的熔断器"""
+    with _breakers_lock:
+        if upstream not in _breakers:
+            _breakers[upstream] = CircuitBreaker(upstream)
+        return _breakers[upstream]
+
+
+def breaker_states():
+    """返回各上游熔断器的状态"""
+    with _breakers_lock:
+        return {name: breaker.state for name, breaker in _breakers.items()}
@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+import yfinance as yf
+
+from utils.cache import TTLCache, stale_while_revalidate
+from utils.market_calendar import ttl_seconds
+
+# 公司信息与财务报表变化很慢，过期后保留一周供 yfinance 故障时使用
+company_cache = TTLCache(ttl=24 * 3600, maxsize=512, stale_ttl=7 * 24 * 3600)
+
+
+@stale_while_revalidate(company_cache, 'yfinance',
+                        ttl=lambda ticker: ttl_seconds(ticker, refresh=timedelta(hours=24)),
+                        prefix='company.fetch_company_info')
+def fetch_company_info(ticker):
+    """获取公司基本信息和三大财务报表，每个交易时段收盘后刷新一次，休市期间保持缓存
+
+    返回 (company_data, financials, balance_sheet, cash_flow)；获取失败时抛出异常。
+    """
+    stock = yf.Ticker(ticker)
+    info = stock.info
+
+    company_data = {
+        "公司名称": info.get('longName', '未知'),
+        "行业": info.get('industry', '未知'),
+        "板块": info.get('sector', '未知'),
+        "市值": f"{info.get('marketCap', 0) / 100000000:.2f}亿",
+        "市盈率(TTM)": f"{info.get('trailingPE', 0):.2f}",
+        "市净率": f"{info.get('priceToBook', 0):.2f}",
+        "52周最高": info.get('fiftyTwoWeekHigh', '未知'),
+        "52周最低": info.get('fiftyTwoWeekLow', '未知'),
+        "每股收益(TTM)": info.get('trailingEps', '未知'),
+        "股息率": f"{info.get('dividendYield', 0) * 100:.2f}%" if info.get('dividendYield') else '未知',
+        "公司简介": info.get('longBusinessSummary', '未知')
+    }
+
+    financials = stock.financials
+    balance_sheet = stock.balance_sheet
+    cash_flow = stock.cashflow
+
+    return company_data, financials, balance_sheet, cash_flow
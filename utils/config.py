@@ -8,6 +8,12 @@ def get_config_path():
     config_dir.mkdir(exist_ok=True)
     return config_dir / 'config.json'
 
+def get_data_dir():
+    """获取本地数据目录（可通过 FINANCIAL_DATA_DIR 环境变量覆盖）"""
+    data_dir = Path(os.getenv('FINANCIAL_DATA_DIR', Path.home() / '.financial_chatbot' / 'data'))
+    data_dir.mkdir(parents=True, exist_ok=True)
+    return data_dir
+
 def load_config():
     """加载配置"""
     config_path = get_config_path()
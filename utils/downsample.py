@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+# 每条曲线的默认最大点数，约为图表的像素宽度；再多的点在屏幕上也无法分辨
+MAX_POINTS = 1200
+
+
+def lttb_indices(x, y, threshold):
+    """Largest-Triangle-Three-Buckets：从 (x, y) 中选出 threshold 个最能保持曲线形状的点，返回其下标
+
+    首尾两点固定保留，中间的点均分为 threshold-2 个桶，每个桶选出与上一个已选点、
+    下一个桶均值点构成三角形面积最大的点。桶均值一次算出，逐桶的选择在桶内向量化。
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    every = (n - 2) / (threshold - 2)
+    # 第 i 个桶为 [bounds[i], bounds[i+1])，bounds[-1] == n-1
+    bounds = np.floor(np.arange(threshold - 1) * every).astype(np.int64) + 1
+    counts = np.diff(bounds)
+    next_x = np.append(np.add.reduceat(x[:n - 1], bounds[:-1])[1:] / counts[1:], x[-1])
+    next_y = np.append(np.add.reduceat(y[:n - 1], bounds[:-1])[1:] / counts[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = bounds[i], bounds[i + 1]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - next_x[i]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (next_y[i] - ay))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def lttb(series, max_points=MAX_POINTS):
+    """把折线 Series 降采样到不超过 max_points 个点（缺失值先去除），点数不超过上限时原样返回"""
+    series = series.dropna()
+    if len(series) <= max_points:
+        return series
+    index = series.index
+    if isinstance(index, pd.DatetimeIndex):
+        x = (index.asi8 - index.asi8[0]) / 1e9
+    else:
+        x = np.arange(len(series), dtype=np.float64)
+    return series.iloc[lttb_indices(x, series.to_numpy(dtype=np.float64), max_points)]
+
+
+def buckets(n, max_points=MAX_POINTS):
+    """把 n 根K线按相邻的固定根数分组使组数不超过 max_points，返回各组首根与末根的下标"""
+    size = max(1, -(-n // max_points))
+    starts = np.arange(0, n, size)
+    return starts, np.append(starts[1:], n) - 1
+
+
+def downsample_ohlc(data, max_points=MAX_POINTS):
+    """把K线按相邻的固定根数合并，使K线数不超过 max_points（开盘取首根、最高/最低取极值、收盘取末根、成交量求和）
+
+    与按自然周期重采样不同，这里只为显示服务：合并的根数由点数上限决定，标记为每组首根K线的时间。
+    """
+    n = len(data)
+    if n <= max_points:
+        return data
+    starts, ends = buckets(n, max_points)
+    columns = {}
+    if 'Open' in data.columns:
+        columns['Open'] = data['Open'].to_numpy()[starts]
+    if 'High' in data.columns:
+        columns['High'] = np.fmax.reduceat(data['High'].to_numpy(dtype=np.float64), starts)
+    if 'Low' in data.columns:
+        columns['Low'] = np.fmin.reduceat(data['Low'].to_numpy(dtype=np.float64), starts)
+    if 'Close' in data.columns:
+        columns['Close'] = data['Close'].to_numpy()[ends]
+    if 'Volume' in data.columns:
+        columns['Volume'] = np.add.reduceat(np.nan_to_num(data['Volume'].to_numpy(dtype=np.float64)), starts)
+    return pd.DataFrame(columns, index=data.index[starts])
+
+
+def downsample_last(data, max_points=MAX_POINTS):
+    """与 downsample_ohlc 相同的分组，取每组末根K线的值（如指标），标记为每组首根K线的时间"""
+    n = len(data)
+    if n <= max_points:
+        return data
+    starts, ends = buckets(n, max_points)
+    return pd.DataFrame(data.to_numpy()[ends], index=data.index[starts], columns=data.columns)
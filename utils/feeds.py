@@ -0,0 +1,9 @@
+import feedparser
+
+from utils.cache import single_flight
+
+
+@single_flight(prefix='feeds.parse_feed')
+def parse_feed(rss_url):
+    """解析 RSS feed，同一地址的并发请求只发出一次"""
+    return feedparser.parse(rss_url)
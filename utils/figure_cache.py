@@ -0,0 +1,62 @@
+import json
+import threading
+from collections import OrderedDict
+
+from utils.history import frame_cache_key
+
+# 缓存的图表 JSON 总大小上限（字节），超出后淘汰最久未使用的
+MAX_FIGURE_BYTES = 64 * 1024 * 1024
+
+_figures = OrderedDict()
+_lock = threading.Lock()
+_size = 0
+hits = 0
+misses = 0
+
+
+def figure_key(chart, data, lang, *params):
+    """图表缓存键：图表类型、数据指纹（无指纹时按内容求哈希，见 frame_cache_key）、界面语言与其他影响图表的参数
+
+    切片后的数据沿用原数据的指纹，显示区间等需作为 params 传入。
+    """
+    return (chart, frame_cache_key(data), lang) + params
+
+
+def cached_figure(key, build):
+    """返回 key 对应图表序列化后的 dict，可直接传给 st.plotly_chart
+
+    未命中时才调用 build() 生成 Figure 并序列化为 JSON 缓存；所有会话共用，
+    重复查看同一数据或切换回之前的语言时跳过降采样、构建 Figure 与数组序列化。
+    """
+    global _size, hits, misses
+    with _lock:
+        spec = _figures.get(key)
+        if spec is not None:
+            _figures.move_to_end(key)
+            hits += 1
+    if spec is None:
+        spec = build().to_json()
+        with _lock:
+            misses += 1
+            previous = _figures.pop(key, None)
+            if previous is not None:
+                _size -= len(previous)
+            _figures[key] = spec
+            _size += len(spec)
+            while _size > MAX_FIGURE_BYTES and len(_figures) > 1:
+                _size -= len(_figures.popitem(last=False)[1])
+    return json.loads(spec)
+
+
+def figure_cache_stats():
+    """缓存的图表数、总字节数与命中/未命中次数"""
+    with _lock:
+        return {'figures': len(_figures), 'bytes': _size, 'hits': hits, 'misses': misses}
+
+
+def clear_figure_cache():
+    """清空缓存的图表"""
+    global _size
+    with _lock:
+        _figures.clear()
+        _size = 0
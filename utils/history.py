@@ -0,0 +1,235 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from utils.cache import upstream_flight
+from utils.circuit_breaker import get_breaker
+from utils.history_store import (OHLCV_COLUMNS, load_bars, load_meta, load_meta_many, period_start, sync_history,
+                                 slice_period)
+from utils.market_calendar import freshness_deadline
+from utils.resample import resample_bars
+
+# 按覆盖范围从小到大排列的 period（ytd 不超过 1y）
+PERIOD_ORDER = ['1d', '5d', '1mo', '3mo', '6mo', 'ytd', '1y', '2y', '5y', '10y', 'max']
+
+# 每只股票至少获取的范围，页面上 1d~1y 之间的切换都只需切片
+SUPERSET_PERIOD = '1y'
+
+# 内存中最多保留的股票数量，超出后淘汰最久未使用的
+MAX_TICKERS = 256
+
+# 本地存储的原始K线周期，以及可由其合并得到的周期
+BASE_TIMEFRAME = '1d'
+HISTORY_TIMEFRAMES = ['1d', '1wk', '1mo', '3mo']
+
+# 合并后的K线缓存条目上限
+MAX_RESAMPLED = 512
+
+# 批量同步时的并发数，避免对 yfinance 请求过猛
+SYNC_WORKERS = 4
+
+_frames = OrderedDict()
+_resampled = OrderedDict()
+_lock = threading.Lock()
+
+
+def _fingerprinted(data, ticker, period):
+    """返回附加了指纹的数据（浅拷贝，不修改内存中共享的原始数据）
+
+    指纹由股票、period、行数、首尾时间戳、首根收盘价和最后一根K线组成：新K线改变行数与末尾，
+    盘中更新改变最后一根，复权调整改变首根收盘价。下游缓存用它作为键，无需对整个 DataFrame 求哈希。
+    """
+    if data is None or data.empty:
+        return data
+    data = data.copy(deep=False)
+    last = data.iloc[-1]
+    data.attrs['fingerprint'] = (
+        ticker, period, len(data), data.index[0].isoformat(), data.index[-1].isoformat(),
+        float(data['Close'].iloc[0]), tuple(float(last[col]) for col in OHLCV_COLUMNS),
+    )
+    return data
+
+
+def fingerprint(data):
+    """返回 get_history 附加的指纹，其他来源的数据返回 None"""
+    if data is None:
+        return None
+    return data.attrs.get('fingerprint')
+
+
+def frame_cache_key(data):
+    """DataFrame 参数的缓存键：有指纹时直接使用，否则按内容求哈希
+
+    可作为 st.cache_data(hash_funcs={pd.DataFrame: frame_cache_key}) 使用。
+    """
+    key = fingerprint(data)
+    if key is not None:
+        return key
+    return (tuple(data.columns), len(data), int(pd.util.hash_pandas_object(data).sum()))
+
+
+def _in_timeframe(data, ticker, period, timeframe):
+    """附加指纹并按需合并为指定周期；合并结果以日线数据的指纹为键缓存"""
+    data = _fingerprinted(data, ticker, period)
+    if timeframe == BASE_TIMEFRAME or data is None or data.empty:
+        return data
+    if timeframe not in HISTORY_TIMEFRAMES:
+        raise ValueError(f"不支持的时间周期: {timeframe}")
+    key = (fingerprint(data), timeframe)
+    with _lock:
+        bars = _resampled.get(key)
+        if bars is not None:
+            _resampled.move_to_end(key)
+            return bars
+    bars = _fingerprinted(resample_bars(data, timeframe), ticker, f'{period}/{timeframe}')
+    with _lock:
+        _resampled[key] = bars
+        while len(_resampled) > MAX_RESAMPLED:
+            _resampled.popitem(last=False)
+    return bars
+
+
+def _remember(ticker, period, data, valid_until):
+    """把同步得到的数据放入内存（标记为最近使用），超出 MAX_TICKERS 时淘汰最久未使用的"""
+    with _lock:
+        _frames[ticker] = {'period': period, 'data': data, 'valid_until': valid_until}
+        _frames.move_to_end(ticker)
+        while len(_frames) > MAX_TICKERS:
+            _frames.popitem(last=False)
+
+
+def _sync(breaker, ticker, period, max_age=None):
+    """已获 yfinance 熔断器放行后同步本地历史（同一股票、同一范围的并发同步只执行一次）
+
+    抛出异常（请求或传输错误）计为失败，正常返回计为成功；没有数据属于正常的未命中。
+    """
+    try:
+        data = upstream_flight.do(('history', ticker, period), sync_history, ticker, period, max_age)
+    except Exception:
+        breaker.record_failure()
+        raise
+    breaker.record_success()
+    return data
+
+
+def _stored(ticker, period):
+    """只读本地存储的K线（熔断期间使用），没有数据时返回 None"""
+    meta = load_meta(ticker)
+    if meta is None:
+        return None
+    return slice_period(load_bars(ticker, meta['tz']), period)
+
+
+def widest_period(*periods):
+    """返回覆盖范围最大的 period"""
+    return max(periods, key=PERIOD_ORDER.index)
+
+
+def get_history(ticker, period="1mo", max_age=None, timeframe=BASE_TIMEFRAME):
+    """获取历史K线：每只股票只获取一次所需的最宽范围，更窄的 period 直接从内存切片
+
+    timeframe 为周线/月线等时由日线在本地合并（见 utils.resample），不额外请求上游。
+    内存未命中或已过交易日历给出的有效期时从本地存储同步（见 utils.history_store）；
+    yfinance 熔断期间不请求上游，直接使用本地已存储的数据（不放入内存，恢复后重新同步）。
+    返回的数据带有指纹（见 fingerprint），可作为下游缓存的键。
+    """
+    now = datetime.now(timezone.utc)
+    with _lock:
+        entry = _frames.get(ticker)
+        if entry is not None:
+            _frames.move_to_end(ticker)
+
+    if (entry is not None
+            and PERIOD_ORDER.index(entry['period']) >= PERIOD_ORDER.index(period)
+            and now < entry['valid_until']):
+        return _in_timeframe(slice_period(entry['data'], period), ticker, period, timeframe)
+
+    superset = widest_period(period, SUPERSET_PERIOD, *([entry['period']] if entry else []))
+    breaker = get_breaker('yfinance')
+    if not breaker.allow():
+        return _in_timeframe(slice_period(_stored(ticker, superset), period), ticker, period, timeframe)
+    data = _sync(breaker, ticker, superset, max_age)
+    if data is not None and not data.empty:
+        _remember(ticker, superset, data,
+                  now + max_age if max_age is not None else freshness_deadline(ticker, now))
+    return _in_timeframe(slice_period(data, period), ticker, period, timeframe)
+
+
+def clear_history_cache(ticker=None):
+    """清空内存中的历史数据（本地存储不受影响）"""
+    with _lock:
+        if ticker is None:
+            _frames.clear()
+            _resampled.clear()
+        else:
+            _frames.pop(ticker, None)
+            for key in [key for key in _resampled if key[0][0] == ticker]:
+                del _resampled[key]
+
+
+def prefetch_history(ticker, lead_seconds=60):
+    """在内存数据到期前 lead_seconds 秒内提前同步（供后台预取使用）；未加载的股票直接加载
+
+    yfinance 熔断期间跳过，不向上游发请求。
+    """
+    now = datetime.now(timezone.utc)
+    with _lock:
+        entry = _frames.get(ticker)
+    if entry is not None and (entry['valid_until'] - now).total_seconds() > lead_seconds:
+        return
+    breaker = get_breaker('yfinance')
+    if not breaker.allow():
+        return
+    period = entry['period'] if entry else SUPERSET_PERIOD
+    # max_age=0 强制本地存储做一次增量同步
+    data = _sync(breaker, ticker, period, timedelta(0))
+    if data is not None and not data.empty:
+        _remember(ticker, period, data, freshness_deadline(ticker, now))
+
+
+def stale_tickers(tickers, period):
+    """返回本地尚无数据、未覆盖 period 或已过交易日历有效期的股票（批量读取元信息）"""
+    metas = load_meta_many(tickers)
+    now = datetime.now(timezone.utc)
+    start = period_start(period)
+    stale = []
+    for ticker in tickers:
+        meta = metas.get(ticker)
+        if (meta is None
+                or (meta['start'] is not None and (start is None or meta['start'] > start))
+                or now >= freshness_deadline(ticker, meta['fetched_at'])):
+            stale.append(ticker)
+    return stale
+
+
+def sync_many(tickers, period=SUPERSET_PERIOD, on_progress=None):
+    """并发同步一批股票的本地历史（见 utils.history_store.sync_history），yfinance 熔断时停止
+
+    只有请求抛出异常才计入熔断器，个别代码没有数据不会影响其他用户。
+
+    on_progress(已完成数, 总数) 用于显示进度，返回成功同步的股票数。
+    """
+    tickers = list(tickers)
+    breaker = get_breaker('yfinance')
+    done = synced = 0
+
+    def sync(ticker):
+        if not breaker.allow():
+            return False
+        try:
+            data = _sync(breaker, ticker, period)
+        except Exception:
+            return False
+        # 退市或未知代码没有数据是正常的未命中，不计入熔断器，以免一批中的个别代码导致所有用户被熔断
+        return data is not None and not data.empty
+
+    with ThreadPoolExecutor(max_workers=SYNC_WORKERS, thread_name_prefix='history-sync') as executor:
+        for future in as_completed([executor.submit(sync, ticker) for ticker in tickers]):
+            done += 1
+            synced += future.result()
+            if on_progress is not None:
+                on_progress(done, len(tickers))
+    return synced
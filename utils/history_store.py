@@ -0,0 +1,291 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from utils.config import get_data_dir
+from utils.market_calendar import freshness_deadline
+
+# 本地存储的K线字段
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# 增量数据与本地重叠K线的收盘价差异超过该比例时，视为发生了除权调整，需要全量重新获取
+ADJUSTMENT_TOLERANCE = 1e-4
+
+_lock = threading.RLock()
+_initialized = False
+
+
+def get_db_path():
+    """获取历史数据库路径"""
+    return get_data_dir() / 'history.db'
+
+
+@contextmanager
+def _db():
+    """打开数据库连接，首次调用时建表；退出时提交并关闭"""
+    global _initialized
+    conn = sqlite3.connect(get_db_path(), timeout=30)
+    try:
+        if not _initialized:
+            with _lock:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS bars (
+                        ticker TEXT NOT NULL,
+                        ts INTEGER NOT NULL,
+                        open REAL, high REAL, low REAL, close REAL, volume REAL,
+                        PRIMARY KEY (ticker, ts)
+                    ) WITHOUT ROWID
+                """)
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS meta (
+                        ticker TEXT PRIMARY KEY,
+                        tz TEXT,
+                        start_ts INTEGER,
+                        fetched_at INTEGER NOT NULL
+                    )
+                """)
+                conn.commit()
+                _initialized = True
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def period_start(period, now=None):
+    """计算 yfinance period 对应的起始时间，max 返回 None；按交易日计的 period 由调用方按行数处理"""
+    now = now if now is not None else pd.Timestamp.now(tz='UTC')
+    if period == 'max':
+        return None
+    if period == 'ytd':
+        return now.normalize().replace(month=1, day=1)
+    if period.endswith('mo'):
+        return now - pd.DateOffset(months=int(period[:-2]))
+    if period.endswith('y'):
+        return now - pd.DateOffset(years=int(period[:-1]))
+    if period.endswith('d'):
+        return now - pd.Timedelta(days=int(period[:-1]))
+    raise ValueError(f"不支持的时间范围: {period}")
+
+
+def slice_period(data, period):
+    """从历史数据中截取指定 period 的部分"""
+    if data is None or data.empty or period == 'max':
+        return data
+    if period.endswith('d') and period != 'ytd':
+        # yfinance 的 1d/5d 按交易日计算
+        return data.iloc[-int(period[:-1]):]
+    return data[data.index >= period_start(period, pd.Timestamp.now(tz=data.index.tz))]
+
+
+def _meta(row):
+    tz, start_ts, fetched_at = row
+    return {
+        'tz': tz,
+        'start': pd.Timestamp(start_ts, unit='s', tz='UTC') if start_ts is not None else None,
+        'fetched_at': datetime.fromtimestamp(fetched_at, timezone.utc),
+    }
+
+
+def load_meta(ticker):
+    """读取股票的存储元信息，不存在时返回 None"""
+    with _db() as conn:
+        row = conn.execute(
+            'SELECT tz, start_ts, fetched_at FROM meta WHERE ticker = ?', (ticker,)
+        ).fetchone()
+    return _meta(row) if row is not None else None
+
+
+def load_bars(ticker, tz='UTC', start=None):
+    """从本地读取K线，start 为 None 时读取全部"""
+    query = 'SELECT ts, open, high, low, close, volume FROM bars WHERE ticker = ?'
+    params = [ticker]
+    if start is not None:
+        query += ' AND ts >= ?'
+        params.append(int(pd.Timestamp(start).timestamp()))
+    query += ' ORDER BY ts'
+    with _db() as conn:
+        rows = conn.execute(query, params).fetchall()
+    df = pd.DataFrame(rows, columns=['ts'] + OHLCV_COLUMNS)
+    index = pd.to_datetime(df.pop('ts'), unit='s', utc=True)
+    df.index = pd.DatetimeIndex(index).tz_convert(tz or 'UTC')
+    df.index.name = 'Date'
+    return df
+
+
+def stored_tickers():
+    """返回本地已存储K线的股票代码集合"""
+    with _db() as conn:
+        return {row[0] for row in conn.execute('SELECT ticker FROM meta')}
+
+
+def load_tails(tickers, rows):
+    """批量读取多只股票最近 rows 根K线（共用一个连接），供全市场批量计算使用
+
+    为避免逐只构造 DataFrame 的开销，返回 {ticker: (UTC 秒级时间戳数组, OHLCV 数组 (n, 5))}，
+    无数据的股票不在结果中。
+    """
+    query = f"""
+        SELECT ts, open, high, low, close, volume FROM (
+            SELECT * FROM bars WHERE ticker = ? ORDER BY ts DESC LIMIT {int(rows)}
+        ) ORDER BY ts
+    """
+    tails = {}
+    with _db() as conn:
+        for ticker in tickers:
+            records = conn.execute(query, (ticker,)).fetchall()
+            if records:
+                values = np.array(records, dtype=np.float64)
+                tails[ticker] = (values[:, 0].astype(np.int64), values[:, 1:])
+    return tails
+
+
+def load_meta_many(tickers):
+    """批量读取多只股票的存储元信息（共用一个连接），无记录的股票不在结果中"""
+    metas = {}
+    with _db() as conn:
+        for ticker in tickers:
+            row = conn.execute(
+                'SELECT tz, start_ts, fetched_at FROM meta WHERE ticker = ?', (ticker,)
+            ).fetchone()
+            if row is not None:
+                metas[ticker] = _meta(row)
+    return metas
+
+
+def load_closes(tickers, start=None):
+    """批量读取多只股票的收盘价（共用一个连接），start 为 None 时读取全部
+
+    返回 {ticker: (UTC 秒级时间戳数组, 收盘价数组)}，无数据的股票不在结果中。
+    """
+    query = 'SELECT ts, close FROM bars WHERE ticker = ? AND ts >= ? ORDER BY ts'
+    since = int(pd.Timestamp(start).timestamp()) if start is not None else -2 ** 62
+    closes = {}
+    with _db() as conn:
+        for ticker in tickers:
+            records = conn.execute(query, (ticker, since)).fetchall()
+            if records:
+                values = np.array(records, dtype=np.float64)
+                closes[ticker] = (values[:, 0].astype(np.int64), values[:, 1])
+    return closes
+
+
+def save_bars(ticker, data, start=None, replace=False):
+    """写入K线（按时间戳覆盖），replace 为 True 时先清空该股票已有数据
+
+    start 为本次全量获取覆盖的起始时间（max 为 None），仅在全量写入时更新。
+    """
+    timestamps = (data.index.tz_convert('UTC') if data.index.tz is not None
+                  else data.index.tz_localize('UTC'))
+    seconds = (timestamps - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)
+    rows = list(zip(
+        [ticker] * len(data),
+        seconds.tolist(),
+        *(data[col].astype(float).tolist() for col in OHLCV_COLUMNS)
+    ))
+    tz = str(data.index.tz) if data.index.tz is not None else 'UTC'
+    now = int(datetime.now().timestamp())
+    with _lock, _db() as conn:
+        if replace:
+            conn.execute('DELETE FROM bars WHERE ticker = ?', (ticker,))
+        conn.executemany('INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+        if replace:
+            conn.execute(
+                'INSERT OR REPLACE INTO meta VALUES (?, ?, ?, ?)',
+                (ticker, tz, int(start.timestamp()) if start is not None else None, now)
+            )
+        else:
+            conn.execute('UPDATE meta SET fetched_at = ? WHERE ticker = ?', (now, ticker))
+
+
+def touch(ticker):
+    """记录一次没有新K线的同步"""
+    with _lock, _db() as conn:
+        conn.execute('UPDATE meta SET fetched_at = ? WHERE ticker = ?',
+                     (int(datetime.now().timestamp()), ticker))
+
+
+def _covers(meta, stored_rows, period):
+    """判断本地数据是否已覆盖所需的 period"""
+    if meta is None:
+        return False
+    if meta['start'] is None:
+        return True
+    if period == 'max':
+        return False
+    if period.endswith('d') and period != 'ytd':
+        return stored_rows >= int(period[:-1])
+    return meta['start'] <= period_start(period)
+
+
+def _needs_full_refresh(stored, delta):
+    """检查增量数据与本地重叠K线是否一致，不一致说明历史价格已被复权调整
+
+    只比较本地最后一根之前的已完成K线：最后一根可能是盘中尚未收盘的K线，价格本就会变动，总是以新数据覆盖。
+    """
+    overlap = delta.index.intersection(stored.index[:-1])
+    if overlap.empty:
+        return False
+    old = stored.loc[overlap, 'Close']
+    new = delta.loc[overlap, 'Close']
+    return bool(((new - old).abs() > old.abs() * ADJUSTMENT_TOLERANCE).any())
+
+
+def _full_fetch(ticker, period=None, start=None):
+    """全量获取并写入本地；指定 start 时按起始日期获取（用于复权后按原覆盖范围重建）"""
+    stock = yf.Ticker(ticker)
+    if start is not None:
+        data = stock.history(start=start.strftime('%Y-%m-%d'))
+    else:
+        data = stock.history(period=period)
+        start = period_start(period)
+    if data is None or data.empty:
+        return data
+    data = data[OHLCV_COLUMNS]
+    if period is not None and period.endswith('d') and period != 'ytd':
+        start = data.index[0]
+    save_bars(ticker, data, start=start, replace=True)
+    return data
+
+
+def sync_history(ticker, period="1mo", max_age=None):
+    """获取股票历史K线：优先读取本地存储，只向 yfinance 请求最后一根K线之后的增量数据
+
+    本地数据不足以覆盖 period 时全量获取。max_age 为 None 时按交易日历判断本地数据是否过期
+    （交易中到下一个刷新点、休市时到下次开盘），否则距上次同步不超过 max_age 时直接使用本地数据。
+    """
+    meta = load_meta(ticker)
+    stored = load_bars(ticker, meta['tz']) if meta is not None else None
+
+    if stored is None or stored.empty or not _covers(meta, len(stored), period):
+        return slice_period(_full_fetch(ticker, period), period)
+
+    now = datetime.now(timezone.utc)
+    if max_age is None:
+        expired = now >= freshness_deadline(ticker, meta['fetched_at'])
+    else:
+        expired = now - meta['fetched_at'] > max_age
+    if expired:
+        # 从倒数第二根（已完成）K线开始请求：它用于检查复权，最后一根可能尚未收盘，直接刷新
+        anchor = stored.index[-2] if len(stored) > 1 else stored.index[-1]
+        delta = yf.Ticker(ticker).history(start=anchor.strftime('%Y-%m-%d'))
+        if delta is None or delta.empty:
+            touch(ticker)
+        else:
+            delta = delta[OHLCV_COLUMNS]
+            if _needs_full_refresh(stored, delta):
+                if meta['start'] is None:
+                    data = _full_fetch(ticker, 'max')
+                else:
+                    data = _full_fetch(ticker, start=meta['start'])
+                return slice_period(data, period)
+            save_bars(ticker, delta)
+            stored = pd.concat([stored[stored.index < delta.index[0]], delta])
+
+    return slice_period(stored, period)
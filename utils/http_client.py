@@ -0,0 +1,82 @@
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils.rate_limit import get_limiter, parse_retry_after
+
+# (连接超时, 读取超时)，单位秒
+DEFAULT_TIMEOUT = (3.05, 10)
+
+# 每个主机保持的连接数上限
+POOL_MAXSIZE = 16
+
+_session = None
+_lock = threading.Lock()
+
+
+class _TimeoutSession(requests.Session):
+    """未显式传入 timeout 的请求使用默认超时，避免上游挂起时阻塞脚本线程"""
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', DEFAULT_TIMEOUT)
+        return super().request(method, url, **kwargs)
+
+
+def _create_session():
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        raise_on_status=False,
+    )
+    # 按主机复用连接（keep-alive），免去每次请求的 TCP+TLS 握手
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+    session = _TimeoutSession()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'Accept-Encoding': 'gzip, deflate',
+        'Accept': 'application/json',
+    })
+    return session
+
+
+def get_session():
+    """获取进程内共享的 HTTP 会话"""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = _create_session()
+    return _session
+
+
+class RateLimitExceeded(requests.exceptions.RequestException):
+    """请求超出上游配额且排队等待时间过长"""
+
+
+def http_get(url, **kwargs):
+    """使用共享会话发送 GET 请求（连接池、gzip、超时与重试）
+
+    配置了限流的主机先按令牌桶排队；收到 429 时按 Retry-After 暂停该主机的所有请求，
+    等待时间在限流器允许范围内时自动重试一次。
+    """
+    limiter = get_limiter(urlsplit(url).hostname)
+    if limiter is None:
+        return get_session().get(url, **kwargs)
+
+    for attempt in range(2):
+        if not limiter.acquire():
+            raise RateLimitExceeded(f"请求过于频繁，已超出 {urlsplit(url).hostname} 的调用配额，请稍后重试")
+        response = get_session().get(url, **kwargs)
+        if response.status_code != 429:
+            return response
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        limiter.pause(retry_after)
+        if retry_after > limiter.max_wait:
+            break
+    return response
@@ -0,0 +1,290 @@
+import copy
+import math
+import threading
+from collections import OrderedDict, deque
+
+import numpy as np
+import pandas as pd
+
+from utils.history import fingerprint
+from utils.indicators import INDICATOR_COLUMNS, add_indicators, ema
+
+# 种子阶段需要逐根回放的K线数：最长窗口（MA60）加上计算涨跌所需的前一根
+REPLAY_BARS = 61
+
+# 内存中最多保留的指标流数量，超出后淘汰最久未使用的
+MAX_STREAMS = 256
+
+
+class _Window:
+    """固定长度滑动窗口，维护窗口和与缺失值个数
+
+    窗口和随进出增减；每滚动一整个窗口按当前值重新求和一次，避免长期累积舍入误差。
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.sum = 0.0
+        self.nans = 0
+        self._pushes = 0
+
+    def push(self, x):
+        if len(self.values) == self.size:
+            old = self.values[0]
+            if math.isnan(old):
+                self.nans -= 1
+            else:
+                self.sum -= old
+        self.values.append(x)
+        if math.isnan(x):
+            self.nans += 1
+        else:
+            self.sum += x
+        self._pushes += 1
+        if self._pushes >= self.size:
+            self.sum = math.fsum(v for v in self.values if not math.isnan(v))
+            self._pushes = 0
+
+    def full(self):
+        return len(self.values) == self.size and self.nans == 0
+
+    def clone(self):
+        other = copy.copy(self)
+        other.values = self.values.copy()
+        return other
+
+    def mean(self):
+        return self.sum / self.size if self.full() else math.nan
+
+    def std(self, mean):
+        """样本标准差（ddof=1），以给定均值为中心"""
+        if not self.full():
+            return math.nan
+        return math.sqrt(sum((v - mean) ** 2 for v in self.values) / (self.size - 1))
+
+
+class _Extreme:
+    """单调队列维护的滑动最小/最大值，窗口内有缺失值时为 NaN"""
+
+    def __init__(self, size, better):
+        self.size = size
+        self.better = better
+        self.queue = deque()
+        self.nan_at = deque()
+        self.count = 0
+
+    def push(self, x):
+        i = self.count
+        self.count += 1
+        if math.isnan(x):
+            self.nan_at.append(i)
+        else:
+            while self.queue and not self.better(self.queue[-1][1], x):
+                self.queue.pop()
+            self.queue.append((i, x))
+        first = i - self.size + 1
+        while self.queue and self.queue[0][0] < first:
+            self.queue.popleft()
+        while self.nan_at and self.nan_at[0] < first:
+            self.nan_at.popleft()
+
+    def clone(self):
+        other = copy.copy(self)
+        other.queue = self.queue.copy()
+        other.nan_at = self.nan_at.copy()
+        return other
+
+    def value(self):
+        if self.count < self.size or self.nan_at or not self.queue:
+            return math.nan
+        return self.queue[0][1]
+
+
+class IndicatorStream:
+    """逐根K线增量更新的技术指标，与 utils.indicators.compute_indicators 的结果一致
+
+    维护 EMA 的递推状态、各均线/RSI/KDJ 的滑动窗口和以及 KDJ 高低点的单调队列，
+    每根新K线的更新代价与历史长度无关。收盘价不能为缺失值。
+    """
+
+    def __init__(self):
+        self.ma = {window: _Window(window) for window in (5, 10, 20, 60)}
+        self.volume_ma = {window: _Window(window) for window in (5, 10)}
+        self.gain = _Window(14)
+        self.loss = _Window(14)
+        self.low_min = _Extreme(9, lambda kept, new: kept < new)
+        self.high_max = _Extreme(9, lambda kept, new: kept > new)
+        self.rsv = _Window(3)
+        self.k = _Window(3)
+        self.fast = self.slow = self.signal = None
+        self.prev_close = None
+        self.latest = None
+        self._before_last = None
+
+    @classmethod
+    def from_history(cls, data):
+        """用历史K线初始化：EMA 状态用向量化计算，最后 REPLAY_BARS 根逐根回放以填满各窗口"""
+        stream = cls()
+        n = len(data)
+        split = max(n - REPLAY_BARS, 0)
+        if split:
+            close = data['Close'].to_numpy(dtype=np.float64)[:split]
+            fast = ema(close, 12)
+            slow = ema(close, 26)
+            stream.fast, stream.slow = fast[-1], slow[-1]
+            stream.signal = ema(fast - slow, 9)[-1]
+            stream.prev_close = close[-1]
+        for row in data.iloc[split:][['High', 'Low', 'Close', 'Volume']].itertuples(index=False):
+            stream.update(*row)
+        return stream
+
+    def _snapshot(self):
+        """复制当前状态（各窗口长度固定，代价为常数）"""
+        state = {}
+        for name, value in self.__dict__.items():
+            if name == '_before_last':
+                continue
+            if isinstance(value, dict) and name != 'latest':
+                value = {key: window.clone() for key, window in value.items()}
+            elif isinstance(value, (_Window, _Extreme)):
+                value = value.clone()
+            state[name] = value
+        return state
+
+    def update(self, high, low, close, volume):
+        """追加一根新K线，返回该K线的指标 {列名: 值}"""
+        close = float(close)
+        if math.isnan(close):
+            raise ValueError("收盘价不能为缺失值")
+        self._before_last = self._snapshot()
+        high, low, volume = float(high), float(low), float(volume)
+
+        for window in self.ma.values():
+            window.push(close)
+        for window in self.volume_ma.values():
+            window.push(volume)
+
+        # MACD
+        if self.fast is None:
+            self.fast = self.slow = close
+        else:
+            self.fast += (close - self.fast) * (2 / 13)
+            self.slow += (close - self.slow) * (2 / 27)
+        macd = self.fast - self.slow
+        self.signal = macd if self.signal is None else self.signal + (macd - self.signal) * (2 / 10)
+
+        # RSI（首根K线的涨跌计为0）
+        delta = 0.0 if self.prev_close is None else close - self.prev_close
+        self.prev_close = close
+        self.gain.push(delta if delta > 0 else 0.0)
+        self.loss.push(-delta if delta < 0 else 0.0)
+        gain, loss = self.gain.mean(), self.loss.mean()
+        if loss == 0:
+            rsi = math.nan if gain == 0 else 100.0
+        else:
+            rsi = 100 - 100 / (1 + gain / loss)
+
+        # KDJ
+        self.low_min.push(low)
+        self.high_max.push(high)
+        low_min, high_max = self.low_min.value(), self.high_max.value()
+        spread = high_max - low_min
+        self.rsv.push((close - low_min) / spread * 100 if spread != 0 else math.nan)
+        k = self.rsv.mean()
+        self.k.push(k)
+        d = self.k.mean()
+
+        # 布林带
+        middle = self.ma[20].mean()
+        std = self.ma[20].std(middle)
+
+        self.latest = dict(zip(INDICATOR_COLUMNS, (
+            self.ma[5].mean(), self.ma[10].mean(), middle, self.ma[60].mean(),
+            macd, self.signal, macd - self.signal,
+            rsi,
+            k, d, 3 * k - 2 * d,
+            middle, middle + 2 * std, middle - 2 * std,
+            self.volume_ma[5].mean(), self.volume_ma[10].mean(),
+        )))
+        return self.latest
+
+    def revise(self, high, low, close, volume):
+        """用新数据替换最后一根K线（盘中未收盘的K线不断变化），返回其指标"""
+        if self._before_last is None:
+            raise ValueError("没有可替换的K线")
+        self.__dict__.update(self._before_last)
+        return self.update(high, low, close, volume)
+
+
+_streams = OrderedDict()
+_lock = threading.Lock()
+
+
+def _same_bars(a, b):
+    return (a.index.equals(b.index)
+            and np.array_equal(a['Close'].to_numpy(), b['Close'].to_numpy(), equal_nan=True))
+
+
+def _extends(previous, data):
+    """data 是否以 previous 的前 len(previous)-1 根K线为前缀
+
+    两者都带有 utils.history 的指纹时只比较首根K线与衔接处的时间戳（复权调整会改变首根收盘价），
+    否则逐根比较。
+    """
+    keep = len(previous) - 1
+    if keep < 0 or len(data) < len(previous):
+        return False
+    old, new = fingerprint(previous), fingerprint(data)
+    if old is not None and new is not None:
+        return (old[:2] == new[:2] and old[3] == new[3] and old[5] == new[5]
+                and (keep == 0 or data.index[keep - 1] == previous.index[keep - 1]))
+    return _same_bars(previous.iloc[:keep], data.iloc[:keep])
+
+
+def update_indicators(key, data, columns=INDICATOR_COLUMNS):
+    """返回附加了指定技术指标的 DataFrame，同一 key 的新数据只对新增/变化的K线做增量计算
+
+    新数据以上次数据（除最后一根外）为前缀时，只回放之后的K线（最后一根可能是盘中更新）；
+    否则（首次、起点变化、历史被复权调整等）全量计算并重新初始化指标流。
+    columns 含内置指标以外的列（如 MA120）时不支持增量，每次全量计算所需的部分。
+    返回的 DataFrame 在会话间共享，调用方不应修改。
+    """
+    columns = list(columns)
+    streamable = set(columns) <= set(INDICATOR_COLUMNS)
+    key = (key, tuple(columns))
+    with _lock:
+        entry = _streams.get(key)
+        if entry is not None and streamable:
+            _streams.move_to_end(key)
+            previous, stream = entry
+            if fingerprint(data) is not None and fingerprint(data) == fingerprint(previous):
+                return previous
+            keep = len(previous) - 1
+            if _extends(previous, data):
+                if len(data) == len(previous) and _same_bars(previous.iloc[keep:], data.iloc[keep:]):
+                    return previous
+                rows = data.iloc[keep:][['High', 'Low', 'Close', 'Volume']].to_numpy(dtype=np.float64)
+                if not np.isnan(rows[:, 2]).any():
+                    values = [stream.revise(*rows[0])]
+                    values += [stream.update(*row) for row in rows[1:]]
+                    tail = pd.DataFrame(values, index=data.index[keep:], columns=INDICATOR_COLUMNS)[columns]
+                    tail = pd.concat([data.iloc[keep:], tail], axis=1)
+                    result = pd.concat([previous.iloc[:keep], tail])
+                    result.attrs = dict(data.attrs)
+                    _streams[key] = (result, stream)
+                    return result
+
+    result = add_indicators(data, columns)
+    stream = None
+    if streamable and not data.empty and not data['Close'].isna().any():
+        stream = IndicatorStream.from_history(data)
+    with _lock:
+        if stream is not None:
+            _streams[key] = (result, stream)
+            _streams.move_to_end(key)
+            while len(_streams) > MAX_STREAMS:
+                _streams.popitem(last=False)
+        else:
+            _streams.pop(key, None)
+    return result
@@ -0,0 +1,438 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# 基础行情列
+INPUT_COLUMNS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+# 默认输出的指标列（顺序与原 calculate_technical_indicators 一致）
+INDICATOR_COLUMNS = [
+    'MA5', 'MA10', 'MA20', 'MA60',
+    'MACD', 'MACD_SIGNAL', 'MACD_HIST',
+    'RSI',
+    'K', 'D', 'J',
+    'BOLL_MIDDLE', 'BOLL_UPPER', 'BOLL_LOWER',
+    'VOLUME_MA5', 'VOLUME_MA10',
+]
+
+# 尾部模式下 EMA 的预热长度：初始值的权重衰减到该值以下
+EMA_TAIL_TOLERANCE = 1e-8
+
+# 分块计算 EMA 时，块内衰减因子的倒数不超过 e^EMA_BLOCK_LOG，避免溢出
+EMA_BLOCK_LOG = 300.0
+
+
+def _lagged(x, window, lag):
+    """x 向前平移 lag 根后与窗口末端对齐的视图"""
+    return x[window - 1 - lag:len(x) - lag]
+
+
+def rolling_means(x, windows, outs=None):
+    """同时计算多个窗口的滑动平均，与 pandas rolling(window).mean() 一致：窗口内有缺失值时为 NaN
+
+    按窗口从小到大累加平移后的序列，较长窗口直接在较短窗口的和上继续累加，
+    每根K线只参与 max(windows) 次连续的向量加法；逐项求和不会像前缀和相减那样累积误差。
+    """
+    n = len(x)
+    if outs is None:
+        outs = [np.empty(n) for _ in windows]
+    acc = None
+    done = 0
+    for window, out in sorted(zip(windows, outs), key=lambda item: item[0]):
+        out[:] = np.nan
+        if n < window:
+            continue
+        if acc is None:
+            acc = x[window - 1:].copy()
+            done = 1
+        else:
+            # 已累加的和对齐到更长窗口的末端
+            acc = acc[window - done:]
+        for lag in range(done, window):
+            acc += _lagged(x, window, lag)
+        done = window
+        np.divide(acc, window, out=out[window - 1:])
+    return outs
+
+
+def rolling_mean(x, window, out=None):
+    return rolling_means(x, [window], None if out is None else [out])[0]
+
+
+def rolling_std(x, window, mean, out=None):
+    """滑动样本标准差（ddof=1），以已算好的滑动平均为中心，避免大数相减损失精度"""
+    n = len(x)
+    if out is None:
+        out = np.empty(n)
+    out[:] = np.nan
+    if n < window:
+        return out
+    center = mean[window - 1:]
+    acc = out[window - 1:]
+    acc[:] = 0.0
+    dev = np.empty(n - window + 1)
+    for lag in range(window):
+        np.subtract(_lagged(x, window, lag), center, out=dev)
+        dev *= dev
+        acc += dev
+    acc /= window - 1
+    np.sqrt(acc, out=acc)
+    return out
+
+
+def _rolling_extreme(x, window, op):
+    out = np.full(len(x), np.nan)
+    if len(x) >= window:
+        acc = out[window - 1:]
+        acc[:] = x[window - 1:]
+        for lag in range(1, window):
+            op(acc, _lagged(x, window, lag), out=acc)
+    return out
+
+
+def rolling_min(x, window):
+    """滑动最小值，窗口内有缺失值时为 NaN"""
+    return _rolling_extreme(x, window, np.minimum)
+
+
+def rolling_max(x, window):
+    """滑动最大值，窗口内有缺失值时为 NaN"""
+    return _rolling_extreme(x, window, np.maximum)
+
+
+def ema(x, span, out=None):
+    """指数移动平均，与 pandas ewm(span=span, adjust=False).mean() 一致
+
+    递推 y[t] = (1-a)·y[t-1] + a·x[t] 按块展开为前缀和，每块只需几次向量运算。
+    """
+    n = len(x)
+    if out is None:
+        out = np.empty(n)
+    out[:] = np.nan
+    finite = np.isfinite(x)
+    start = int(np.argmax(finite)) if n else 0
+    if n == 0 or not finite[start]:
+        return out
+    if not finite[start:].all():
+        # 中间有缺失值时 pandas 的权重规则较复杂，直接交给 pandas
+        out[:] = pd.Series(x).ewm(span=span, adjust=False).mean().to_numpy()
+        return out
+
+    alpha = 2.0 / (span + 1.0)
+    beta = 1.0 - alpha
+    block = max(1, int(EMA_BLOCK_LOG / -np.log(beta)))
+    decay = beta ** np.arange(1, block + 1)
+    prev = out[start] = x[start]
+    for lo in range(start + 1, n, block):
+        seg = x[lo:lo + block]
+        d = decay[:len(seg)]
+        # y[t] = β^(t+1)·(y[-1] + a·Σ x[j]·β^-(j+1))
+        result = out[lo:lo + len(seg)]
+        np.cumsum(seg / d, out=result)
+        result *= alpha
+        result += prev
+        result *= d
+        prev = result[-1]
+    return out
+
+
+class IndicatorSpec:
+    """指标图中的一个节点
+
+    inputs 为依赖的列（基础行情列或其他指标），compute 以依赖列的数组为参数返回结果数组。
+    同一 group 的节点依赖相同，可由 compute_many(输入数组, [param, ...]) 一次算出
+    （如多条均线共用累加和）。lookback 为算出一根K线的结果需要的依赖列之前的K线数，
+    供尾部模式确定最小计算范围。
+    """
+
+    def __init__(self, inputs, compute, group=None, param=None, compute_many=None, lookback=0):
+        self.inputs = list(inputs)
+        self.compute = compute
+        self.group = group
+        self.param = param
+        self.compute_many = compute_many
+        self.lookback = lookback
+
+
+# 已注册的指标：[(列名正则, 由匹配结果构造 IndicatorSpec 的函数)]
+_registry = []
+
+
+def register_indicator(pattern):
+    """注册一类指标的装饰器，pattern 需完整匹配列名，被装饰函数接收 re.Match 返回 IndicatorSpec
+
+    后注册的规则优先，可用来覆盖内置指标。
+    """
+    regex = re.compile(pattern)
+
+    def decorator(builder):
+        _registry.insert(0, (regex, builder))
+        get_spec.cache_clear()
+        _resolve.cache_clear()
+        return builder
+    return decorator
+
+
+@lru_cache(maxsize=1024)
+def get_spec(name):
+    """查找列名对应的指标定义，未知列名抛出 ValueError"""
+    for regex, builder in _registry:
+        match = regex.fullmatch(name)
+        if match:
+            return builder(match)
+    raise ValueError(f"未知的技术指标: {name}")
+
+
+def resolve(columns):
+    """解析所需指标的依赖图，返回按依赖顺序排列的 [(列名, IndicatorSpec)]（不含基础行情列）"""
+    return _resolve(tuple(columns))
+
+
+@lru_cache(maxsize=256)
+def _resolve(columns):
+    order = []
+    specs = {}
+    visiting = set()
+
+    def visit(name):
+        if name in INPUT_COLUMNS or name in specs:
+            return
+        if name in visiting:
+            raise ValueError(f"技术指标存在循环依赖: {name}")
+        visiting.add(name)
+        spec = get_spec(name)
+        for dep in spec.inputs:
+            visit(dep)
+        visiting.discard(name)
+        specs[name] = spec
+        order.append((name, spec))
+
+    for name in columns:
+        visit(name)
+    return order
+
+
+def _window(match, default):
+    return int(match.group(1)) if match.group(1) else default
+
+
+def _mean_of(source, window):
+    return IndicatorSpec([source], lambda x: rolling_mean(x, window), group=f'{source}.mean',
+                         param=window, compute_many=rolling_means, lookback=window - 1)
+
+
+def ema_lookback(span):
+    """EMA 理论上依赖全部历史，返回初始值权重衰减到 EMA_TAIL_TOLERANCE 以下所需的K线数"""
+    return int(np.ceil(np.log(EMA_TAIL_TOLERANCE) / np.log(1.0 - 2.0 / (span + 1.0))))
+
+
+@register_indicator(r'MA(\d+)')
+def _ma(match):
+    return _mean_of('Close', int(match.group(1)))
+
+
+@register_indicator(r'VOLUME_MA(\d+)')
+def _volume_ma(match):
+    return _mean_of('Volume', int(match.group(1)))
+
+
+@register_indicator(r'EMA(\d+)')
+def _ema(match):
+    span = int(match.group(1))
+    return IndicatorSpec(['Close'], lambda close: ema(close, span), lookback=ema_lookback(span))
+
+
+@register_indicator(r'MACD')
+def _macd(match):
+    return IndicatorSpec(['EMA12', 'EMA26'], np.subtract)
+
+
+@register_indicator(r'MACD_SIGNAL')
+def _macd_signal(match):
+    return IndicatorSpec(['MACD'], lambda macd: ema(macd, 9), lookback=ema_lookback(9))
+
+
+@register_indicator(r'MACD_HIST')
+def _macd_hist(match):
+    return IndicatorSpec(['MACD', 'MACD_SIGNAL'], np.subtract)
+
+
+def _delta(close):
+    # 首根K线以及缺失K线前后的涨跌计为0，与 pandas where 把 NaN 归入"非上涨/非下跌"的行为一致
+    delta = np.zeros(len(close))
+    if len(close) > 1:
+        np.subtract(close[1:], close[:-1], out=delta[1:])
+    return np.nan_to_num(delta, nan=0.0)
+
+
+@register_indicator(r'GAIN')
+def _gain(match):
+    return IndicatorSpec(['Close'], lambda close: np.maximum(_delta(close), 0.0), lookback=1)
+
+
+@register_indicator(r'LOSS')
+def _loss(match):
+    return IndicatorSpec(['Close'], lambda close: np.maximum(-_delta(close), 0.0), lookback=1)
+
+
+@register_indicator(r'(GAIN|LOSS)_MA(\d+)')
+def _gain_loss_ma(match):
+    return _mean_of(match.group(1), int(match.group(2)))
+
+
+def _rsi(gain, loss):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100.0 - 100.0 / (1.0 + gain / loss)
+
+
+@register_indicator(r'RSI(\d*)')
+def _rsi_spec(match):
+    window = _window(match, 14)
+    return IndicatorSpec([f'GAIN_MA{window}', f'LOSS_MA{window}'], _rsi)
+
+
+@register_indicator(r'LOW_MIN(\d+)')
+def _low_min(match):
+    window = int(match.group(1))
+    return IndicatorSpec(['Low'], lambda low: rolling_min(low, window), lookback=window - 1)
+
+
+@register_indicator(r'HIGH_MAX(\d+)')
+def _high_max(match):
+    window = int(match.group(1))
+    return IndicatorSpec(['High'], lambda high: rolling_max(high, window), lookback=window - 1)
+
+
+def _rsv(close, low_min, high_max):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (close - low_min) / (high_max - low_min) * 100
+
+
+@register_indicator(r'RSV(\d*)')
+def _rsv_spec(match):
+    window = _window(match, 9)
+    return IndicatorSpec(['Close', f'LOW_MIN{window}', f'HIGH_MAX{window}'], _rsv)
+
+
+@register_indicator(r'K')
+def _k(match):
+    return IndicatorSpec(['RSV9'], lambda rsv: rolling_mean(rsv, 3), lookback=2)
+
+
+@register_indicator(r'D')
+def _d(match):
+    return IndicatorSpec(['K'], lambda k: rolling_mean(k, 3), lookback=2)
+
+
+@register_indicator(r'J')
+def _j(match):
+    return IndicatorSpec(['K', 'D'], lambda k, d: 3 * k - 2 * d)
+
+
+@register_indicator(r'STD(\d+)')
+def _std(match):
+    window = int(match.group(1))
+    return IndicatorSpec(['Close', f'MA{window}'], lambda close, mean: rolling_std(close, window, mean),
+                         lookback=window - 1)
+
+
+@register_indicator(r'BOLL_MIDDLE')
+def _boll_middle(match):
+    return IndicatorSpec(['MA20'], lambda middle: middle)
+
+
+@register_indicator(r'BOLL_UPPER')
+def _boll_upper(match):
+    return IndicatorSpec(['MA20', 'STD20'], lambda middle, std: middle + 2 * std)
+
+
+@register_indicator(r'BOLL_LOWER')
+def _boll_lower(match):
+    return IndicatorSpec(['MA20', 'STD20'], lambda middle, std: middle - 2 * std)
+
+
+def evaluate(inputs, columns):
+    """只计算所需指标及其依赖，返回 {列名: 数组}（包含中间结果）
+
+    inputs 为基础行情列的映射（如 DataFrame），只读取依赖图用到的列。
+    同组节点（如多条均线）合并计算，公共中间结果（如 MA20、EMA26）只算一次。
+    """
+    order = resolve(columns)
+    values = {}
+
+    def value(name):
+        if name not in values:
+            values[name] = np.ascontiguousarray(np.asarray(inputs[name], dtype=np.float64))
+        return values[name]
+
+    for name, spec in order:
+        if name in values:
+            continue
+        args = [value(dep) for dep in spec.inputs]
+        if spec.group is not None:
+            members = [(other, s) for other, s in order if s.group == spec.group and other not in values]
+            results = spec.compute_many(*args, [s.param for _, s in members])
+            values.update((other, result) for (other, _), result in zip(members, results))
+        else:
+            values[name] = spec.compute(*args)
+    return values
+
+
+def compute_indicators(high, low, close, volume, columns=INDICATOR_COLUMNS):
+    """计算指定的技术指标，返回 (n, len(columns)) 的 float64 数组（列连续存储）"""
+    inputs = {'High': high, 'Low': low, 'Close': close, 'Volume': volume}
+    values = evaluate(inputs, columns)
+    out = np.empty((len(close), len(columns)), order='F')
+    for i, name in enumerate(columns):
+        out[:, i] = values[name]
+    return out
+
+
+def add_indicators(data, columns=INDICATOR_COLUMNS):
+    """返回附加了指定技术指标列（默认全部内置指标）的新 DataFrame，原数据不变，attrs（含数据指纹）保留"""
+    columns = list(columns)
+    values = evaluate(data, columns)
+    out = np.empty((len(data), len(columns)), order='F')
+    for i, name in enumerate(columns):
+        out[:, i] = values[name]
+    indicators = pd.DataFrame(out, index=data.index, columns=columns, copy=False)
+    base = data.drop(columns=[c for c in columns if c in data.columns])
+    result = pd.concat([base, indicators], axis=1)
+    result.attrs = dict(data.attrs)
+    return result
+
+
+def tail_length(columns, count=1):
+    """计算指定指标最后 count 根K线所需的最少行情K线数（与历史总长度无关）"""
+    needed = {}
+
+    def visit(name, bars):
+        if needed.get(name, 0) >= bars:
+            return
+        needed[name] = bars
+        if name in INPUT_COLUMNS:
+            return
+        spec = get_spec(name)
+        for dep in spec.inputs:
+            visit(dep, bars + spec.lookback)
+
+    for name in columns:
+        visit(name, count)
+    return max((bars for name, bars in needed.items() if name in INPUT_COLUMNS), default=count)
+
+
+def evaluate_tail(data, columns, count=1):
+    """只计算指定指标最后 count 根K线的值，返回 count 行的 DataFrame
+
+    只取所需的最少K线（如 MACD 为两段 EMA 的预热长度，布林带约 40 根）计算，
+    代价与所选历史区间的长度无关；滑动窗口类指标与全量计算完全一致，
+    EMA 类指标的差异不超过 EMA_TAIL_TOLERANCE 的相对权重。
+    """
+    columns = list(columns)
+    data = data.iloc[-tail_length(columns, count):]
+    values = evaluate(data, columns)
+    count = min(count, len(data))
+    return pd.DataFrame({name: values[name][len(data) - count:] for name in columns},
+                        index=data.index[len(data) - count:])
@@ -0,0 +1,184 @@
+from datetime import datetime, time, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from pandas.tseries.holiday import (
+    AbstractHolidayCalendar, Holiday, GoodFriday, USLaborDay, USMartinLutherKingJr,
+    USMemorialDay, USPresidentsDay, USThanksgivingDay, nearest_workday, sunday_to_monday
+)
+
+# 收盘后仍视为“交易中”的时间，保证能取到最终收盘价
+SETTLE_DELAY = timedelta(minutes=20)
+
+# 交易中行情数据的默认刷新间隔（按整点对齐，所有进程的缓存同时过期）
+DEFAULT_REFRESH = timedelta(minutes=5)
+
+_END_OF_DAY = time(23, 59, 59, 999999)
+
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    """纽交所/纳斯达克休市日"""
+    rules = [
+        Holiday('NewYearsDay', month=1, day=1, observance=sunday_to_monday),
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday('Juneteenth', month=6, day=19, start_date='2022-01-01', observance=nearest_workday),
+        Holiday('USIndependenceDay', month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday('Christmas', month=12, day=25, observance=nearest_workday),
+    ]
+
+
+@lru_cache(maxsize=32)
+def _nyse_holidays(year):
+    holidays = NYSEHolidayCalendar().holidays(f'{year}-01-01', f'{year}-12-31')
+    return frozenset(ts.date() for ts in holidays)
+
+
+def _nyse_sessions(day):
+    if day.weekday() >= 5 or day in _nyse_holidays(day.year):
+        return []
+    return [(time(9, 30), time(16, 0))]
+
+
+def _china_sessions(day):
+    # 农历节假日无法按规则推算，未计入，休市日仅会多刷新几次
+    if day.weekday() >= 5:
+        return []
+    return [(time(9, 30), time(11, 30)), (time(13, 0), time(15, 0))]
+
+
+def _fx_sessions(day):
+    # 外汇：纽约时间周日17:00开盘至周五17:00收盘
+    weekday = day.weekday()
+    if weekday == 6:
+        return [(time(17, 0), _END_OF_DAY)]
+    if weekday == 4:
+        return [(time(0, 0), time(17, 0))]
+    if weekday == 5:
+        return []
+    return [(time(0, 0), _END_OF_DAY)]
+
+
+def _cme_sessions(day):
+    # CME Globex 期货：周日18:00开盘至周五17:00，每日17:00-18:00休市
+    weekday = day.weekday()
+    if weekday == 6:
+        return [(time(18, 0), _END_OF_DAY)]
+    if weekday == 4:
+        return [(time(0, 0), time(17, 0))]
+    if weekday == 5:
+        return []
+    return [(time(0, 0), time(17, 0)), (time(18, 0), _END_OF_DAY)]
+
+
+def _crypto_sessions(day):
+    return [(time(0, 0), _END_OF_DAY)]
+
+
+# 市场代码 -> (时区, 交易时段函数)
+MARKETS = {
+    'NYSE': (ZoneInfo('America/New_York'), _nyse_sessions),
+    'SSE': (ZoneInfo('Asia/Shanghai'), _china_sessions),
+    'SZSE': (ZoneInfo('Asia/Shanghai'), _china_sessions),
+    'FX': (ZoneInfo('America/New_York'), _fx_sessions),
+    'CME': (ZoneInfo('America/New_York'), _cme_sessions),
+    'CRYPTO': (ZoneInfo('UTC'), _crypto_sessions),
+}
+
+
+def get_market(symbol):
+    """根据代码判断所属市场"""
+    symbol = symbol.upper()
+    if symbol.endswith('.SS'):
+        return 'SSE'
+    if symbol.endswith('.SZ'):
+        return 'SZSE'
+    if symbol.endswith('=X'):
+        return 'FX'
+    if symbol.endswith('=F'):
+        return 'CME'
+    if symbol.endswith('-USD') or symbol.endswith('USDT'):
+        return 'CRYPTO'
+    # 指数（^GSPC 等）与 wiki_stocks.csv 中的股票均为美股
+    return 'NYSE'
+
+
+def _session_windows(market, day):
+    """返回某个本地日期的交易时段（带时区的起止时间）"""
+    tz, sessions = MARKETS[market]
+    return [
+        (datetime.combine(day, start, tz), datetime.combine(day, end, tz))
+        for start, end in sessions(day)
+    ]
+
+
+def is_market_open(symbol, now=None):
+    """判断市场当前是否处于交易时段（含收盘后的结算延迟）"""
+    return _current_session(get_market(symbol), now or datetime.now(timezone.utc)) is not None
+
+
+def _current_session(market, now):
+    tz = MARKETS[market][0]
+    local_day = now.astimezone(tz).date()
+    for day in (local_day - timedelta(days=1), local_day):
+        for start, end in _session_windows(market, day):
+            if start <= now < end + SETTLE_DELAY:
+                return start, end
+    return None
+
+
+def next_open(symbol, now=None):
+    """返回下一个交易时段的开盘时间"""
+    market = get_market(symbol)
+    now = now or datetime.now(timezone.utc)
+    local_day = now.astimezone(MARKETS[market][0]).date()
+    for offset in range(15):
+        for start, _ in _session_windows(market, local_day + timedelta(days=offset)):
+            if start > now:
+                return start
+    return now + timedelta(days=1)
+
+
+def last_session_date(symbol, now=None):
+    """最近一个已开盘交易时段的本地日期：交易中为当天，休市时为上一个交易日"""
+    market = get_market(symbol)
+    now = now or datetime.now(timezone.utc)
+    local_day = now.astimezone(MARKETS[market][0]).date()
+    for offset in range(15):
+        day = local_day - timedelta(days=offset)
+        if any(start <= now for start, _ in _session_windows(market, day)):
+            return day
+    return local_day
+
+
+def freshness_deadline(symbol, now=None, refresh=DEFAULT_REFRESH):
+    """计算行情数据的有效期截止时间
+
+    交易中：到下一个按 refresh 对齐的刷新点为止，但不超过本时段收盘（加结算延迟）；
+    休市中：到下一次开盘为止，期间缓存保持有效。
+    """
+    now = now or datetime.now(timezone.utc)
+    if now.tzinfo is None:
+        now = now.astimezone(timezone.utc)
+    market = get_market(symbol)
+    session = _current_session(market, now)
+    if session is None:
+        return next_open(symbol, now)
+    step = refresh.total_seconds()
+    boundary = datetime.fromtimestamp((now.timestamp() // step + 1) * step, timezone.utc)
+    return min(boundary, session[1] + SETTLE_DELAY)
+
+
+def cache_key_until(symbol, refresh=DEFAULT_REFRESH):
+    """用作缓存键的一部分：在同一有效期内保持不变，过期后自动变化"""
+    return freshness_deadline(symbol, refresh=refresh).isoformat()
+
+
+def ttl_seconds(symbol, refresh=DEFAULT_REFRESH):
+    """距离有效期截止还剩的秒数，用于按品种设置缓存过期时间"""
+    remaining = freshness_deadline(symbol, refresh=refresh) - datetime.now(timezone.utc)
+    return max(remaining.total_seconds(), 1.0)
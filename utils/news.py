@@ -0,0 +1,62 @@
+import urllib.parse
+from datetime import datetime, timedelta
+
+from utils.cache import TTLCache, stale_while_revalidate
+from utils.feeds import parse_feed
+
+# 金融新闻页面的六个分类对应的搜索词
+NEWS_TOPICS = [
+    "global financial market stock",
+    "US stock market NYSE NASDAQ",
+    "A股市场 上证指数 创业板",
+    "外汇市场 人民币 汇率",
+    "大宗商品 黄金 原油",
+    "比特币 加密货币",
+]
+
+# 新闻缓存10分钟，过期后保留1天供 Google News 故障时使用
+news_cache = TTLCache(ttl=600, maxsize=256, stale_ttl=24 * 3600)
+
+
+@stale_while_revalidate(news_cache, 'google_news', prefix='news.fetch_financial_news')
+def fetch_financial_news(topic, lang="zh", num_news=20):
+    """获取最近一周的金融新闻（不依赖会话状态，可在后台线程刷新）
+
+    RSS 获取失败时抛出异常，以便计入熔断器；没有新闻时返回空列表。
+    """
+    # URL编码搜索词
+    encoded_topic = urllib.parse.quote(topic)
+
+    # 根据语言设置选择不同的 Google News 参数
+    hl = "zh-CN" if lang == "zh" else "en"
+    gl = "CN" if lang == "zh" else "US"
+
+    # 构建 Google News RSS URL，添加时间参数以获取最近一周的新闻
+    rss_url = f"https://news.google.com/rss/search?q={encoded_topic}&hl={hl}&gl={gl}&ceid={gl}:{hl}&tbs=qdr:w"
+
+    feed = parse_feed(rss_url)
+    if not feed.entries:
+        if getattr(feed, 'bozo', False):
+            raise feed.get('bozo_exception') or RuntimeError("RSS 解析失败")
+        return []
+
+    one_week_ago = datetime.now() - timedelta(days=7)
+
+    news_list = []
+    for entry in feed.entries:
+        try:
+            # 只保留最近一周的新闻
+            published_time = datetime(*entry.published_parsed[:6])
+            if published_time >= one_week_ago:
+                news_list.append({
+                    'title': entry.title,
+                    'link': entry.link,
+                    'published': entry.published,
+                    'source': entry.source.title if hasattr(entry, 'source') else "未知来源"
+                })
+            if len(news_list) >= num_news:
+                break
+        except AttributeError:
+            continue
+
+    return news_list
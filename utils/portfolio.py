@@ -0,0 +1,249 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.history import stale_tickers, sync_many
+from utils.history_store import load_closes, load_meta_many, period_start
+from utils.symbols import POPULAR_COINS, SymbolIndex, coin_index, stock_index
+
+# 计算 beta 与相关性的基准指数
+BENCHMARK = '^GSPC'
+
+# 市场价格页中的品种：yfinance 代码 -> 名称
+MARKET_ASSETS = {
+    'CNY=X': 'USD/CNY',
+    'CADCNY=X': 'CAD/CNY',
+    'GC=F': 'Gold',
+    'BTC-USD': 'Bitcoin',
+    'ETH-USD': 'Ethereum',
+    'SOL-USD': 'Solana',
+}
+
+# 无法由数据推算时使用的每年观测数（交易日）
+TRADING_DAYS = 252
+
+DAY_SECONDS = 86400
+
+_universe = None
+_universe_lock = threading.Lock()
+
+
+def symbol_universe():
+    """自选范围：股票、加密货币（yfinance 代码为 XXX-USD，见 utils.symbols）与市场价格品种
+
+    返回列为 symbol、name、kind（stock / crypto / market）的 DataFrame，代码重复时保留先出现的。
+    同一代码的多个加密货币（包装币等）依次优先保留热门币种（见 POPULAR_COINS）、ID 或名称即代码的币种，
+    其余按热度排名（见 SymbolIndex.ranks），使 BTC-USD 对应 Bitcoin、WETH-USD 对应 WETH。
+    """
+    stocks, coins = stock_index(), coin_index()
+    market = pd.DataFrame({'symbol': list(MARKET_ASSETS), 'name': list(MARKET_ASSETS.values()), 'kind': 'market'})
+    stocks = pd.DataFrame({'symbol': stocks.codes, 'name': stocks.names, 'kind': 'stock'})
+    coins = pd.DataFrame({'symbol': coins.codes, 'name': coins.names, 'kind': 'crypto',
+                          'popular': coins.ranks < len(POPULAR_COINS),
+                          'canonical': [code.casefold() in (id_.casefold(), name.casefold())
+                                        for code, name, id_ in zip(coins.codes, coins.names, coins.ids)],
+                          'rank': coins.ranks})
+    coins = coins[(coins['symbol'] != '') & (coins['name'] != '')]
+    coins['symbol'] = coins['symbol'].str.upper() + '-USD'
+    coins = (coins.sort_values(['popular', 'canonical', 'rank'], ascending=[False, False, True], kind='stable')
+             .drop(columns=['popular', 'canonical', 'rank']))
+    universe = pd.concat([market, stocks, coins])
+    return universe.drop_duplicates('symbol').reset_index(drop=True)
+
+
+def universe_index():
+    """自选范围的搜索索引（标签为 "名称 (代码)"），供服务端搜索的品种选择器使用；进程内只构建一次"""
+    global _universe
+    if _universe is None:
+        with _universe_lock:
+            if _universe is None:
+                universe = symbol_universe()
+                _universe = SymbolIndex(universe['symbol'], universe['name'], universe['symbol'],
+                                        universe['name'] + ' (' + universe['symbol'] + ')')
+    return _universe
+
+
+def refresh_closes(tickers, period, on_progress=None):
+    """同步本地数据缺失或过期的品种，返回成功同步的数量"""
+    stale = stale_tickers(tickers, period)
+    return sync_many(stale, period, on_progress) if stale else 0
+
+
+def _local_days(timestamps, tz):
+    """把K线时间戳换算为所在交易所当地的日期序号（自 1970-01-01 起的天数）
+
+    日K线的时间戳是当地零点；按最近一根K线时的 UTC 偏移换算后取最接近的整天，
+    夏令时切换带来的一小时偏差不会跨日。
+    """
+    offset = pd.Timestamp(int(timestamps[-1]), unit='s', tz='UTC').tz_convert(tz or 'UTC').utcoffset()
+    return np.rint((timestamps + offset.total_seconds()) / DAY_SECONDS).astype(np.int64)
+
+
+def align_closes(closes, tzs=None):
+    """把 {代码: (时间戳数组, 收盘价数组)} 按日期对齐为一个收盘价矩阵（DataFrame，行为日期、列为代码）
+
+    行为所有品种出现过的日期的并集（加密货币含周末），某品种当天没有K线时为 NaN。
+    """
+    tzs = tzs or {}
+    tickers = list(closes)
+    days = {ticker: _local_days(closes[ticker][0], tzs.get(ticker)) for ticker in tickers}
+    axis = np.unique(np.concatenate(list(days.values()))) if tickers else np.array([], dtype=np.int64)
+    matrix = np.full((len(axis), len(tickers)), np.nan)
+    for i, ticker in enumerate(tickers):
+        matrix[np.searchsorted(axis, days[ticker]), i] = closes[ticker][1]
+    index = pd.DatetimeIndex(pd.to_datetime(axis * DAY_SECONDS, unit='s'), name='Date')
+    return pd.DataFrame(matrix, index=index, columns=tickers)
+
+
+def load_aligned_closes(tickers, period):
+    """批量读取一组品种在 period 内的收盘价并按日期对齐（只读本地存储，缺少数据的品种不在结果中）"""
+    tickers = list(dict.fromkeys(tickers))
+    start = period_start(period)
+    metas = load_meta_many(tickers)
+    closes = load_closes(tickers, start)
+    closes = {ticker: closes[ticker] for ticker in tickers if ticker in closes}
+    return align_closes(closes, {ticker: meta['tz'] for ticker, meta in metas.items()})
+
+
+def returns_from_closes(closes):
+    """各品种相邻两次有效收盘价之间的收益率，记在后一次所在的日期，没有K线的日期为 NaN"""
+    values = closes.to_numpy(dtype=np.float64)
+    previous = closes.ffill().shift(1).to_numpy(dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = values / previous - 1
+    return pd.DataFrame(returns, index=closes.index, columns=closes.columns)
+
+
+def _pairwise_moments(returns):
+    """对每一对品种只使用两者都有收益率的日期，以矩阵乘法一次求出所有组合的样本数、协方差与方差
+
+    返回 (样本数, 协方差, 行品种方差, 列品种方差)，均为 (N, N) 数组。
+    """
+    values = returns.to_numpy(dtype=np.float64)
+    mask = ~np.isnan(values)
+    x = np.where(mask, values, 0.0)
+    m = mask.astype(np.float64)
+    n = m.T @ m
+    sum_x = x.T @ m          # [i, j]：i 在两者都有数据的日期上的和
+    sum_xx = (x * x).T @ m
+    sum_xy = x.T @ x
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dof = np.where(n > 1, n - 1, np.nan)
+        cov = (sum_xy - sum_x * sum_x.T / n) / dof
+        var_x = (sum_xx - sum_x ** 2 / n) / dof
+    return n, cov, var_x, var_x.T
+
+
+def correlation_matrix(returns, window=None, min_periods=20):
+    """收益率相关系数矩阵；window 为行数时只使用最近 window 个日期（滚动窗口的最新值）
+
+    每一对品种只用共同有数据的日期，共同样本少于 min_periods 时为 NaN。
+    """
+    if window is not None:
+        returns = returns.iloc[-window:]
+    n, cov, var_x, var_y = _pairwise_moments(returns)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = np.clip(cov / np.sqrt(var_x * var_y), -1, 1)
+    corr[n < min_periods] = np.nan
+    return pd.DataFrame(corr, index=returns.columns, columns=returns.columns)
+
+
+def _rolling_against(returns, target, window):
+    """各品种与 target 列的滚动协方差与方差（同样只用两者都有数据的日期），所有品种一起计算"""
+    y = returns[target].to_numpy(dtype=np.float64)[:, None]
+    x = returns.to_numpy(dtype=np.float64)
+    mask = ~np.isnan(x) & ~np.isnan(y)
+    x = np.where(mask, x, 0.0)
+    y = np.where(mask, y, 0.0)
+    # 六组窗口和拼成一个矩阵，一次滚动求和
+    stacked = np.hstack([mask.astype(np.float64), x, y, x * x, y * y, x * y])
+    sums = pd.DataFrame(stacked).rolling(window, min_periods=1).sum().to_numpy()
+    n, sum_x, sum_y, sum_xx, sum_yy, sum_xy = np.hsplit(sums, 6)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dof = np.where(n > 1, n - 1, np.nan)
+        cov = (sum_xy - sum_x * sum_y / n) / dof
+        var_x = (sum_xx - sum_x ** 2 / n) / dof
+        var_y = (sum_yy - sum_y ** 2 / n) / dof
+    return n, cov, var_x, var_y
+
+
+def rolling_correlation(returns, target, window, min_periods=20):
+    """各品种与 target 列收益率的滚动相关系数（DataFrame，与 returns 同形状）"""
+    n, cov, var_x, var_y = _rolling_against(returns, target, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = np.clip(cov / np.sqrt(var_x * var_y), -1, 1)
+    corr[n < min_periods] = np.nan
+    return pd.DataFrame(corr, index=returns.index, columns=returns.columns)
+
+
+def rolling_beta(returns, benchmark, window, min_periods=20):
+    """各品种相对 benchmark 列的滚动 beta"""
+    n, cov, _, var_y = _rolling_against(returns, benchmark, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        beta = cov / var_y
+    beta[n < min_periods] = np.nan
+    return pd.DataFrame(beta, index=returns.index, columns=returns.columns)
+
+
+def periods_per_year(returns):
+    """按各品种的实际观测频率估算每年的收益率个数（股票约 252，加密货币约 365）"""
+    counts = returns.notna().sum()
+    if len(returns.index) < 2:
+        return pd.Series(TRADING_DAYS, index=returns.columns, dtype=np.float64)
+    years = (returns.index[-1] - returns.index[0]).days / 365.25
+    if years <= 0:
+        return pd.Series(TRADING_DAYS, index=returns.columns, dtype=np.float64)
+    return (counts / years).where(counts > 1, TRADING_DAYS)
+
+
+def summarize(closes, returns, benchmark=BENCHMARK):
+    """每个品种一行的统计：最新价、区间涨跌、年化波动率、最大回撤，以及相对基准的 beta 与相关系数"""
+    values = closes.to_numpy(dtype=np.float64)
+    filled = closes.ffill().bfill()
+    first, last = filled.iloc[0], filled.iloc[-1]
+    drawdown = (filled / filled.cummax() - 1).min()
+    summary = pd.DataFrame({
+        'Last': last,
+        'Return %': (last / first - 1) * 100,
+        'Volatility %': returns.std() * np.sqrt(periods_per_year(returns)) * 100,
+        'Max Drawdown %': drawdown * 100,
+        'Observations': np.count_nonzero(~np.isnan(values), axis=0),
+    })
+    if benchmark in returns.columns:
+        _, cov, var_x, var_y = _pairwise_moments(returns)
+        column = returns.columns.get_loc(benchmark)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            summary['Beta'] = cov[:, column] / var_y[:, column]
+            summary['Correlation'] = cov[:, column] / np.sqrt(var_x[:, column] * var_y[:, column])
+    return summary
+
+
+def portfolio_pnl(closes, holdings, cost_basis=None):
+    """持仓组合的每日市值与盈亏
+
+    holdings 为 {代码: 持有数量}，cost_basis 为 {代码: 每单位成本}（缺省时以区间首日价格为成本）。
+    收盘价按日期前向填充（休市日沿用上一收盘价）后与持仓向量相乘。
+    返回 (每日 DataFrame：Value、P&L、Return %，各品种 DataFrame：数量、成本、市值、盈亏)。
+    """
+    holdings = pd.Series(holdings, dtype=np.float64)
+    holdings = holdings[holdings.index.isin(closes.columns) & (holdings != 0)]
+    prices = closes[holdings.index].ffill()
+    first = prices.bfill().iloc[0] if len(prices) else pd.Series(dtype=np.float64)
+    costs = pd.Series(cost_basis or {}, dtype=np.float64).reindex(holdings.index).fillna(first)
+    invested = float(costs @ holdings)
+
+    value = prices.fillna(costs).to_numpy() @ holdings.to_numpy()
+    daily = pd.DataFrame({'Value': value, 'P&L': value - invested}, index=closes.index)
+    daily['Return %'] = daily['P&L'] / invested * 100 if invested else np.nan
+
+    last = prices.iloc[-1] if len(prices) else costs
+    positions = pd.DataFrame({
+        'Quantity': holdings,
+        'Cost': costs,
+        'Last': last,
+        'Value': last * holdings,
+        'P&L': (last - costs) * holdings,
+    })
+    positions['Weight %'] = positions['Value'] / positions['Value'].sum() * 100
+    return daily, positions
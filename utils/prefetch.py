@@ -0,0 +1,126 @@
+import logging
+import os
+import threading
+from collections import Counter
+
+from utils.company import fetch_company_info
+from utils.history import prefetch_history
+from utils.news import NEWS_TOPICS, fetch_financial_news
+from utils.quotes import (
+    OVERVIEW_CRYPTO_SYMBOLS, OVERVIEW_STOCK_SYMBOLS, get_crypto_quote,
+    refresh_stock_quotes, stock_quote_expires_in
+)
+
+logger = logging.getLogger(__name__)
+
+# 后台预取的检查间隔与提前量（秒）：缓存在 REFRESH_LEAD 秒内过期的数据会被提前刷新
+PREFETCH_INTERVAL = 30
+REFRESH_LEAD = 60
+
+# 市场价格页面使用的品种
+MARKET_PRICE_SYMBOLS = ['CNY=X', 'CADCNY=X', 'GC=F', 'BTC-USD', 'ETH-USD', 'SOL-USD']
+
+# 预取浏览量最高的股票数量，以及尚无浏览记录时的默认热门股票
+TOP_TICKERS = 20
+DEFAULT_POPULAR_TICKERS = ['AAPL', 'MSFT', 'NVDA', 'AMZN', 'GOOGL', 'TSLA']
+
+# 新闻页面按当前语言请求，两种语言都预取
+NEWS_LANGUAGES = ['zh', 'en']
+NEWS_COUNT = 20
+
+_views = Counter()
+_views_lock = threading.Lock()
+_thread = None
+_start_lock = threading.Lock()
+_stop = threading.Event()
+
+
+def record_view(ticker):
+    """记录一次股票浏览，用于决定预取哪些股票"""
+    with _views_lock:
+        _views[ticker] += 1
+
+
+def popular_tickers(n=TOP_TICKERS):
+    """浏览量最高的股票，不足时用默认热门股票补齐"""
+    with _views_lock:
+        tickers = [ticker for ticker, _ in _views.most_common(n)]
+    for ticker in DEFAULT_POPULAR_TICKERS:
+        if len(tickers) >= n:
+            break
+        if ticker not in tickers:
+            tickers.append(ticker)
+    return tickers
+
+
+def _safe(func, *args):
+    """执行单个预取请求，失败只记录日志（失败已计入对应上游的熔断器）"""
+    try:
+        func(*args)
+    except Exception as e:
+        logger.warning("预取 %s%s 失败: %s", func.__name__, args, e)
+
+
+def _expiring(expires_in):
+    return expires_in is None or expires_in < REFRESH_LEAD
+
+
+def _prefetch_quotes():
+    stale = [symbol for symbol in OVERVIEW_STOCK_SYMBOLS if _expiring(stock_quote_expires_in(symbol))]
+    _safe(refresh_stock_quotes, stale)
+    for symbol in OVERVIEW_CRYPTO_SYMBOLS:
+        if _expiring(get_crypto_quote.expires_in(symbol)):
+            _safe(get_crypto_quote.refresh, symbol)
+
+
+def _prefetch_histories():
+    for symbol in MARKET_PRICE_SYMBOLS + popular_tickers():
+        _safe(prefetch_history, symbol, REFRESH_LEAD)
+
+
+def _prefetch_company_info():
+    for ticker in popular_tickers():
+        if _expiring(fetch_company_info.expires_in(ticker)):
+            _safe(fetch_company_info.refresh, ticker)
+
+
+def _prefetch_news():
+    for lang in NEWS_LANGUAGES:
+        for topic in NEWS_TOPICS:
+            if _expiring(fetch_financial_news.expires_in(topic, lang, NEWS_COUNT)):
+                _safe(fetch_financial_news.refresh, topic, lang, NEWS_COUNT)
+
+
+PREFETCH_JOBS = [_prefetch_quotes, _prefetch_histories, _prefetch_news, _prefetch_company_info]
+
+
+def run_once():
+    """执行一轮预取，单个任务失败不影响其他任务"""
+    for job in PREFETCH_JOBS:
+        try:
+            job()
+        except Exception:
+            logger.exception("预取任务 %s 失败", job.__name__)
+
+
+def _run():
+    while not _stop.is_set():
+        run_once()
+        _stop.wait(PREFETCH_INTERVAL)
+
+
+def start_prefetcher():
+    """启动后台预取线程（每个服务进程只启动一次）；设置 PREFETCH_ENABLED=0 可关闭"""
+    global _thread
+    if os.getenv('PREFETCH_ENABLED', '1') == '0':
+        return
+    with _start_lock:
+        if _thread is None or not _thread.is_alive():
+            _stop.clear()
+            _thread = threading.Thread(target=_run, name='prefetch', daemon=True)
+            _thread.start()
+
+
+def stop_prefetcher():
+    """停止后台预取线程"""
+    _stop.set()
@@ -0,0 +1,153 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import yfinance as yf
+
+from utils.cache import quote_cache, refresh_in_background, stale_while_revalidate, upstream_flight
+from utils.circuit_breaker import get_breaker
+from utils.http_client import http_get
+from utils.market_calendar import ttl_seconds
+
+# 主页市场概览中的品种（指数、汇率、黄金 / Binance 交易对）
+OVERVIEW_STOCK_SYMBOLS = ['^GSPC', '^DJI', '^IXIC', '000001.SS', '399001.SZ', 'CNY=X', 'CADCNY=X', 'GC=F']
+OVERVIEW_CRYPTO_SYMBOLS = ['BTCUSDT', 'ETHUSDT', 'SOLUSDT']
+
+# 并发请求的线程上限，所有会话共用
+MAX_WORKERS = 8
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='quotes')
+
+# yfinance 没有多品种的行情接口，每个品种各发一次请求，在这个线程池中并发执行；
+# 与 _executor 分开，避免在同一线程池内提交并等待子任务而死锁
+_history_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='quote-history')
+
+
+def _last_quote(data):
+    """从单个品种的日线中取最新价格及当日涨跌幅"""
+    data = data.dropna(subset=['Close'])
+    if data.empty:
+        return None, None
+    latest = data.iloc[-1]
+    current_price = float(latest['Close'])
+    price_change = (current_price - latest['Open']) / latest['Open'] * 100
+    return current_price, float(price_change)
+
+
+def _history(symbol):
+    """单个品种最近几天的日线（各交易所时区不同，取几天以保证有最新一根）"""
+    return yf.Ticker(symbol).history(period='5d', interval='1d')
+
+
+def _download_quotes(symbols):
+    """并发请求各品种的日线并写入缓存，耗时约为一次往返
+
+    所有品种的请求都抛出异常时计为 yfinance 熔断器的一次失败，否则上游有应答，计为成功
+    （个别品种出错或没有数据属于正常的未命中）。
+    """
+    quotes = {symbol: (None, None) for symbol in symbols}
+    breaker = get_breaker('yfinance')
+    futures = {symbol: _history_executor.submit(_history, symbol) for symbol in symbols}
+    errors = 0
+    for symbol, future in futures.items():
+        try:
+            frame = future.result()
+        except Exception:
+            errors += 1
+            continue
+        if frame is None or frame.empty:
+            continue
+        quotes[symbol] = _last_quote(frame)
+        if quotes[symbol][0] is not None:
+            # 交易中每分钟刷新，休市时保留到下次开盘
+            quote_cache.set(('stock_quote', symbol), quotes[symbol],
+                            ttl_seconds(symbol, refresh=timedelta(minutes=1)))
+    if symbols and errors == len(symbols):
+        breaker.record_failure()
+    elif symbols:
+        breaker.record_success()
+    return quotes
+
+
+def refresh_stock_quotes(symbols):
+    """跳过缓存立即刷新行情（供后台预取使用）"""
+    if not symbols or not get_breaker('yfinance').allow():
+        return {}
+    key = ('stock_quotes', tuple(sorted(symbols)))
+    return upstream_flight.do(key, _download_quotes, list(symbols))
+
+
+def stock_quote_expires_in(symbol):
+    """缓存行情距离过期的秒数，无缓存时返回 None"""
+    return quote_cache.expires_in(('stock_quote', symbol))
+
+
+def get_stock_quotes(symbols):
+    """并发获取多只股票/指数/汇率的最新价格和涨跌幅
+
+    已在共享缓存中的品种直接返回，只并发请求未命中的品种；已过期的品种先返回旧值，
+    在后台并发刷新。yfinance 熔断期间不发请求。
+    返回 {symbol: (price, change)}，获取失败的品种为 (None, None)。
+    """
+    quotes = {}
+    missing = []
+    stale = []
+    for symbol in symbols:
+        state, value = quote_cache.get_stale(('stock_quote', symbol))
+        quotes[symbol] = value if state else (None, None)
+        if state is None:
+            missing.append(symbol)
+        elif state == 'stale':
+            stale.append(symbol)
+
+    breaker = get_breaker('yfinance')
+    # 半开时只有一次放行机会：有缺失品种时只判断一次，两批请求都依此发送；
+    # 只有过期品种时由后台刷新在确实提交时再判断
+    allowed = bool(missing) and breaker.allow()
+    if stale and (allowed or not missing):
+        key = ('stock_quotes', tuple(sorted(stale)))
+        refresh_in_background(key, upstream_flight.do, key, _download_quotes, stale,
+                              gate=None if allowed else breaker.allow)
+    if allowed:
+        key = ('stock_quotes', tuple(sorted(missing)))
+        quotes.update(upstream_flight.do(key, _download_quotes, missing))
+    return quotes
+
+
+@stale_while_revalidate(quote_cache, 'binance', should_cache=lambda quote: quote[0] is not None)
+def get_crypto_quote(symbol):
+    """获取 Binance 交易对的最新价格和24小时涨跌幅
+
+    请求、传输错误或服务端错误（5xx、429）时抛出异常（计入熔断器）；交易对不存在（400）等返回 (None, None)。
+    """
+    url = f"https://api.binance.com/api/v3/ticker/24hr?symbol={symbol}"
+    response = http_get(url)
+    if response.status_code >= 500 or response.status_code == 429:
+        response.raise_for_status()
+    try:
+        data = response.json()
+        return float(data['lastPrice']), float(data['priceChangePercent'])
+    except (ValueError, KeyError, TypeError):
+        return None, None
+
+
+def get_market_overview(stock_symbols, crypto_symbols):
+    """并发获取市场概览：yfinance 品种与 Binance 交易对都并行请求，总耗时约为一次往返
+
+    返回 {symbol: (price, change)}。
+    """
+    stock_future = _executor.submit(get_stock_quotes, list(stock_symbols))
+    crypto_futures = {symbol: _executor.submit(get_crypto_quote, symbol) for symbol in crypto_symbols}
+    quotes = stock_future.result()
+    for symbol, future in crypto_futures.items():
+        try:
+            quotes[symbol] = future.result() or (None, None)
+        except Exception:
+            quotes[symbol] = (None, None)
+    return quotes
+
+
+def is_quote_stale(symbol):
+    """判断缓存中的行情是否为过期数据（上游故障或正在后台刷新）"""
+    if quote_cache.peek(('stock_quote', symbol))[0] == 'stale':
+        return True
+    return get_crypto_quote.is_stale(symbol)
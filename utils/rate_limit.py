@@ -0,0 +1,88 @@
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+class TokenBucket:
+    """令牌桶限流器：平均每秒 rate 个请求，允许 capacity 个突发请求
+
+    取不到令牌的请求排队等待，等待超过 max_wait 则放弃（由调用方提示稍后重试）。
+    """
+
+    def __init__(self, rate, capacity, max_wait=10.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_wait = max_wait
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self.shed = 0
+
+    def _reserve(self):
+        """预订一个令牌，返回需要等待的秒数；等待过长时返回 None 且不消耗令牌"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # 上游要求暂停（Retry-After）期间不发放令牌
+            wait = max(self._paused_until - now, 0.0)
+            if self._tokens < 1:
+                wait = max(wait, (1 - self._tokens) / self.rate)
+            if wait > self.max_wait:
+                self.shed += 1
+                return None
+            self._tokens -= 1
+            return wait
+
+    def acquire(self):
+        """获取一个令牌，成功返回 True，需要等待过久时返回 False"""
+        wait = self._reserve()
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def pause(self, seconds):
+        """按上游的 Retry-After 暂停发放令牌"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+def parse_retry_after(value, default=60.0):
+    """解析 Retry-After 响应头（秒数或 HTTP 日期）"""
+    if not value:
+        return default
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return default
+
+
+# 各主机的限流配置：(每秒请求数, 突发容量)
+# CoinGecko 公共接口约每分钟 10~30 次，按每分钟 10 次保守配置
+HOST_LIMITS = {
+    'api.coingecko.com': (10 / 60, 5),
+}
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(host):
+    """获取主机对应的限流器，未配置限流的主机返回 None"""
+    if host not in HOST_LIMITS:
+        return None
+    with _limiters_lock:
+        if host not in _limiters:
+            rate, capacity = HOST_LIMITS[host]
+            _limiters[host] = TokenBucket(rate, capacity)
+        return _limiters[host]
@@ -0,0 +1,29 @@
+# 时间周期 -> pandas 重采样规则（区间左闭右开，以区间起点标记K线，如周线标记为周一）
+TIMEFRAMES = {
+    '15m': '15min',
+    '30m': '30min',
+    '1h': '1h',
+    '4h': '4h',
+    '1d': '1D',
+    '1wk': 'W-MON',
+    '1mo': 'MS',
+    '3mo': 'QS',
+}
+
+# 各字段的聚合方式
+OHLCV_AGGREGATION = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+
+def resample_bars(data, timeframe):
+    """把K线合并为更长的时间周期：开盘取首根、最高取最大、最低取最小、收盘取末根、成交量求和
+
+    按数据自身的时区划分区间（历史数据为交易所时区），没有K线的区间（休市、夜盘）不输出。
+    目标周期必须不短于原始K线的周期。
+    """
+    if timeframe not in TIMEFRAMES:
+        raise ValueError(f"不支持的时间周期: {timeframe}")
+    if data is None or data.empty:
+        return data
+    aggregation = {col: how for col, how in OHLCV_AGGREGATION.items() if col in data.columns}
+    bars = data.resample(TIMEFRAMES[timeframe], label='left', closed='left').agg(aggregation)
+    return bars.dropna(subset=['Open'])
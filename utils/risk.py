@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+
+# 默认置信水平与持有期（交易日）
+CONFIDENCE = 0.95
+HORIZONS = (1, 10)
+
+# 蒙特卡洛路径数
+PATHS = 100_000
+
+# 每批生成的随机收益率元素上限（每个数组约 8MB），路径按批生成以限制内存
+CHUNK_ELEMENTS = 1_000_000
+
+# 估计收益率分布所需的最少观测数
+MIN_OBSERVATIONS = 30
+
+# 蒙特卡洛方法：normal 为多元正态（均值与协方差来自历史），bootstrap 为按日重抽样历史收益率
+METHODS = ('normal', 'bootstrap')
+
+
+def log_returns(closes):
+    """对齐后收盘价（DataFrame 或 Series）的日对数收益率矩阵 (T, N)
+
+    只使用所有品种都有收盘价的日期，休市日的变动计入下一个共同交易日。
+    """
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame()
+    values = closes.dropna().to_numpy(dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.diff(np.log(values), axis=0)
+    return returns[np.isfinite(returns).all(axis=1)]
+
+
+def _factor(cov):
+    """协方差矩阵的分解因子 L（L @ L.T == cov）；非正定时改用截断负特征值后的特征分解"""
+    try:
+        return np.linalg.cholesky(cov)
+    except np.linalg.LinAlgError:
+        eigenvalues, eigenvectors = np.linalg.eigh(cov)
+        return eigenvectors * np.sqrt(np.clip(eigenvalues, 0, None))
+
+
+def simulate_pnl(returns, weights, horizon, paths=PATHS, method='normal', seed=None):
+    """蒙特卡洛模拟持有 horizon 个交易日后组合的收益率（相对当前市值），返回 (paths,) 数组
+
+    returns 为日对数收益率矩阵 (T, N)，weights 为各品种的市值（或权重）。
+    normal：假设日收益率独立同分布于多元正态，horizon 日收益率直接取 N(h·μ, h·Σ)；
+    bootstrap：每条路径从历史中有放回地抽取 horizon 个交易日的收益率向量并求和，保留厚尾与相关性。
+    路径按批生成，每批的随机数不超过 CHUNK_ELEMENTS 个元素。
+    """
+    if method not in METHODS:
+        raise ValueError(f"不支持的模拟方法: {method}")
+    returns = np.asarray(returns, dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    weights = weights / weights.sum()
+    count, assets = returns.shape
+    rng = np.random.default_rng(seed)
+    pnl = np.empty(paths)
+
+    if method == 'normal':
+        drift = horizon * returns.mean(axis=0)
+        factor = _factor(np.atleast_2d(np.cov(returns, rowvar=False))) * np.sqrt(horizon)
+        chunk = max(1, CHUNK_ELEMENTS // assets)
+    else:
+        chunk = max(1, CHUNK_ELEMENTS // (assets * horizon))
+
+    for start in range(0, paths, chunk):
+        size = min(chunk, paths - start)
+        if method == 'normal':
+            simulated = drift + rng.standard_normal((size, assets)) @ factor.T
+        else:
+            simulated = returns[rng.integers(0, count, (size, horizon))].sum(axis=1)
+        pnl[start:start + size] = np.expm1(simulated) @ weights
+    return pnl
+
+
+def historical_pnl(returns, weights, horizon):
+    """历史模拟：所有重叠的 horizon 日窗口内实际收益率对当前组合的影响，返回 (窗口数,) 数组"""
+    returns = np.asarray(returns, dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    weights = weights / weights.sum()
+    cumulative = np.vstack([np.zeros((1, returns.shape[1])), np.cumsum(returns, axis=0)])
+    windows = cumulative[horizon:] - cumulative[:-horizon]
+    return np.expm1(windows) @ weights
+
+
+def var_cvar(pnl, confidence=CONFIDENCE):
+    """由收益率样本计算 VaR 与 CVaR（均以正数表示损失）"""
+    if len(pnl) == 0:
+        return np.nan, np.nan
+    threshold = np.quantile(pnl, 1 - confidence)
+    return -threshold, -pnl[pnl <= threshold].mean()
+
+
+def portfolio_risk(closes, weights, horizons=HORIZONS, confidence=CONFIDENCE, paths=PATHS,
+                   method='normal', seed=None):
+    """组合在各持有期的 VaR/CVaR（占当前市值的比例），蒙特卡洛与历史模拟各一组
+
+    closes 为按日期对齐的收盘价（列与 weights 顺序一致），weights 为各品种的市值或权重。
+    观测数不足 MIN_OBSERVATIONS 时对应结果为 NaN。返回以持有期为索引的 DataFrame。
+    """
+    returns = log_returns(closes)
+    rows = {}
+    for horizon in horizons:
+        row = dict.fromkeys(['MC VaR', 'MC CVaR', 'Hist VaR', 'Hist CVaR'], np.nan)
+        if len(returns) >= MIN_OBSERVATIONS:
+            row['MC VaR'], row['MC CVaR'] = var_cvar(
+                simulate_pnl(returns, weights, horizon, paths, method, seed), confidence)
+        if len(returns) - horizon + 1 >= MIN_OBSERVATIONS:
+            row['Hist VaR'], row['Hist CVaR'] = var_cvar(historical_pnl(returns, weights, horizon), confidence)
+        rows[horizon] = row
+    table = pd.DataFrame.from_dict(rows, orient='index')
+    table.index.name = 'Horizon'
+    table.attrs['observations'] = len(returns)
+    return table
+
+
+def describe_risk(table, confidence=CONFIDENCE, lang='zh'):
+    """把 portfolio_risk 的结果写成提示词中的几行文字，没有有效结果时返回空字符串"""
+    zh = lang == 'zh'
+    lines = []
+    for horizon, row in table.iterrows():
+        parts = [
+            f"{label[0] if zh else label[1]} VaR {row[prefix + ' VaR']:.2%} / CVaR {row[prefix + ' CVaR']:.2%}"
+            for prefix, label in (('MC', ('蒙特卡洛', 'Monte Carlo')), ('Hist', ('历史模拟', 'Historical')))
+            if not np.isnan(row[prefix + ' VaR'])
+        ]
+        if parts:
+            head = f"{horizon} 日 {confidence:.0%} 置信度：" if zh else f"{horizon}-day at {confidence:.0%}: "
+            lines.append(head + ("；" if zh else "; ").join(parts))
+    return "\n".join(lines)
@@ -0,0 +1,154 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+from utils.history import SUPERSET_PERIOD, sync_many
+from utils.history_store import OHLCV_COLUMNS, load_tails, stored_tickers
+from utils.indicators import evaluate, tail_length
+from utils.market_calendar import MARKETS, get_market, last_session_date
+
+# 筛选用到的指标
+SCREEN_COLUMNS = ['RSI', 'MACD', 'MACD_SIGNAL', 'BOLL_UPPER', 'BOLL_LOWER']
+
+# 每只股票读取的K线数：算出最后两根K线（判断金叉/死叉需要前一根）的指标所需的最小长度
+TAIL_BARS = tail_length(SCREEN_COLUMNS, 2)
+
+# 每个任务处理的股票数，摊薄进程间通信与数据库连接的开销
+CHUNK_SIZE = 64
+
+MAX_WORKERS = os.cpu_count() or 1
+
+# 筛选条件：名称 -> (筛选函数, 排序列, 是否升序)
+SCREENS = {
+    'rsi_oversold': (lambda df: df['RSI'] < 30, 'RSI', True),
+    'rsi_overbought': (lambda df: df['RSI'] > 70, 'RSI', False),
+    'macd_golden_cross': (lambda df: (df['PREV_MACD_HIST'] <= 0) & (df['MACD_HIST'] > 0), 'MACD_HIST', False),
+    'macd_death_cross': (lambda df: (df['PREV_MACD_HIST'] >= 0) & (df['MACD_HIST'] < 0), 'MACD_HIST', True),
+    'above_boll_upper': (lambda df: df['Close'] > df['BOLL_UPPER'], 'BOLL_DISTANCE', False),
+    'below_boll_lower': (lambda df: df['Close'] < df['BOLL_LOWER'], 'BOLL_DISTANCE', True),
+}
+
+SUMMARY_COLUMNS = ['Date', 'Close', 'Change %', 'RSI', 'MACD', 'MACD_SIGNAL', 'MACD_HIST',
+                   'PREV_MACD_HIST', 'BOLL_UPPER', 'BOLL_LOWER', 'BOLL_DISTANCE']
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def summarize(timestamps, values):
+    """由最近的K线（load_tails 返回的数组）计算单只股票的筛选指标，K线不足两根时返回 None"""
+    if len(values) < 2:
+        return None
+    inputs = dict(zip(OHLCV_COLUMNS, values.T))
+    indicators = evaluate(inputs, SCREEN_COLUMNS)
+    rsi, macd, signal, upper, lower = (indicators[name][-2:] for name in SCREEN_COLUMNS)
+    close, prev_close = values[-1, 3], values[-2, 3]
+    middle = (upper[-1] + lower[-1]) / 2
+    half_width = (upper[-1] - lower[-1]) / 2
+    return {
+        'Date': pd.Timestamp(int(timestamps[-1]), unit='s', tz='UTC'),
+        'Close': close,
+        'Change %': (close - prev_close) / prev_close * 100 if prev_close else float('nan'),
+        'RSI': rsi[-1],
+        'MACD': macd[-1],
+        'MACD_SIGNAL': signal[-1],
+        'MACD_HIST': macd[-1] - signal[-1],
+        'PREV_MACD_HIST': macd[-2] - signal[-2],
+        'BOLL_UPPER': upper[-1],
+        'BOLL_LOWER': lower[-1],
+        # 收盘价偏离中轨的程度，以半个带宽为单位（>1 为突破上轨，<-1 为跌破下轨）
+        'BOLL_DISTANCE': (close - middle) / half_width if half_width else float('nan'),
+    }
+
+
+def _screen_chunk(tickers):
+    """在工作进程中执行：批量读取本地K线并计算筛选指标"""
+    rows = []
+    for ticker, (timestamps, values) in load_tails(tickers, TAIL_BARS).items():
+        row = summarize(timestamps, values)
+        if row is not None:
+            row['Ticker'] = ticker
+            rows.append(row)
+    return rows
+
+
+def _get_pool():
+    """共享的进程池，首次使用时创建
+
+    使用 spawn 启动工作进程：Streamlit 进程中有多个后台线程，fork 可能复制到被持有的锁。
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=MAX_WORKERS,
+                                        mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def screen_universe(tickers, max_workers=None):
+    """对一组股票计算筛选指标，返回以股票代码为索引的 DataFrame（本地无数据的股票不在结果中）
+
+    股票按 CHUNK_SIZE 分块交给进程池并行计算；max_workers 为 None 时使用共享进程池，
+    为 1 时在当前进程中顺序执行。
+    """
+    tickers = list(tickers)
+    chunks = [tickers[i:i + CHUNK_SIZE] for i in range(0, len(tickers), CHUNK_SIZE)]
+    if max_workers == 1 or len(chunks) <= 1:
+        rows = [row for chunk in chunks for row in _screen_chunk(chunk)]
+    elif max_workers is None:
+        try:
+            rows = [row for result in _get_pool().map(_screen_chunk, chunks) for row in result]
+        except BrokenProcessPool:
+            _reset_pool()
+            raise
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers,
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            rows = [row for result in pool.map(_screen_chunk, chunks) for row in result]
+    summary = pd.DataFrame(rows, columns=['Ticker'] + SUMMARY_COLUMNS)
+    return summary.set_index('Ticker')
+
+
+def apply_screen(summary, name):
+    """按筛选条件过滤并排序"""
+    condition, sort_by, ascending = SCREENS[name]
+    return summary[condition(summary)].sort_values(sort_by, ascending=ascending)
+
+
+def current_mask(summary, now=None):
+    """各股票最后一根K线是否属于其市场最近一个交易时段（交易中为当天）
+
+    本地K线可能已过期多日，只有为 True 的股票才能算作"今日"触发信号。
+    """
+    markets = pd.Series([get_market(ticker) for ticker in summary.index], index=summary.index)
+    current = pd.Series(False, index=summary.index)
+    for market, tickers in markets.groupby(markets).groups.items():
+        dates = summary.loc[tickers, 'Date'].dt.tz_convert(MARKETS[market][0]).dt.date
+        current[tickers] = dates >= last_session_date(tickers[0], now)
+    return current
+
+
+def missing_tickers(tickers):
+    """返回本地尚无K线数据的股票"""
+    stored = stored_tickers()
+    return [ticker for ticker in tickers if ticker not in stored]
+
+
+def sync_missing(tickers, on_progress=None):
+    """从 yfinance 获取本地缺失的股票历史（SUPERSET_PERIOD 范围），yfinance 熔断时停止
+
+    on_progress(已完成数, 总数) 用于显示进度，返回成功获取的股票数。
+    """
+    return sync_many(tickers, SUPERSET_PERIOD, on_progress)
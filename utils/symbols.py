@@ -0,0 +1,247 @@
+import os
+import pickle
+import re
+import threading
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+from utils.config import get_data_dir
+
+# 索引的来源文件（相对工作目录）
+STOCKS_CSV = 'wiki_stocks.csv'
+COINS_CSV = 'coins.csv'
+
+# 索引格式变化时递增，使旧的索引文件失效
+INDEX_VERSION = 3
+
+# 搜索默认返回的结果数
+TOP_K = 20
+
+# 模糊匹配（三字母组相似度）的最低得分，以及启用模糊匹配的最短查询长度
+FUZZY_THRESHOLD = 0.3
+FUZZY_MIN_LENGTH = 3
+
+# 搜索键的类型与匹配等级（数值越小越靠前）；完全匹配优先于前缀匹配。
+# 代码唯一时（股票）代码完全匹配最优先；代码有重复时（加密货币的 symbol 常被包装币沿用），名称/ID 完全匹配优先，
+# 但热门品种（见 POPULAR_COINS）的任何完全匹配都在最优先一级
+CODE, NAME, ID, WORD = 0, 1, 2, 3
+EXACT_TIERS = {CODE: 0, NAME: 1, ID: 1}
+EXACT_TIERS_SHARED_CODES = {CODE: 1, NAME: 0, ID: 0}
+PREFIX_TIERS = {CODE: 2, NAME: 3, ID: 3, WORD: 4}
+FUZZY_TIER = 5
+
+# 主要加密货币的 CoinGecko id（大致按市值排列）。coins.csv 按 id 字母排序、没有市值排名，
+# 同级搜索结果与同一代码的多个币种按此排序，使 "btc" 对应 Bitcoin 而不是同代码的小币种
+POPULAR_COINS = (
+    'bitcoin', 'ethereum', 'tether', 'binancecoin', 'solana', 'ripple', 'usd-coin', 'dogecoin',
+    'cardano', 'tron', 'staked-ether', 'avalanche-2', 'shiba-inu', 'chainlink', 'polkadot',
+    'bitcoin-cash', 'wrapped-bitcoin', 'the-open-network', 'litecoin', 'near', 'uniswap', 'stellar',
+    'internet-computer', 'dai', 'leo-token', 'ethereum-classic', 'aptos', 'sui', 'monero', 'cosmos',
+    'hedera-hashgraph', 'filecoin', 'okb', 'crypto-com-chain', 'arbitrum', 'optimism', 'vechain',
+    'maker', 'pepe', 'render-token', 'injective-protocol', 'the-graph', 'algorand',
+)
+
+_WORD = re.compile(r'[^\w]+')
+
+_indexes = None
+_lock = threading.Lock()
+
+
+class SymbolIndex:
+    """按行存放的代码、名称、ID 与选择框标签，外加 代码/标签 -> 行号 的哈希表，查询均为 O(1)
+
+    股票的 ID 即代码、标签为 "名称 (代码)"；加密货币的 ID 为 CoinGecko id、标签为名称。
+    同一代码或标签出现多次时以最后一行为准，标签保持首次出现的顺序（与原先的 dict 推导式一致）。
+    ranks 为各行的热度排名（越小越靠前）：popular 中的 ID 按其顺序排在最前，其余按行顺序。
+    """
+
+    __slots__ = ('codes', 'names', 'ids', 'labels', 'ranks', '_popular', '_by_code', '_by_label',
+                 '_exact_tiers', '_keys', '_key_rows', '_key_kinds', '_grams', '_gram_rows', '_gram_counts')
+
+    def __init__(self, codes, names, ids, labels, popular=()):
+        self.codes = tuple(codes)
+        self.names = tuple(names)
+        self.ids = tuple(ids)
+        self.labels = tuple(labels)
+        popular = {id_: rank for rank, id_ in enumerate(popular)}
+        self._popular = len(popular)
+        self.ranks = np.array([popular.get(id_, len(popular) + row) for row, id_ in enumerate(self.ids)],
+                              dtype=np.int32)
+        self._by_code = {code: row for row, code in enumerate(self.codes) if code}
+        self._by_label = {label: row for row, label in enumerate(self.labels)}
+        codes = [_normalize(code) for code in self.codes if code]
+        self._exact_tiers = EXACT_TIERS if len(set(codes)) == len(codes) else EXACT_TIERS_SHARED_CODES
+        self._build_search()
+
+    def _build_search(self):
+        """编译搜索结构：排序后的搜索键数组（前缀查找用二分，等价于压平的前缀树）与三字母组倒排表
+
+        倒排表的行号拼接为一个数组，_grams 只记录每个三字母组的起止位置，索引文件加载时无需重建大量小数组。
+        """
+        keys = []
+        grams = {}
+        gram_counts = np.zeros(len(self.codes), dtype=np.int32)
+        for row, (code, name, id_) in enumerate(zip(self.codes, self.names, self.ids)):
+            fields = {(_normalize(code), CODE), (_normalize(name), NAME), (_normalize(id_), ID)}
+            words = _WORD.split(_normalize(name))
+            fields.update((word, WORD) for word in words[1:])
+            keys.extend((key, kind, row) for key, kind in fields if key)
+            row_grams = set()
+            for text in {_normalize(code), _normalize(name), _normalize(id_)}:
+                row_grams.update(_trigrams(text))
+            for gram in row_grams:
+                grams.setdefault(gram, []).append(row)
+            gram_counts[row] = len(row_grams)
+        keys.sort()
+        self._keys = [key for key, _, _ in keys]
+        self._key_kinds = np.array([kind for _, kind, _ in keys], dtype=np.int8)
+        self._key_rows = np.array([row for _, _, row in keys], dtype=np.int32)
+        self._grams = {}
+        start = 0
+        for gram, rows in grams.items():
+            self._grams[gram] = (start, start + len(rows))
+            start += len(rows)
+        self._gram_rows = np.fromiter((row for rows in grams.values() for row in rows), dtype=np.int32, count=start)
+        self._gram_counts = gram_counts
+
+    def __len__(self):
+        return len(self.codes)
+
+    def options(self):
+        """选择框的选项：去重后的标签"""
+        return list(self._by_label)
+
+    def name_of(self, code):
+        """代码 -> 名称，未知代码返回 None"""
+        row = self._by_code.get(code)
+        return None if row is None else self.names[row]
+
+    def code_of(self, label):
+        """标签 -> 代码，未知标签返回 None"""
+        row = self._by_label.get(label)
+        return None if row is None else self.codes[row]
+
+    def id_of(self, label):
+        """标签（加密货币即名称） -> ID，未知标签返回 None"""
+        row = self._by_label.get(label)
+        return None if row is None else self.ids[row]
+
+    def search(self, query, k=TOP_K):
+        """按代码、名称与 ID 搜索，返回最多 k 个去重后的标签
+
+        依次为完全匹配（代码与名称/ID 的先后见 EXACT_TIERS，热门品种最先）、代码前缀、名称/ID 前缀、名称中任一单词的前缀；
+        结果不足 k 个时再用三字母组相似度做模糊匹配（容忍拼写错误）。同级结果按热度排名（见 ranks），
+        使 "btc" 的首个结果是 Bitcoin 而不是同代码的其他币种。
+        """
+        query = _normalize(query)
+        if not query:
+            return []
+        best = {}
+        lo = bisect_left(self._keys, query)
+        hi = bisect_left(self._keys, query + '\U0010ffff', lo)
+        for position in range(lo, hi):
+            kind = int(self._key_kinds[position])
+            exact = self._keys[position] == query
+            row = int(self._key_rows[position])
+            if exact:
+                tier = 0 if self.ranks[row] < self._popular else self._exact_tiers.get(kind, PREFIX_TIERS[kind])
+            else:
+                tier = PREFIX_TIERS[kind]
+            if tier < best.get(row, FUZZY_TIER + 1):
+                best[row] = tier
+        ranked = sorted(best, key=lambda row: (best[row], self.ranks[row]))
+        labels = list(dict.fromkeys(self.labels[row] for row in ranked))[:k]
+        if len(labels) < k and len(query) >= FUZZY_MIN_LENGTH:
+            labels = list(dict.fromkeys(labels + self._fuzzy(query, k)))[:k]
+        return labels
+
+    def _fuzzy(self, query, k):
+        """三字母组的 Jaccard 相似度最高的 k 个标签"""
+        query_grams = _trigrams(query)
+        postings = [self._gram_rows[slice(*self._grams[gram])] for gram in query_grams if gram in self._grams]
+        if not postings:
+            return []
+        shared = np.bincount(np.concatenate(postings), minlength=len(self.codes))
+        scores = shared / (len(query_grams) + self._gram_counts - shared)
+        candidates = np.flatnonzero(scores >= FUZZY_THRESHOLD)
+        top = candidates[np.argsort(-scores[candidates], kind='stable')[:k * 4]]
+        return list(dict.fromkeys(self.labels[row] for row in top))[:k]
+
+
+def _normalize(text):
+    """搜索用的规范化：去掉首尾空白并忽略大小写"""
+    return text.strip().casefold()
+
+
+def _trigrams(text):
+    """带首尾空格的三字母组集合"""
+    text = f' {text} '
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _read(path):
+    """以字符串读取 CSV（不把 "NaN"、"None" 等名称当作缺失值）"""
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def compile_indexes():
+    """由两个 CSV 编译股票与加密货币索引"""
+    stocks = _read(STOCKS_CSV)
+    coins = _read(COINS_CSV)
+    return {
+        'stocks': SymbolIndex(stocks['code'], stocks['name'], stocks['code'],
+                              stocks['name'] + ' (' + stocks['code'] + ')'),
+        'coins': SymbolIndex(coins['symbol'], coins['name'], coins['id'], coins['name'], POPULAR_COINS),
+    }
+
+
+def _sources():
+    """来源文件的修改时间与大小，任一变化时重新编译"""
+    return {path: (os.stat(path).st_mtime_ns, os.stat(path).st_size) for path in (STOCKS_CSV, COINS_CSV)}
+
+
+def get_index_path():
+    """编译后索引文件的路径"""
+    return get_data_dir() / 'symbols.pkl'
+
+
+def _load():
+    """读取索引文件；不存在、版本不符或来源文件已变化时重新编译并写入"""
+    sources = _sources()
+    path = get_index_path()
+    try:
+        with open(path, 'rb') as f:
+            saved = pickle.load(f)
+        if saved['version'] == INDEX_VERSION and saved['sources'] == sources:
+            return saved['indexes']
+    except (OSError, pickle.UnpicklingError, EOFError, KeyError, AttributeError, TypeError):
+        pass
+    indexes = compile_indexes()
+    temp = path.with_suffix(f'.{os.getpid()}.tmp')
+    with open(temp, 'wb') as f:
+        pickle.dump({'version': INDEX_VERSION, 'sources': sources, 'indexes': indexes}, f,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp, path)
+    return indexes
+
+
+def _indexes_loaded():
+    """进程内只加载一次，之后页面重跑直接使用内存中的索引"""
+    global _indexes
+    if _indexes is None:
+        with _lock:
+            if _indexes is None:
+                _indexes = _load()
+    return _indexes
+
+
+def stock_index():
+    """wiki_stocks.csv 的索引"""
+    return _indexes_loaded()['stocks']
+
+
+def coin_index():
+    """coins.csv 的索引"""
+    return _indexes_loaded()['coins']